@@ -0,0 +1,293 @@
+"""Benchmarks do detector e do endpoint /predict, sem rede.
+
+Uso (a partir de anomaly-detection/)::
+
+    python benchmarks/bench.py                      # roda e compara com baseline.json
+    python benchmarks/bench.py --quick -o out.json  # rodada curta, salva o resultado
+    python benchmarks/bench.py --save-baseline      # grava o resultado como nova baseline
+
+Cada resultado guarda mediana e p95 (em µs por chamada) e vazão. Um caso é
+regressão quando a mediana passa de ``(1 + tolerance)`` vezes a da baseline;
+nesse caso o script sai com código 1.
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+SERVICE_DIR = ROOT / "sensor-monitoring"
+MODEL_PATH = SERVICE_DIR / "models" / "mahalanobis_model.model"
+LEGACY_MODEL_PATH = SERVICE_DIR / "models" / "mahalanobis_model.npz"
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+sys.path.insert(0, str(SERVICE_DIR))
+
+WINDOW_SIZES = (50, 100, 200, 400)
+BATCH_SIZES = (1, 16, 64, 256)
+
+
+def make_windows(batch, samples, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(loc=[0.0, 0.0, 9.8], scale=0.05, size=(batch, samples, 3))
+
+
+def measure(fn, repeat=20, min_time=0.02):
+    """Tempo por chamada (s) em ``repeat`` rodadas de ``number`` chamadas calibradas"""
+    fn()  # aquecimento
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+    return summarize(timings)
+
+
+def summarize(timings, items=1):
+    timings = np.asarray(timings)
+    median = float(np.median(timings))
+    return {
+        "median_us": median * 1e6,
+        "p95_us": float(np.percentile(timings, 95)) * 1e6,
+        "ops_per_s": items / median if median > 0 else float("inf"),
+        "samples": len(timings),
+    }
+
+
+def load_detector():
+    import api
+
+    return api.AnomalyDetector(str(MODEL_PATH), states=api.SensorStateStore())
+
+
+def micro_benchmarks(repeat, window_sizes=WINDOW_SIZES, batch_sizes=BATCH_SIZES):
+    from features import extract_features
+    from spectral import SpectralFeatures
+
+    detector = load_detector()
+    spectral = SpectralFeatures()
+    results = {}
+
+    for samples in window_sizes:
+        window = make_windows(1, samples)[0]
+        features = extract_features(window)
+        results[f"extract_features/window={samples}"] = measure(
+            lambda: extract_features(window), repeat
+        )
+        results[f"spectral_features/window={samples}"] = measure(
+            lambda: spectral(window), repeat
+        )
+        results[f"predict/window={samples}"] = measure(
+            lambda: detector.predict(window, "bench"), repeat
+        )
+
+    from model_format import load_model
+
+    for name, path in (("binary", MODEL_PATH), ("npz", LEGACY_MODEL_PATH)):
+        results[f"load_model/{name}"] = measure(lambda: load_model(path).scorer(), repeat)
+
+    results["mahalanobis_distance/single"] = measure(
+        lambda: detector.mahalanobis_distance(features), repeat
+    )
+    results["calculate_confidence"] = measure(
+        lambda: detector.calculate_confidence(5.0, "bench"), repeat
+    )
+
+    for batch in batch_sizes:
+        windows = make_windows(batch, 100)
+        batch_features = extract_features(windows)
+        name = f"batch={batch}/window=100"
+        results[f"extract_features/{name}"] = measure(lambda: extract_features(windows), repeat)
+        results[f"spectral_features/{name}"] = measure(lambda: spectral(windows), repeat)
+        results[f"mahalanobis_distance/batch={batch}"] = measure(
+            lambda: detector.mahalanobis_distance(batch_features), repeat
+        )
+        results[f"predict_batch/{name}"] = measure(
+            lambda: detector.predict_batch(list(windows)), repeat
+        )
+    return results
+
+
+async def _http_benchmark(requests, concurrency, binary):
+    import httpx
+
+    import api
+    from frames import CONTENT_TYPE, encode_frame
+    from model_registry import ModelRegistry
+
+    states = api.SensorStateStore()
+    api.registry = ModelRegistry(
+        lambda path: api.AnomalyDetector(path, states=states), default_path=str(MODEL_PATH)
+    )
+
+    windows = make_windows(concurrency, 100)
+    if binary:
+        bodies = [encode_frame(w, f"sensor-{i}") for i, w in enumerate(windows)]
+        headers = {"content-type": CONTENT_TYPE}
+    else:
+        bodies = [
+            json.dumps({"data": w.tolist(), "sensor_id": f"sensor-{i}"}).encode()
+            for i, w in enumerate(windows)
+        ]
+        headers = {"content-type": "application/json"}
+
+    latencies = []
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker(idx, count):
+            for _ in range(count):
+                start = time.perf_counter()
+                response = await client.post("/predict", content=bodies[idx], headers=headers)
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        await worker(0, 5)  # aquecimento (carrega o modelo e o pool)
+        latencies.clear()
+        per_worker = max(requests // concurrency, 1)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i, per_worker) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    result = summarize(latencies)
+    result["p99_us"] = float(np.percentile(latencies, 99)) * 1e6
+    result["ops_per_s"] = len(latencies) / elapsed
+    return result
+
+
+def http_benchmarks(requests, concurrency_levels=(1, 16)):
+    results = {}
+    for binary in (False, True):
+        for concurrency in concurrency_levels:
+            name = f"http_predict/{'frame' if binary else 'json'}/concurrency={concurrency}"
+            results[name] = asyncio.run(_http_benchmark(requests, concurrency, binary))
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run(quick=False, include_http=True):
+    # Os logs do serviço distorceriam as medições
+    logging.disable(logging.CRITICAL)
+    try:
+        repeat = 5 if quick else 20
+        results = micro_benchmarks(
+            repeat,
+            window_sizes=(100,) if quick else WINDOW_SIZES,
+            batch_sizes=(1, 64) if quick else BATCH_SIZES,
+        )
+        if include_http:
+            results.update(http_benchmarks(requests=50 if quick else 400))
+    finally:
+        logging.disable(logging.NOTSET)
+    return {"environment": environment(), "results": results}
+
+
+def compare(current, baseline, tolerance=0.25):
+    """Lista de regressões: casos cuja mediana piorou mais que ``tolerance``"""
+    regressions = []
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        ratio = result["median_us"] / reference["median_us"]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                {
+                    "name": name,
+                    "baseline_us": reference["median_us"],
+                    "current_us": result["median_us"],
+                    "ratio": ratio,
+                }
+            )
+    return regressions
+
+
+def print_report(current, baseline=None):
+    reference = baseline["results"] if baseline else {}
+    print(f"{'benchmark':<48} {'mediana µs':>12} {'p95 µs':>12} {'ops/s':>12} {'vs base':>8}")
+    for name, result in current["results"].items():
+        ratio = ""
+        if name in reference:
+            ratio = f"{result['median_us'] / reference[name]['median_us']:.2f}x"
+        print(
+            f"{name:<48} {result['median_us']:>12.1f} {result['p95_us']:>12.1f} "
+            f"{result['ops_per_s']:>12.0f} {ratio:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do serviço de detecção")
+    parser.add_argument("--quick", action="store_true", help="menos repetições e tamanhos")
+    parser.add_argument("--no-http", action="store_true", help="pula o /predict via ASGI")
+    parser.add_argument("-o", "--output", help="arquivo JSON para o resultado")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="baseline para comparar")
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="grava o resultado como baseline"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="piora relativa tolerada (padrão: 0.25)"
+    )
+    args = parser.parse_args()
+
+    current = run(quick=args.quick, include_http=not args.no_http)
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(current, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"\nBaseline salva em {args.baseline}")
+        return 0
+
+    if baseline is not None:
+        if baseline["environment"].get("cpu_count") != current["environment"]["cpu_count"]:
+            print("\nAviso: baseline gerada em outra máquina; compare com cautela.")
+        regressions = compare(current, baseline, args.tolerance)
+        for item in regressions:
+            print(
+                f"REGRESSÃO {item['name']}: {item['baseline_us']:.1f} -> "
+                f"{item['current_us']:.1f} µs ({item['ratio']:.2f}x)"
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
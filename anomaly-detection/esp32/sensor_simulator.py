@@ -1,38 +1,302 @@
-import time
+"""Gerador de carga com sensores virtuais para a API (/predict) e para o coletor (server.py).
+
+Cada sensor virtual produz janelas realistas de acelerômetro (200 Hz, 100
+amostras, 3 eixos): gravidade no eixo Z, a vibração da máquina na rotação
+própria do sensor com harmônicos e ruído, com fase contínua entre janelas.
+Com ``--anomaly-rate`` parte das janelas recebe uma falha injetada (impactos
+periódicos de rolamento e aumento de amplitude).
+
+Modos:
+  - closed-loop (padrão): ``--concurrency`` clientes enviam uma janela e só
+    enviam a próxima após a resposta;
+  - open-loop (``--rate``): requisições disparadas em taxa constante,
+    independentemente das respostas. A latência é medida a partir do horário
+    planejado de envio, então filas no servidor aparecem nos percentis.
+
+Exemplos::
+
+    python sensor_simulator.py --sensors 2000 --concurrency 64 --duration 30
+    python sensor_simulator.py --rate 500 --format frame --anomaly-rate 0.05
+    python sensor_simulator.py --target collector --url http://localhost:4242
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
 import json
-import random
-import requests
-from datetime import datetime
+import sys
+import time
 
-# Configuração do servidor
-SERVER_URL = "http://localhost:8007/predict"  # Altere a URL conforme necessário
+import httpx
+import numpy as np
 
+# frames.py fica no serviço; o simulador reutiliza o mesmo codificador binário
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "sensor-monitoring"))
+from frames import CONTENT_TYPE as FRAME_CONTENT_TYPE, encode_frame  # noqa: E402
 
-def generate_sensor_data():
-    """Gera dados simulados de sensores"""
-    return {
-        "data": [[
-            round(random.uniform(20.0, 100.0), 2),  # Temperatura (°C)
-            round(random.uniform(0.1, 5.0), 2),  # Vibração (g)
-            round(random.uniform(50.0, 500.0), 2),  # Consumo de energia (W)
-        ]],
-        "sensor_id": "test_sensor"
-    }
+DEFAULT_URLS = {"predict": "http://localhost:8000", "collector": "http://localhost:4242"}
+SAMPLE_RATE = 200  # Hz
+WINDOW_SIZE = 100  # amostras por janela
+GRAVITY = 9.80665
 
 
-def send_data():
-    """Envia dados para o servidor"""
-    while True:
-        sensor_data = generate_sensor_data()
+class VirtualSensor:
+    """Acelerômetro simulado de uma máquina rotativa"""
+
+    def __init__(
+        self, sensor_id, rng, sample_rate=SAMPLE_RATE, window=WINDOW_SIZE, anomaly_rate=0.0
+    ):
+        self.sensor_id = sensor_id
+        self.rng = rng
+        self.sample_rate = sample_rate
+        self.window = window
+        self.anomaly_rate = anomaly_rate
+        self.sample_index = 0
+
+        # Cada máquina tem rotação, amplitude e orientação próprias
+        self.frequency = rng.uniform(20.0, 45.0)
+        self.amplitude = rng.uniform(0.02, 0.08, size=3)
+        self.phase = rng.uniform(0.0, 2 * np.pi, size=3)
+        self.noise = rng.uniform(0.005, 0.02)
+        self.offset = rng.normal(0.0, 0.05, size=3)
+
+    def next_window(self):
+        """Próxima janela (samples, 3) e se ela contém uma falha injetada"""
+        t = (self.sample_index + np.arange(self.window)) / self.sample_rate
+        self.sample_index += self.window
+
+        angle = 2 * np.pi * self.frequency * t[:, None] + self.phase
+        data = self.amplitude * (np.sin(angle) + 0.3 * np.sin(2 * angle))
+        data += self.rng.normal(0.0, self.noise, size=data.shape)
+        data += self.offset
+        data[:, 2] += GRAVITY
+
+        anomalous = self.rng.random() < self.anomaly_rate
+        if anomalous:
+            # Impactos periódicos (defeito de rolamento) e vibração mais forte
+            impacts = np.zeros(self.window)
+            period = max(int(self.sample_rate / self.rng.uniform(5.0, 15.0)), 1)
+            impacts[self.rng.integers(period) :: period] = self.rng.uniform(0.5, 2.0)
+            data += impacts[:, None] * self.rng.normal(1.0, 0.2, size=3)
+            data[:, :2] *= self.rng.uniform(2.0, 5.0)
+        return data, anomalous
+
+
+def encode_request(target, fmt, sensor_id, window, sample_rate=SAMPLE_RATE):
+    """Corpo e cabeçalhos no formato esperado pelo alvo"""
+    if fmt == "frame":
+        body = encode_frame(window, sensor_id=sensor_id, sample_rate=sample_rate)
+        return body, {"content-type": FRAME_CONTENT_TYPE}
+    if target == "collector":
+        payload = {axis: window[:, i].tolist() for i, axis in enumerate("xyz")}
+        payload["sensor_id"] = sensor_id
+    else:
+        payload = {"data": window.tolist(), "sensor_id": sensor_id}
+    return json.dumps(payload).encode(), {"content-type": "application/json"}
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies = []
+        self.status_counts = {}
+        self.errors = {}
+        self.sent = 0
+        self.injected = 0
+        self.flagged = 0
+        self.skipped = 0
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+
+    def record(self, latency, status=None, error=None):
+        self.latencies.append(latency)
+        if error is not None:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        else:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def report(self):
+        elapsed = (self.finished_at or time.perf_counter()) - self.started_at
+        completed = len(self.latencies)
+        failed = sum(self.errors.values()) + sum(
+            count for status, count in self.status_counts.items() if status >= 400
+        )
+        latencies = np.asarray(self.latencies) * 1000
+        percentiles = (
+            {f"p{p}": float(np.percentile(latencies, p)) for p in (50, 90, 95, 99)}
+            if completed
+            else {}
+        )
+        return {
+            "duration_s": elapsed,
+            "sent": self.sent,
+            "completed": completed,
+            "skipped": self.skipped,
+            "throughput_rps": completed / elapsed if elapsed > 0 else 0.0,
+            "error_rate": failed / completed if completed else 0.0,
+            "status": {str(k): v for k, v in sorted(self.status_counts.items())},
+            "errors": self.errors,
+            "latency_ms": {
+                **percentiles,
+                "mean": float(latencies.mean()) if completed else 0.0,
+                "max": float(latencies.max()) if completed else 0.0,
+            },
+            "anomalies": {"injected": self.injected, "flagged": self.flagged},
+        }
+
+
+async def send_window(client, path, target, fmt, sensor, stats, scheduled_at=None):
+    window, anomalous = sensor.next_window()
+    body, headers = encode_request(target, fmt, sensor.sensor_id, window, sensor.sample_rate)
+    stats.sent += 1
+    stats.injected += anomalous
+    start = time.perf_counter() if scheduled_at is None else scheduled_at
+    try:
+        response = await client.post(path, content=body, headers=headers)
+    except httpx.HTTPError as e:
+        stats.record(time.perf_counter() - start, error=type(e).__name__)
+        return
+    stats.record(time.perf_counter() - start, status=response.status_code)
+    if target == "predict" and response.status_code == 200:
         try:
-            response = requests.post(SERVER_URL, json=sensor_data)
-            print(f"Enviado: {json.dumps(sensor_data)} | Resposta: {response.text}")
-        except requests.exceptions.RequestException as e:
-            print(f"Erro ao enviar dados: {e}")
+            stats.flagged += bool(response.json().get("is_anomaly"))
+        except ValueError:
+            pass
+
+
+async def closed_loop(client, path, target, fmt, sensors, concurrency, duration, stats):
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id):
+        own = sensors[worker_id::concurrency] or sensors
+        i = 0
+        while time.perf_counter() < deadline:
+            await send_window(client, path, target, fmt, own[i % len(own)], stats)
+            i += 1
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+
+async def open_loop(client, path, target, fmt, sensors, rate, duration, max_inflight, stats):
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    inflight = set()
+    i = 0
+    while True:
+        scheduled_at = start + i * interval
+        if scheduled_at - start >= duration:
+            break
+        delay = scheduled_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(inflight) >= max_inflight:
+            # O próprio gerador está saturado; contabiliza em vez de atrasar o cronograma
+            stats.skipped += 1
+        else:
+            sensor = sensors[i % len(sensors)]
+            task = asyncio.create_task(
+                send_window(client, path, target, fmt, sensor, stats, scheduled_at)
+            )
+            inflight.add(task)
+            task.add_done_callback(inflight.discard)
+        i += 1
+    if inflight:
+        await asyncio.gather(*inflight)
+
+
+async def run_load(
+    url=None,
+    target="predict",
+    fmt="json",
+    sensors=1000,
+    concurrency=32,
+    rate=None,
+    duration=10.0,
+    anomaly_rate=0.0,
+    max_inflight=1024,
+    seed=0,
+    transport=None,
+):
+    """Executa a carga e devolve o relatório; ``transport`` permite um app ASGI em processo"""
+    rng = np.random.default_rng(seed)
+    fleet = [
+        VirtualSensor(f"sim-{i:05d}", rng.spawn(1)[0], anomaly_rate=anomaly_rate)
+        for i in range(sensors)
+    ]
+    path = "/predict" if target == "predict" else "/"
+    connections = concurrency if rate is None else max_inflight
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+
+    stats = LoadStats()
+    async with httpx.AsyncClient(
+        base_url=url or DEFAULT_URLS[target], limits=limits, timeout=30.0, transport=transport
+    ) as client:
+        if rate is None:
+            await closed_loop(client, path, target, fmt, fleet, concurrency, duration, stats)
+        else:
+            await open_loop(client, path, target, fmt, fleet, rate, duration, max_inflight, stats)
+    stats.finished_at = time.perf_counter()
+    return stats.report()
+
+
+def print_report(report):
+    latency = report["latency_ms"]
+    print(f"\nRequisições: {report['completed']} em {report['duration_s']:.1f}s "
+          f"({report['throughput_rps']:.1f} req/s), puladas: {report['skipped']}")
+    print(
+        f"Taxa de erro: {report['error_rate']:.2%}  "
+        f"status: {report['status']}  erros: {report['errors']}"
+    )
+    if "p50" in latency:
+        print(
+            f"Latência (ms): p50={latency['p50']:.2f} p90={latency['p90']:.2f} "
+            f"p99={latency['p99']:.2f} max={latency['max']:.2f}"
+        )
+    print(f"Anomalias: {report['anomalies']['injected']} injetadas, "
+          f"{report['anomalies']['flagged']} sinalizadas pela API")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerador de carga com sensores virtuais")
+    parser.add_argument("--target", choices=["predict", "collector"], default="predict")
+    parser.add_argument("--url", help="URL base (padrão: :8000 predict, :4242 collector)")
+    parser.add_argument(
+        "--format", choices=["json", "frame"], default="json", help="corpo JSON ou frame binário"
+    )
+    parser.add_argument("--sensors", type=int, default=1000, help="sensores virtuais")
+    parser.add_argument("--concurrency", type=int, default=32, help="clientes no closed-loop")
+    parser.add_argument("--rate", type=float, help="req/s constantes (ativa o modo open-loop)")
+    parser.add_argument(
+        "--max-inflight", type=int, default=1024, help="requisições abertas no open-loop"
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="duração em segundos")
+    parser.add_argument(
+        "--anomaly-rate", type=float, default=0.0, help="fração de janelas com falha injetada"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="salva o relatório neste arquivo")
+    args = parser.parse_args()
 
-        time.sleep(2)  # Envia dados a cada 2 segundos
+    mode = f"open-loop {args.rate:g} req/s" if args.rate else f"closed-loop x{args.concurrency}"
+    print(f"Simulando {args.sensors} sensores ({mode}, {args.format}) contra {args.target}...")
+    report = asyncio.run(
+        run_load(
+            url=args.url,
+            target=args.target,
+            fmt=args.format,
+            sensors=args.sensors,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            duration=args.duration,
+            anomaly_rate=args.anomaly_rate,
+            max_inflight=args.max_inflight,
+            seed=args.seed,
+        )
+    )
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
 
 
 if __name__ == "__main__":
-    print("Iniciando sensor simulado...")
-    send_data()
\ No newline at end of file
+    main()
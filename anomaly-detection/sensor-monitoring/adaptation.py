@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+from features import N_FEATURES_PER_AXIS
+from model_format import save_model
+from pipeline import FeaturePipeline
+from scoring import MahalanobisScorer
+
+logger = logging.getLogger(__name__)
+
+
+class OnlineAdapter:
+    """Adaptação online de ``mu``/``cov`` com janelas confirmadas como normais.
+
+    Cada janela aceita aplica ``MahalanobisScorer.update`` (média e
+    covariância com peso exponencial ``alpha``, inversa atualizada por posto
+    1). Salvaguardas contra absorver anomalias:
+
+      - só entram janelas sem alarme (bruto ou estável) e com distância abaixo
+        de ``margin * threshold``;
+      - se a média adaptada se afastar mais de ``max_drift`` (em distância de
+        Mahalanobis do modelo original) a adaptação é congelada até um novo
+        treino ser carregado;
+      - a cada ``refactor_every`` atualizações a covariância é refatorada do
+        zero para não acumular erro numérico.
+
+    Com ``snapshot_path`` o modelo adaptado é salvo no formato binário
+    ``.model`` (ver ``model_format.py``) a cada ``snapshot_interval``
+    segundos. A gravação roda numa thread de fundo: ``observe`` é chamado no
+    event loop e só copia as referências do estado atual.
+    """
+
+    def __init__(
+        self,
+        scorer,
+        threshold,
+        alpha=1e-3,
+        margin=0.8,
+        max_drift=3.0,
+        refactor_every=1000,
+        snapshot_path=None,
+        snapshot_interval=300.0,
+        clock=time.monotonic,
+        pipeline=None,
+    ):
+        if not 0.0 < alpha < 1.0:
+            raise ValueError(f"alpha deve estar em (0, 1): {alpha}")
+        self.scorer = scorer
+        self.threshold = float(threshold)
+        self.alpha = alpha
+        self.margin = margin
+        self.max_drift = max_drift
+        self.refactor_every = refactor_every
+        self.snapshot_path = snapshot_path
+        self.pipeline = pipeline
+        self.snapshot_interval = snapshot_interval
+        self.clock = clock
+        self.lock = threading.Lock()
+
+        self.base_mu = scorer.mu.copy()
+        self.base_whitening = None if scorer.whitening is None else scorer.whitening.copy()
+        self.frozen = scorer.is_singular
+        self.updates = 0
+        self.skipped_anomaly = 0
+        self.skipped_margin = 0
+        self.snapshots = 0
+        self.last_snapshot = clock()
+        self._snapshot_thread = None
+
+    def drift(self):
+        """Distância de Mahalanobis (modelo original) entre a média adaptada e a original"""
+        if self.base_whitening is None:
+            return 0.0
+        z = self.base_whitening @ (self.scorer.mu - self.base_mu)
+        return float(np.sqrt(np.dot(z, z)))
+
+    def observe(self, features, distance, is_anomaly):
+        """Considera uma janela já avaliada; devolve True se ela atualizou o modelo"""
+        if self.frozen:
+            return False
+        if is_anomaly:
+            self.skipped_anomaly += 1
+            return False
+        if not distance < self.margin * self.threshold or not np.all(np.isfinite(features)):
+            self.skipped_margin += 1
+            return False
+
+        with self.lock:
+            if self.frozen or not self.scorer.update(features, self.alpha):
+                return False
+            self.updates += 1
+            if self.updates % self.refactor_every == 0:
+                self.scorer.refactor()
+
+            drift = self.drift()
+            if drift > self.max_drift:
+                self.frozen = True
+                logger.warning(
+                    "Adaptação online congelada: deriva %.2f acima do limite %.2f; "
+                    "um novo treino é recomendado.",
+                    drift,
+                    self.max_drift,
+                )
+
+            if (
+                self.snapshot_path is not None
+                and self.clock() - self.last_snapshot >= self.snapshot_interval
+                and not self.snapshot_pending
+            ):
+                self.last_snapshot = self.clock()
+                state = self._capture()
+                self._snapshot_thread = threading.Thread(
+                    target=self._write_snapshot,
+                    args=(self.snapshot_path, state),
+                    name="adaptation-snapshot",
+                    daemon=True,
+                )
+                self._snapshot_thread.start()
+        return True
+
+    @property
+    def snapshot_pending(self):
+        return self._snapshot_thread is not None and self._snapshot_thread.is_alive()
+
+    def wait_snapshot(self, timeout=None):
+        """Espera a gravação de snapshot em andamento, se houver"""
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join(timeout)
+
+    def _capture(self):
+        # As atualizações trocam os arrays em vez de alterá-los: guardar referências basta
+        scorer = self.scorer
+        mu, whitening = scorer._state
+        return mu, scorer.cov, whitening, scorer.diagnostics(), self.updates
+
+    def _write_snapshot(self, path, state):
+        try:
+            self._save(path, state)
+        except OSError as e:
+            # Falha no disco não pode derrubar a predição
+            logger.error("Falha ao salvar snapshot em %s: %s", path, e)
+
+    def _save(self, path, state):
+        mu, cov, whitening, diagnostics, updates = state
+        pipeline = self.pipeline or FeaturePipeline(axes=len(mu) // N_FEATURES_PER_AXIS)
+        scorer = None
+        if whitening is not None:
+            scorer = MahalanobisScorer.from_factor(
+                mu, cov, whitening, scale=pipeline.scale_std, diagnostics=diagnostics
+            )
+        save_model(path, mu, cov, self.threshold, pipeline, scorer=scorer, metadata={"updates": updates})
+        self.snapshots += 1
+        logger.info("Snapshot do modelo adaptado salvo em %s (%d atualizações)", path, updates)
+        return path
+
+    def snapshot(self, path=None):
+        """Salva o modelo adaptado agora, de forma atômica (arquivo temporário + rename)"""
+        with self.lock:
+            state = self._capture()
+        self.last_snapshot = self.clock()
+        return self._save(path or self.snapshot_path, state)
+
+    def stats(self):
+        return {
+            "alpha": self.alpha,
+            "updates": self.updates,
+            "skipped_anomaly": self.skipped_anomaly,
+            "skipped_margin": self.skipped_margin,
+            "drift": self.drift(),
+            "max_drift": self.max_drift,
+            "frozen": self.frozen,
+            "snapshots": self.snapshots,
+            "snapshot_path": self.snapshot_path,
+        }
@@ -5,6 +5,9 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 
+from dataset import open_dataset
+from spectral import SpectralFeatures
+
 # set plotting style
 plt.style.use("seaborn-v0_8-paper")
 sns.set_palette("Set2")
@@ -12,6 +15,7 @@ plt.rcParams["figure.figsize"] = [10, 6]
 
 # configuration
 DATASET_PATH = Path("datasets/ac")
+PACKED_PATH = Path("datasets/ac.packed")  # built by: python dataset.py datasets/ac datasets/ac.packed
 NORMAL_OPS = ["silent_0_baseline"]
 ANOMALY_OPS = [
     "medium_0",
@@ -22,6 +26,7 @@ ANOMALY_OPS = [
 ]
 SAMPLE_RATE = 200  # Hz
 SAMPLE_TIME = 0.5  # seconds
+SPECTRAL = SpectralFeatures(sample_rate=SAMPLE_RATE)  # caches the Hann window per length
 
 
 def get_data_files(operations):
@@ -33,9 +38,17 @@ def get_data_files(operations):
     return files
 
 
+def get_packed_samples(operations, path=PACKED_PATH):
+    """Get zero-copy views of all captures for given operations from a packed dataset"""
+    return open_dataset(path).captures(operations)
+
+
 def load_sample(file_path, remove_dc=False):
-    """Load a single accelerometer data file with optional DC removal"""
-    data = np.genfromtxt(file_path, delimiter=",")
+    """Load a single accelerometer data file (or packed capture) with optional DC removal"""
+    if isinstance(file_path, np.ndarray):
+        data = file_path
+    else:
+        data = np.genfromtxt(file_path, delimiter=",")
     if remove_dc:
         data = data - np.mean(data, axis=0)
     return data
@@ -161,34 +174,17 @@ def analyze_statistics(sample_file):
     return stats_dict
 
 
-def extract_fft_features(sample):
-    """Calculate FFT for each axis in a given sample"""
-    # Create a window
-    hann_window = np.hanning(sample.shape[0])
-
-    # Compute a windowed FFT of each axis in the sample (leave off DC)
-    out_sample = np.zeros((int(sample.shape[0] / 2), sample.shape[1]))
-    for i, axis in enumerate(sample.T):
-        fft = abs(np.fft.rfft(axis * hann_window))
-        out_sample[:, i] = fft[1:]
-
-    return out_sample
+def extract_fft_features(samples):
+    """Windowed FFT magnitude per axis (DC left off) for one sample or a stacked batch"""
+    return SPECTRAL.spectrum(samples)
 
 
 def plot_fft_comparison(normal_files, anomaly_files, num_samples=200, start_bin=1):
     """Plot average FFT comparison between normal and anomaly samples"""
-    # Compute FFTs
-    normal_ffts = []
-    anomaly_ffts = []
-
-    for i in range(min(num_samples, len(normal_files))):
-        normal_sample = load_sample(normal_files[i])
-        anomaly_sample = load_sample(anomaly_files[i])
-        normal_ffts.append(extract_fft_features(normal_sample))
-        anomaly_ffts.append(extract_fft_features(anomaly_sample))
-
-    normal_ffts = np.array(normal_ffts)
-    anomaly_ffts = np.array(anomaly_ffts)
+    # Compute FFTs with one batched rfft per class
+    count = min(num_samples, len(normal_files))
+    normal_ffts = extract_fft_features(np.stack([load_sample(f) for f in normal_files[:count]]))
+    anomaly_ffts = extract_fft_features(np.stack([load_sample(f) for f in anomaly_files[:count]]))
     normal_fft_avg = np.average(normal_ffts, axis=0)
     anomaly_fft_avg = np.average(anomaly_ffts, axis=0)
 
@@ -210,9 +206,13 @@ def plot_fft_comparison(normal_files, anomaly_files, num_samples=200, start_bin=
     return fig
 
 
-# Get file lists
-normal_files = get_data_files(NORMAL_OPS)
-anomaly_files = get_data_files(ANOMALY_OPS)
+# Get file lists (captures from the packed dataset when it exists)
+if PACKED_PATH.exists():
+    normal_files = get_packed_samples(NORMAL_OPS)
+    anomaly_files = get_packed_samples(ANOMALY_OPS)
+else:
+    normal_files = get_data_files(NORMAL_OPS)
+    anomaly_files = get_data_files(ANOMALY_OPS)
 
 print(f"Found {len(normal_files)} normal operation files")
 print(f"Found {len(anomaly_files)} anomaly operation files")
@@ -1,37 +1,122 @@
 import numpy as np
-from scipy import stats as scipy_stats
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, ValidationError
+from typing import List, Optional
+from contextlib import asynccontextmanager
 from datetime import datetime
+import asyncio
 import logging
+import json
 import os
 import math
+import time
+
+from adaptation import OnlineAdapter
+from batching import MicroBatcher
+from executor import ExecutorBusyError, PredictionExecutor
+from features import extract_features
+from frames import CONTENT_TYPE as FRAME_CONTENT_TYPE, FrameError, decode_frames
+from log_config import SensorLogSampler, configure_logging, stop_logging
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry
+from model_format import load_model
+from model_registry import DEFAULT_GROUP, ModelRegistry
+from sensor_state import HISTORY_SIZE, SensorStateStore
+from streaming import SlidingWindowBuffer, StreamingFeatures
 
-# Configuração do logger
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
 logger = logging.getLogger(__name__)
+log_handler = None
+
+
+def setup_logging():
+    """Configura o logger raiz: LOG_FORMAT=text|json, LOG_QUEUE=1 escreve numa thread de fundo.
+
+    Chamado na inicialização da aplicação (``lifespan``), não no import do módulo.
+    """
+    global log_handler
+    log_handler = configure_logging(
+        level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+        fmt=os.environ.get("LOG_FORMAT", "text"),
+        use_queue=os.environ.get("LOG_QUEUE", "0") == "1",
+        queue_size=int(os.environ.get("LOG_QUEUE_SIZE", "10000")),
+    )
+
+# Logs de rotina por sensor limitados a LOG_SAMPLE_RATE por segundo; anomalias sempre saem
+log_sampler = SensorLogSampler(
+    rate=float(os.environ.get("LOG_SAMPLE_RATE", "1")),
+    burst=int(os.environ.get("LOG_SAMPLE_BURST", "5")),
+)
+
+# Métricas em memória expostas em /metrics; METRICS_ENABLED=0 desliga os timers por etapa
+metrics = MetricsRegistry(enabled=os.environ.get("METRICS_ENABLED", "1") == "1")
+STAGE_SECONDS = metrics.histogram(
+    "anomaly_stage_seconds", "Latência de cada etapa da predição", ["stage"]
+)
+REQUEST_SECONDS = metrics.histogram(
+    "anomaly_request_seconds", "Latência total por endpoint", ["endpoint"]
+)
+REQUESTS = metrics.counter("anomaly_requests", "Requisições recebidas", ["endpoint"])
+PREDICTIONS = metrics.counter("anomaly_predictions", "Janelas avaliadas por sensor", ["sensor"])
+ANOMALIES = metrics.counter("anomaly_anomalies", "Anomalias (após debounce) por sensor", ["sensor"])
+NAN_ERRORS = metrics.counter("anomaly_nan_errors", "Distâncias NaN por sensor", ["sensor"])
 
 
 class AnomalyDetector:
-    def __init__(self, model_path: str):
+    def __init__(
+        self,
+        model_path: str,
+        max_sensors: int = 10000,
+        state_ttl: float = 3600.0,
+        states: SensorStateStore = None,
+        adaptation: dict = None,
+    ):
         if not os.path.exists(model_path):
             logger.error("Modelo não encontrado: %s", model_path)
             raise FileNotFoundError(f"Modelo não encontrado: {model_path}")
 
-        model = np.load(model_path)
-        self.mu = model["mu"]
-        self.cov = model["cov"]
-        self.threshold = model["threshold"]
-        self.last_predictions = [False, False, False]
-        self.recent_distances = []  # Armazena distâncias recentes para estabilidade
+        self.model_path = model_path
+        self.version = os.stat(model_path).st_mtime_ns
+        # Formato binário mapeado em memória (ou .npz antigo), sem pickle
+        model = load_model(model_path)
+        self.mu = model.mu
+        self.cov = model.cov
+        self.threshold = model.threshold
+        # Mesmo pipeline de features do treino; a padronização já está dobrada no scorer
+        self.pipeline = model.pipeline
+        self.spectral = self.pipeline.spectral
+        self.features_per_axis = self.pipeline.features_per_axis
+        self.scorer = model.scorer()
+        # Histórico de debounce e de distâncias mantido separadamente por sensor
+        if states is None:
+            states = SensorStateStore(max_sensors=max_sensors, ttl=state_ttl)
+        self.states = states
+
+        # Adaptação online opcional (ver adaptation.py); None mantém o modelo fixo
+        self.adapter = None
+        if adaptation is not None:
+            self.adapter = OnlineAdapter(self.scorer, self.threshold, pipeline=self.pipeline, **adaptation)
+
+        threshold_magnitude = np.log10(self.threshold)
+        self.lower_bound = self.threshold * np.exp(-threshold_magnitude / 2)
+        self.upper_bound = self.threshold * np.exp(threshold_magnitude / 2)
 
         logger.info("Modelo carregado com threshold: %.2f", self.threshold)
 
+    def warm_up(self, samples=100):
+        """Roda uma janela sintética pelo pipeline e pelo scorer, sem tocar no estado dos sensores.
+
+        Preenche os caches de FFT e aquece o BLAS antes da primeira requisição real.
+        """
+        # Vibração pequena e determinística: janela constante daria curtose NaN
+        window = 0.01 * np.sin(np.arange(samples)[:, None] + np.arange(self.pipeline.axes))
+        window[:, -1] += 9.8
+        features = self.pipeline.transform(window)
+        self.scorer.distance(features)
+        self.scorer.distance(self.pipeline.transform(window[np.newaxis]))
+        return samples
+
     def preprocess(self, data, remove_dc=True):
         if remove_dc:
             data = data - np.mean(data, axis=0)
@@ -39,56 +124,30 @@ class AnomalyDetector:
 
     def extract_features(self, sample):
         """Extrai um conjunto reduzido de características estatísticas do sample"""
-        features = []
-        for axis_idx in range(sample.shape[1]):
-            axis_data = sample[:, axis_idx]
-
-            # Características no domínio do tempo
-            features.extend(
-                [
-                    np.std(axis_data),
-                    scipy_stats.kurtosis(axis_data),
-                    np.max(np.abs(axis_data)),
-                    np.sqrt(np.mean(np.square(axis_data))),
-                    np.max(axis_data) - np.min(axis_data),
-                ]
-            )
+        return extract_features(sample, remove_dc=False)
 
-        return np.array(features)
+    def compute_features(self, windows):
+        """Vetor de features do modelo para uma janela ou um lote, com cada etapa medida"""
+        return self.pipeline.transform(windows, timer=STAGE_SECONDS.time)
 
-    def mahalanobis_distance(self, x):
-        if np.linalg.det(self.cov) == 0:
-            logger.warning("Matriz de covariância singular, retornando distância infinita.")
-            return np.inf
-
-        x_mu = x - self.mu
-        epsilon = 1e-6
-        cov_reg = self.cov + epsilon * np.eye(self.cov.shape[0])
-
-        try:
-            scale = np.median(np.diag(cov_reg))
-            cov_scaled = cov_reg / scale
-            inv_covmat = np.linalg.inv(cov_scaled) / scale
+    def feature_values(self, features):
+        """Features por eixo para a resposta, com as bandas junto das estatísticas de tempo"""
+        return self.pipeline.feature_stats(features)
 
-            if x_mu.ndim == 1:
-                mahal = np.sqrt(np.dot(np.dot(x_mu, inv_covmat), x_mu))
-            else:
-                mahal = np.sqrt(np.sum(np.dot(x_mu, inv_covmat) * x_mu, axis=1))
-            return mahal
-        except np.linalg.LinAlgError:
-            return np.inf
+    def mahalanobis_distance(self, x):
+        """Distância de Mahalanobis de um vetor ou de um lote (2-D) de vetores de features"""
+        return self.scorer.distance(x)
 
-    def calculate_confidence(self, distance):
+    def calculate_confidence(self, distance, sensor_id="default"):
         """Calcula confiança com bandas adaptativas de threshold"""
-        self.recent_distances.append(distance)
-        self.recent_distances = self.recent_distances[-20:]
-
-        threshold_magnitude = np.log10(self.threshold)
-        lower_band_factor = np.exp(-threshold_magnitude / 2)
-        upper_band_factor = np.exp(threshold_magnitude / 2)
+        state = self.states.get(sensor_id)
+        with state.lock:
+            return self._update_confidence(state, distance)
 
-        lower_bound = self.threshold * lower_band_factor
-        upper_bound = self.threshold * upper_band_factor
+    def _update_confidence(self, state, distance):
+        state.push_distance(distance)
+        lower_bound = self.lower_bound
+        upper_bound = self.upper_bound
 
         if distance < lower_bound:
             base_confidence = 0.95
@@ -98,16 +157,17 @@ class AnomalyDetector:
             x = (distance - lower_bound) / (upper_bound - lower_bound)
             base_confidence = 0.9 / (1 + np.exp((x - 0.5) * 10))
 
-        if len(self.recent_distances) > 5:
-            recent_mean = np.mean(self.recent_distances[-5:])
-            recent_std = np.std(self.recent_distances[-5:])
+        if state.distance_count > 5:
+            recent = state.recent_distances(5)
+            recent_mean = np.mean(recent)
+            recent_std = np.std(recent)
 
             trend_stability = np.exp(-abs(distance - recent_mean) / (recent_std + 1e-6))
             variation_coefficient = recent_std / (recent_mean + 1e-6)
             variation_stability = np.exp(-variation_coefficient)
 
             stability_factor = (trend_stability + variation_stability) / 2
-            history_weight = min(len(self.recent_distances) / 20, 1.0)
+            history_weight = min(state.distance_count / HISTORY_SIZE, 1.0)
 
             final_confidence = (
                 base_confidence * (1 - history_weight)
@@ -118,49 +178,114 @@ class AnomalyDetector:
 
         return float(np.clip(final_confidence, 0.0, 1.0))
 
-    def predict(self, data):
-        processed_data = self.preprocess(data)
-        features = self.extract_features(processed_data)
-        distance = float(self.mahalanobis_distance(features))
-
+    def score(self, data):
+        """Parte sem estado da predição: features e distância de uma janela"""
+        # Remoção de DC (preprocess) embutida na extração, sem cópia intermediária
+        features = self.compute_features(data)
+        with STAGE_SECONDS.time("mahalanobis_distance"):
+            distance = float(self.mahalanobis_distance(features))
+        return features, distance
+
+    def predict(self, data, sensor_id="default"):
+        features, distance = self.score(data)
+        return self.build_result(features, distance, sensor_id)
+
+    def score_batch(self, windows):
+        """Avalia várias janelas com uma única extração de features e um único cálculo de distância.
+
+        Janelas com o mesmo formato são empilhadas e processadas juntas. Devolve,
+        na ordem de entrada, uma tupla ``(features, distância)`` por janela ou
+        um dicionário de erro para janelas inválidas.
+        """
+        results = [None] * len(windows)
+        groups = {}
+        for idx, window in enumerate(windows):
+            try:
+                window = np.asarray(window, dtype=np.float64)
+            except ValueError:
+                results[idx] = {"error": "Janela com linhas de tamanhos diferentes"}
+                continue
+            if window.ndim != 2 or window.shape[0] == 0:
+                results[idx] = {"error": f"Formato de janela inválido: {window.shape}"}
+            elif window.shape[1] != self.pipeline.axes:
+                results[idx] = {"error": f"Número de eixos inválido: {window.shape[1]}"}
+            else:
+                groups.setdefault(window.shape, []).append((idx, window))
+
+        if not groups:
+            return results
+
+        order = []
+        feature_blocks = []
+        for members in groups.values():
+            order.extend(idx for idx, _ in members)
+            feature_blocks.append(self.compute_features(np.stack([w for _, w in members])))
+        features = np.vstack(feature_blocks)
+        with STAGE_SECONDS.time("mahalanobis_distance"):
+            distances = self.mahalanobis_distance(features)
+
+        for row, idx in enumerate(order):
+            results[idx] = (features[row], float(distances[row]))
+        return results
+
+    def predict_batch(self, windows, sensor_ids=None):
+        if sensor_ids is None:
+            sensor_ids = ["default"] * len(windows)
+        return self.build_results(self.score_batch(windows), sensor_ids)
+
+    def build_results(self, scored, sensor_ids):
+        """Aplica o estado de cada sensor aos resultados de ``score_batch``, na ordem de chegada"""
+        return [
+            self.build_result(*item, sensor_id) if isinstance(item, tuple) else item
+            for item, sensor_id in zip(scored, sensor_ids)
+        ]
+
+    def build_result(self, features, distance, sensor_id="default"):
+        PREDICTIONS.inc(sensor_id)
         if math.isnan(distance):
+            NAN_ERRORS.inc(sensor_id)
             logger.error("Distância calculada é NaN, retornando erro.")
             return {"error": "Distância NaN detectada"}
 
         is_anomaly = distance > self.threshold
-        self.last_predictions.pop(0)
-        self.last_predictions.append(is_anomaly)
-        stable_anomaly = sum(self.last_predictions) >= 2
-
-        confidence = self.calculate_confidence(distance)
-
-        feature_names = ["std", "kurtosis", "peak_amplitude", "rms", "peak_to_peak"]
-        feature_stats = {}
-        n_features_per_axis = len(feature_names)
-        n_axes = len(features) // n_features_per_axis
-
-        for axis_idx in range(n_axes):
-            start_idx = axis_idx * n_features_per_axis
-            axis_features = features[start_idx : start_idx + n_features_per_axis]
-            feature_stats[f"axis_{axis_idx}"] = {
-                name: float(value) for name, value in zip(feature_names, axis_features)
-            }
+        state = self.states.get(sensor_id)
+        with STAGE_SECONDS.time("calculate_confidence"), state.lock:
+            stable_anomaly = state.push_prediction(is_anomaly)
+            confidence = self._update_confidence(state, distance)
+        if stable_anomaly:
+            ANOMALIES.inc(sensor_id)
+
+        if self.adapter is not None:
+            self.adapter.observe(features, distance, is_anomaly or stable_anomaly)
 
         result = {
             "is_anomaly": bool(stable_anomaly),
             "confidence": float(confidence),
             "distance": float(distance),
             "threshold": float(self.threshold),
-            "feature_values": feature_stats,
+            "feature_values": self.feature_values(features),
             "timestamp": datetime.now().isoformat(),
         }
 
-        logger.info("=" * 50)
-        logger.info("Prediction Details:")
-        logger.info("Timestamp: %s", result["timestamp"])
-        logger.info("Is Anomaly: %s", result["is_anomaly"])
-        logger.info("Confidence: %.3f", result["confidence"])
-        logger.info("Distance: %.3f (threshold: %.3f)", result["distance"], result["threshold"])
+        if stable_anomaly:
+            # Anomalias nunca passam pela amostragem e levam as features completas
+            logger.warning(
+                "Anomalia detectada: sensor=%s distance=%.3f threshold=%.3f confidence=%.3f",
+                sensor_id,
+                distance,
+                result["threshold"],
+                confidence,
+                extra={"fields": {"event": "anomaly", "sensor_id": sensor_id, **result}},
+            )
+        elif logger.isEnabledFor(logging.INFO) and log_sampler.allow(sensor_id):
+            logger.info(
+                "Predição: sensor=%s distance=%.3f threshold=%.3f confidence=%.3f",
+                sensor_id,
+                distance,
+                result["threshold"],
+                confidence,
+                extra={"fields": {"event": "prediction", "sensor_id": sensor_id}},
+            )
 
         return result
 
@@ -170,7 +295,195 @@ class AccelerometerData(BaseModel):
     sensor_id: str = "default"
 
 
-app = FastAPI()
+class BatchAccelerometerData(BaseModel):
+    windows: List[AccelerometerData]
+
+
+# Janela e passo padrão do streaming por WebSocket (em amostras)
+STREAM_WINDOW = int(os.environ.get("STREAM_WINDOW", "100"))
+STREAM_HOP = int(os.environ.get("STREAM_HOP", "25"))
+# Limite de ``window`` pedido pelo cliente: os buffers alocam memória proporcional a ele
+STREAM_MAX_WINDOW = int(os.environ.get("STREAM_MAX_WINDOW", "10000"))
+
+
+def stream_params_error(window, hop):
+    """Mensagem de erro para ``window``/``hop`` inválidos, ou ``None``"""
+    if not 2 <= window <= STREAM_MAX_WINDOW:
+        return f"window deve estar entre 2 e {STREAM_MAX_WINDOW}"
+    if not 1 <= hop <= window:
+        return "hop deve estar entre 1 e window"
+    return None
+
+# Corpos com estes tipos são lidos como frames binários (ver frames.py) em vez de JSON
+BINARY_CONTENT_TYPES = {FRAME_CONTENT_TYPE, "application/octet-stream"}
+
+
+# Formato binário gerado pelo treino (ou por model_format.py); o .npz antigo segue aceito
+MODEL_PATH = os.environ.get("MODEL_PATH") or next(
+    (
+        path
+        for path in ("models/mahalanobis_model.model", "models/mahalanobis_model.npz")
+        if os.path.exists(path)
+    ),
+    "models/mahalanobis_model.model",
+)
+
+# Modo de execução do trabalho numérico: inline, thread ou process
+executor = PredictionExecutor(
+    mode=os.environ.get("PREDICT_EXECUTOR", "thread"),
+    max_workers=int(os.environ.get("PREDICT_WORKERS", "0")) or None,
+    max_queue=int(os.environ.get("PREDICT_MAX_QUEUE", "64")),
+    model_path=MODEL_PATH,
+)
+
+# Estado por sensor compartilhado por todos os modelos; sobrevive à troca de um modelo
+sensor_states = SensorStateStore(
+    max_sensors=int(os.environ.get("SENSOR_STATE_MAX", "10000")),
+    ttl=float(os.environ.get("SENSOR_STATE_TTL", "3600")),
+)
+
+
+# Adaptação online (opt-in). Em modo process os workers pontuam com o arquivo do
+# modelo, então a adaptação feita no processo principal não teria efeito.
+ONLINE_ADAPTATION = os.environ.get("ONLINE_ADAPTATION", "0") == "1" and executor.mode != "process"
+
+
+def adaptation_options(model_path):
+    snapshot_dir = os.environ.get("ADAPT_SNAPSHOT_DIR")
+    snapshot_path = None
+    if snapshot_dir:
+        name = os.path.splitext(os.path.basename(model_path))[0]
+        snapshot_path = os.path.join(snapshot_dir, f"{name}.adapted.model")
+    return {
+        "alpha": float(os.environ.get("ADAPT_ALPHA", "0.001")),
+        "margin": float(os.environ.get("ADAPT_MARGIN", "0.8")),
+        "max_drift": float(os.environ.get("ADAPT_MAX_DRIFT", "3.0")),
+        "snapshot_path": snapshot_path,
+        "snapshot_interval": float(os.environ.get("ADAPT_SNAPSHOT_INTERVAL", "300")),
+    }
+
+
+metrics.gauge(
+    "anomaly_executor_pending", "Predições pendentes no executor", lambda: executor.pending
+)
+metrics.gauge("anomaly_tracked_sensors", "Sensores com estado em memória", lambda: len(sensor_states))
+metrics.counter_func(
+    "anomaly_log_suppressed", "Logs de rotina suprimidos pela amostragem", lambda: log_sampler.suppressed
+)
+metrics.counter_func(
+    "anomaly_log_dropped",
+    "Logs descartados com a fila cheia",
+    lambda: getattr(log_handler, "dropped", 0),
+)
+
+
+def load_detector(model_path):
+    adaptation = adaptation_options(model_path) if ONLINE_ADAPTATION else None
+    return AnomalyDetector(model_path, states=sensor_states, adaptation=adaptation)
+
+
+# Modelos por grupo de máquinas, carregados sob demanda e recarregados quando o arquivo muda
+registry = ModelRegistry(
+    load_detector,
+    default_path=MODEL_PATH,
+    config_path=os.environ.get("MODEL_REGISTRY", "models/registry.json"),
+    max_models=int(os.environ.get("MODEL_CACHE_SIZE", "16")),
+    check_interval=float(os.environ.get("MODEL_CHECK_INTERVAL", "5")),
+    lazy=True,  # configuração lida no lifespan (ou na primeira requisição), não no import
+)
+
+
+async def get_detector(sensor_id):
+    """Detector do sensor; só o acerto do cache roda no event loop.
+
+    Conferir o ``mtime`` e carregar um modelo (leitura, mmap, fatoração) vão
+    para uma thread, para que uma recarga não pare as outras conexões.
+    """
+    hit, detector = registry.cached(sensor_id)
+    if hit:
+        return detector
+    return await asyncio.to_thread(registry.get, sensor_id)
+
+
+async def score_windows(windows, sensor_ids):
+    """Avalia as janelas agrupadas pelo modelo de cada sensor, um score_batch por modelo.
+
+    Devolve ``(detectores, resultados)`` para que ``finalize_windows`` use o
+    mesmo detector da avaliação mesmo que o modelo seja trocado no meio.
+    """
+    detectors = [await get_detector(sensor_id) for sensor_id in sensor_ids]
+    scored = [None] * len(windows)
+    groups = {}
+    for idx, detector in enumerate(detectors):
+        if detector is None:
+            scored[idx] = {"error": "Modelo não carregado"}
+        else:
+            groups.setdefault(id(detector), (detector, []))[1].append(idx)
+
+    for detector, indices in groups.values():
+        results = await executor.run(detector, "score_batch", [windows[i] for i in indices])
+        for idx, result in zip(indices, results):
+            scored[idx] = result
+    return detectors, scored
+
+
+def finalize_windows(scored, sensor_ids):
+    detectors, items = scored
+    return [
+        detector.build_result(*item, sensor_id) if isinstance(item, tuple) else item
+        for detector, item, sensor_id in zip(detectors, items, sensor_ids)
+    ]
+
+
+# Micro-batching opcional: agrupa chamadas concorrentes de /predict em um único score_batch
+batcher = None
+if os.environ.get("PREDICT_MICROBATCH", "0") == "1":
+    batcher = MicroBatcher(
+        score_windows,
+        finalize_windows,
+        max_batch_size=int(os.environ.get("PREDICT_BATCH_MAX_SIZE", "64")),
+        max_delay=float(os.environ.get("PREDICT_BATCH_MAX_DELAY_MS", "5")) / 1000,
+        max_inflight=int(os.environ.get("PREDICT_BATCH_MAX_INFLIGHT", "0")) or executor.max_workers,
+    )
+
+
+# PRELOAD_MODEL=0 volta a carregar o modelo padrão só na primeira requisição
+PRELOAD_MODEL = os.environ.get("PRELOAD_MODEL", "1") == "1"
+
+
+async def warm_up():
+    """Carrega o modelo padrão e faz uma predição de aquecimento pelo executor.
+
+    Em modo thread/process isso também cria o pool (e carrega o modelo nos
+    workers), então a primeira requisição real não paga nenhuma inicialização.
+    """
+    start = time.perf_counter()
+    detector = await asyncio.to_thread(registry.get_group, DEFAULT_GROUP)
+    if detector is None:
+        return False
+    try:
+        await executor.run(detector, "warm_up", STREAM_WINDOW)
+    except Exception as e:
+        logger.warning("Falha na predição de aquecimento: %s", e)
+        return False
+    logger.info("Modelo padrão pronto em %.1f ms", (time.perf_counter() - start) * 1000)
+    return True
+
+
+@asynccontextmanager
+async def lifespan(app):
+    setup_logging()
+    if os.environ.get("ONLINE_ADAPTATION", "0") == "1" and not ONLINE_ADAPTATION:
+        logger.warning("ONLINE_ADAPTATION ignorado com PREDICT_EXECUTOR=process")
+    await asyncio.to_thread(registry.load_config)
+    if PRELOAD_MODEL:
+        await warm_up()
+    yield
+    executor.shutdown()
+    stop_logging()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -180,34 +493,226 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-try:
-    detector = AnomalyDetector("models/mahalanobis_model.npz")
-except FileNotFoundError:
-    detector = None  # Se o modelo não existir, a API não irá processar requests
-
-
 def clean_json(data):
     return {k: (0 if math.isnan(v) else v) if isinstance(v, float) else v for k, v in data.items()}
 
 
+def busy_response():
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Servidor sobrecarregado", "timestamp": datetime.now().isoformat()},
+    )
+
+
+async def read_windows(request: Request, schema):
+    """Lê as janelas do corpo como JSON (validado por ``schema``) ou como frames binários.
+
+    Devolve uma lista de ``(sensor_id, array)``. Frames float32 chegam como
+    visões sobre o corpo da requisição, sem cópia.
+    """
+    body = await request.body()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in BINARY_CONTENT_TYPES:
+        try:
+            with STAGE_SECONDS.time("decode"):
+                frames = decode_frames(body)
+        except FrameError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return [(frame.sensor_id, frame.data) for frame in frames]
+
+    try:
+        with STAGE_SECONDS.time("decode"):
+            payload = schema.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+    windows = payload.windows if isinstance(payload, BatchAccelerometerData) else [payload]
+    with STAGE_SECONDS.time("to_array"):
+        return [(window.sensor_id, np.array(window.data)) for window in windows]
+
+
+def serialize(content):
+    with STAGE_SECONDS.time("serialize"):
+        return JSONResponse(content=content)
+
+
+@app.get("/")
+async def home():
+    return {"status": "API Running"}
+
+
 @app.post("/predict")
-async def predict_anomaly(data: AccelerometerData):
+async def predict_anomaly(request: Request):
+    REQUESTS.inc("/predict")
+    with REQUEST_SECONDS.time("/predict"):
+        return await _predict_anomaly(request)
+
+
+async def _predict_anomaly(request):
+    windows = await read_windows(request, AccelerometerData)
+    if len(windows) != 1:
+        raise HTTPException(status_code=400, detail="Envie exatamente um frame em /predict")
+    sensor_id, array_data = windows[0]
+
+    detector = await get_detector(sensor_id)
     if detector is None:
         return {"error": "Modelo não carregado", "timestamp": datetime.now().isoformat()}
 
     try:
-        array_data = np.array(data.data)
-        logger.info("Received data shape: %s from sensor %s", array_data.shape, data.sensor_id)
+        logger.debug("Received data shape: %s from sensor %s", array_data.shape, sensor_id)
 
-        result = detector.predict(array_data)
-        result = clean_json(result)
-
-        return result
+        if batcher is not None:
+            result = await batcher.submit(array_data, sensor_id)
+        else:
+            features, distance = await executor.run(detector, "score", array_data)
+            result = detector.build_result(features, distance, sensor_id)
+        return serialize(clean_json(result))
+    except ExecutorBusyError:
+        return busy_response()
     except Exception as e:
         logger.error("Erro durante a predição: %s", str(e))
         return {"error": str(e), "timestamp": datetime.now().isoformat()}
 
 
+@app.post("/predict/batch")
+async def predict_anomaly_batch(request: Request):
+    REQUESTS.inc("/predict/batch")
+    with REQUEST_SECONDS.time("/predict/batch"):
+        return await _predict_anomaly_batch(request)
+
+
+async def _predict_anomaly_batch(request):
+    windows = await read_windows(request, BatchAccelerometerData)
+
+    try:
+        logger.debug("Received batch of %d windows", len(windows))
+
+        sensor_ids = [sensor_id for sensor_id, _ in windows]
+        scored = await score_windows([data for _, data in windows], sensor_ids)
+        results = finalize_windows(scored, sensor_ids)
+        results = [
+            {"sensor_id": sensor_id, **clean_json(result)}
+            for sensor_id, result in zip(sensor_ids, results)
+        ]
+
+        return serialize(
+            {
+                "results": results,
+                "count": len(results),
+                "timestamp": datetime.now().isoformat(),
+            }
+        )
+    except ExecutorBusyError:
+        return busy_response()
+    except Exception as e:
+        logger.error("Erro durante a predição em lote: %s", str(e))
+        return {"error": str(e), "timestamp": datetime.now().isoformat()}
+
+
+@app.websocket("/ws/{sensor_id}")
+async def stream_predictions(
+    websocket: WebSocket,
+    sensor_id: str,
+    window: int = STREAM_WINDOW,
+    hop: int = STREAM_HOP,
+    incremental: bool = False,
+):
+    """Recebe amostras continuamente e devolve um veredito a cada ``hop`` amostras.
+
+    Mensagens de texto: ``{"data": [[x, y, z], ...]}``. Mensagens binárias:
+    um ou mais frames de ``frames.py``. Cada veredito usa as últimas
+    ``window`` amostras do sensor. Com ``incremental=true`` as features são
+    mantidas amostra a amostra (``StreamingFeatures``) em vez de recalculadas
+    sobre a janela inteira.
+    """
+    await websocket.accept()
+    error = stream_params_error(window, hop)
+    if error is not None:
+        await websocket.send_json({"error": error})
+        await websocket.close(code=1008)
+        return
+
+    detector = await get_detector(sensor_id)
+    if detector is None:
+        await websocket.send_json({"error": "Modelo não carregado"})
+        await websocket.close()
+        return
+
+    axes = detector.pipeline.axes
+    # StreamingFeatures só mantém as 5 estatísticas de tempo; outros pipelines pedem a janela inteira
+    incremental = incremental and detector.pipeline.streamable
+    try:
+        if incremental:
+            buffer = StreamingFeatures(window=window, hop=hop, axes=axes)
+        else:
+            buffer = SlidingWindowBuffer(window=window, hop=hop, axes=axes)
+    except ValueError as e:
+        await websocket.send_json({"error": str(e)})
+        await websocket.close(code=1008)
+        return
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            try:
+                if message.get("bytes") is not None:
+                    chunks = [frame.data for frame in decode_frames(message["bytes"])]
+                else:
+                    chunks = [np.array(json.loads(message["text"])["data"], dtype=np.float64)]
+                completed = []
+                for chunk in chunks:
+                    completed.extend(buffer.extend(chunk))
+            except (ValueError, KeyError, TypeError) as e:
+                await websocket.send_json({"error": str(e)})
+                continue
+
+            for sample_count, item in completed:
+                # Pega o modelo a cada veredito para acompanhar recargas
+                detector = await get_detector(sensor_id) or detector
+                if incremental:
+                    features, distance = item, float(detector.mahalanobis_distance(item))
+                else:
+                    features, distance = await executor.run(detector, "score", item)
+                result = clean_json(detector.build_result(features, distance, sensor_id))
+                await websocket.send_json(
+                    {"sensor_id": sensor_id, "sample_count": sample_count, **result}
+                )
+    except WebSocketDisconnect:
+        pass
+    except ExecutorBusyError:
+        await websocket.close(code=1013)
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/admin/models")
+async def list_models():
+    return {"models": registry.status(), "sensors": len(sensor_states)}
+
+
+@app.post("/admin/models/reload")
+async def reload_models(group: Optional[str] = None):
+    """Força a releitura da configuração e dos modelos (todos ou de um grupo)"""
+    reloaded = await asyncio.to_thread(registry.reload, group)
+    return {"reloaded": reloaded, "timestamp": datetime.now().isoformat()}
+
+
+@app.get("/stats/executor")
+async def executor_stats():
+    return executor.stats()
+
+
+@app.get("/stats/batching")
+async def batching_stats():
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("api:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+
+class _PendingWindow:
+    __slots__ = ("window", "sensor_id", "future", "enqueued_at")
+
+    def __init__(self, window, sensor_id, future):
+        self.window = window
+        self.sensor_id = sensor_id
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """Agrupa chamadas concorrentes de ``/predict`` em lotes para ``score_batch``.
+
+    Um lote é disparado quando atinge ``max_batch_size`` janelas, quando
+    ``max_delay`` segundos passam desde a primeira janela pendente, ou logo na
+    chegada se houver menos de ``max_inflight`` lotes em processamento (com
+    pouca carga nenhuma latência é adicionada). ``score`` é uma corrotina que
+    recebe as janelas e os ids dos sensores; ``finalize`` aplica o estado por
+    sensor e é chamado na ordem em que os lotes foram formados, o que preserva
+    a ordem das janelas de cada sensor mesmo com lotes concorrentes.
+    """
+
+    def __init__(self, score, finalize, max_batch_size=64, max_delay=0.005, max_inflight=1):
+        self.score = score
+        self.finalize = finalize
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.max_inflight = max_inflight
+
+        self._pending = []
+        self._timer = None
+        self._inflight = 0
+        self._last_batch_done = None
+        self._tasks = set()
+
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self.size_histogram = {}
+        self.total_queue_delay = 0.0
+        self.max_queue_delay = 0.0
+
+    async def submit(self, window, sensor_id="default"):
+        """Enfileira uma janela e aguarda o resultado final da predição"""
+        loop = asyncio.get_running_loop()
+        item = _PendingWindow(window, sensor_id, loop.create_future())
+        self._pending.append(item)
+
+        if len(self._pending) >= self.max_batch_size or self._inflight < self.max_inflight:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await item.future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        items = self._pending[: self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size :]
+        self._record(items)
+
+        loop = asyncio.get_running_loop()
+        previous = self._last_batch_done
+        done = loop.create_future()
+        self._last_batch_done = done
+        self._inflight += 1
+        task = loop.create_task(self._run_batch(items, previous, done))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        if self._pending and self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+
+    async def _run_batch(self, items, previous, done):
+        try:
+            try:
+                scored = await self.score(
+                    [item.window for item in items], [item.sensor_id for item in items]
+                )
+                error = None
+            except Exception as e:
+                scored, error = None, e
+
+            # O estado por sensor só é aplicado depois do lote anterior
+            if previous is not None:
+                await previous
+
+            if error is None:
+                try:
+                    results = self.finalize(scored, [item.sensor_id for item in items])
+                except Exception as e:
+                    error = e
+            for idx, item in enumerate(items):
+                if item.future.done():
+                    continue
+                if error is None:
+                    item.future.set_result(results[idx])
+                else:
+                    item.future.set_exception(error)
+        finally:
+            done.set_result(None)
+            self._inflight -= 1
+            if self._pending and self._inflight < self.max_inflight:
+                self._flush()
+
+    def _record(self, items):
+        now = time.perf_counter()
+        size = len(items)
+        self.batches += 1
+        self.items += size
+        self.max_batch_seen = max(self.max_batch_seen, size)
+        bucket = 1 << (size - 1).bit_length()
+        self.size_histogram[bucket] = self.size_histogram.get(bucket, 0) + 1
+        for item in items:
+            delay = now - item.enqueued_at
+            self.total_queue_delay += delay
+            self.max_queue_delay = max(self.max_queue_delay, delay)
+
+    def stats(self):
+        """Tamanho dos lotes e latência adicionada (ms) pela espera na fila"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_delay_ms": self.max_delay * 1000,
+            "max_inflight": self.max_inflight,
+            "pending": len(self._pending),
+            "inflight": self._inflight,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_seen": self.max_batch_seen,
+            "batch_size_histogram": {
+                f"le_{bucket}": count for bucket, count in sorted(self.size_histogram.items())
+            },
+            "avg_queue_delay_ms": self.total_queue_delay / self.items * 1000 if self.items else 0.0,
+            "max_queue_delay_ms": self.max_queue_delay * 1000,
+        }
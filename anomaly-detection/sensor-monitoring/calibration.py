@@ -0,0 +1,257 @@
+"""Calibração do limiar e avaliação do detector a partir das distâncias de Mahalanobis.
+
+Todas as curvas saem de uma única ordenação das distâncias: contagens
+acumuladas de verdadeiros e falsos positivos dão ROC, precisão/recall e a
+taxa de falso alarme para cada limiar possível, em O(n log n).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import numpy as np
+
+from scoring import MahalanobisScorer
+
+# Pontos da troca limiar x falso alarme incluídos no relatório
+FPR_GRID = (0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2)
+MAX_CURVE_POINTS = 1000
+BOOTSTRAP_CHUNK = 25  # reamostragens por tarefa
+
+# np.trapezoid só existe a partir do NumPy 2.0; antes disso a função se chamava trapz
+_trapezoid = getattr(np, "trapezoid", None) or np.trapz
+
+# Dados compartilhados pelos workers de avaliação, enviados uma vez por processo
+_worker_data = {}
+
+
+def threshold_curve(distances, labels):
+    """Contagens para cada limiar distinto, com a regra ``distância > limiar``.
+
+    Devolve um dicionário com ``thresholds`` (decrescentes, terminando em
+    ``-inf``), ``tp``, ``fp``, ``tpr``, ``fpr``, ``precision`` e as
+    quantidades de positivos e negativos.
+    """
+    distances = np.asarray(distances, dtype=np.float64)
+    labels = np.asarray(labels).astype(bool)
+    order = np.argsort(distances, kind="stable")[::-1]
+    ranked = distances[order]
+    positives = np.cumsum(labels[order])
+    negatives = np.arange(1, len(ranked) + 1) - positives
+
+    # Último índice de cada valor distinto: empates mudam de classe juntos
+    last = np.flatnonzero(np.r_[ranked[1:] != ranked[:-1], True])
+    thresholds = np.r_[ranked[last], -np.inf]
+    tp = np.r_[0, positives[last]]
+    fp = np.r_[0, negatives[last]]
+
+    n_pos, n_neg = int(labels.sum()), int(len(labels) - labels.sum())
+    predicted = tp + fp
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, tp / predicted, 1.0)
+        tpr = tp / n_pos if n_pos else np.zeros(len(tp))
+        fpr = fp / n_neg if n_neg else np.zeros(len(fp))
+    return {
+        "thresholds": thresholds,
+        "tp": tp,
+        "fp": fp,
+        "tpr": tpr,
+        "fpr": fpr,
+        "precision": precision,
+        "positives": n_pos,
+        "negatives": n_neg,
+    }
+
+
+def roc_auc(curve):
+    return float(_trapezoid(curve["tpr"], curve["fpr"]))
+
+
+def average_precision(curve):
+    """Área sob a curva precisão/recall em degraus (igual a ``average_precision_score``)"""
+    return float(np.sum(np.diff(curve["tpr"]) * curve["precision"][1:]))
+
+
+def threshold_for_fpr(curve, target_fpr):
+    """Menor limiar (maior recall) cuja taxa de falso alarme não passa de ``target_fpr``"""
+    idx = np.searchsorted(curve["fpr"], target_fpr, side="right") - 1
+    idx = min(max(idx, 0), len(curve["thresholds"]) - 2)
+    return float(curve["thresholds"][idx]), idx
+
+
+def _downsample(curve, max_points=MAX_CURVE_POINTS):
+    idx = np.unique(np.linspace(0, len(curve["thresholds"]) - 1, max_points).astype(int))
+    thresholds = curve["thresholds"][idx]
+    return {
+        "thresholds": [float(t) if np.isfinite(t) else None for t in thresholds],
+        "fpr": curve["fpr"][idx].tolist(),
+        "tpr": curve["tpr"][idx].tolist(),
+        "precision": curve["precision"][idx].tolist(),
+    }
+
+
+def calibrate(distances, labels, target_fpr=0.05, include_curve=False):
+    """Limiar para ``target_fpr`` e métricas do detector em um único passe ordenado"""
+    curve = threshold_curve(distances, labels)
+    threshold, idx = threshold_for_fpr(curve, target_fpr)
+    tp, fp = int(curve["tp"][idx]), int(curve["fp"][idx])
+    report = {
+        "threshold": threshold,
+        "target_fpr": target_fpr,
+        "roc_auc": roc_auc(curve),
+        "average_precision": average_precision(curve),
+        "at_threshold": {
+            "fpr": float(curve["fpr"][idx]),
+            "tpr": float(curve["tpr"][idx]),
+            "precision": float(curve["precision"][idx]),
+            "confusion": {
+                "tn": curve["negatives"] - fp,
+                "fp": fp,
+                "fn": curve["positives"] - tp,
+                "tp": tp,
+            },
+        },
+        "tradeoff": [],
+    }
+    for fpr in FPR_GRID:
+        t, i = threshold_for_fpr(curve, fpr)
+        report["tradeoff"].append(
+            {"max_fpr": fpr, "threshold": t, "fpr": float(curve["fpr"][i]), "tpr": float(curve["tpr"][i])}
+        )
+    if include_curve:
+        report["curve"] = _downsample(curve)
+    return report
+
+
+def _summary(values):
+    values = np.asarray(values, dtype=np.float64)
+    low, high = np.percentile(values, [2.5, 97.5])
+    return {
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "ci95": [float(low), float(high)],
+    }
+
+
+def summarize_runs(runs):
+    """Média, desvio e intervalo de 95% de cada métrica ao longo de folds ou reamostragens"""
+    keys = ("threshold", "roc_auc", "average_precision")
+    summary = {key: _summary([run[key] for run in runs]) for key in keys}
+    for key in ("fpr", "tpr"):
+        summary[key] = _summary([run["at_threshold"][key] for run in runs])
+    return summary
+
+
+def degenerate_reason(distances, labels):
+    """Motivo pelo qual um conjunto não mede nada (ex.: scorer singular), ou ``None``"""
+    labels = np.asarray(labels).astype(bool)
+    if labels.all() or not labels.any():
+        return "uma classe ausente"
+    if not np.all(np.isfinite(distances)):
+        return "distâncias não finitas"
+    return None
+
+
+def _evaluate(distances, labels, target_fpr):
+    reason = degenerate_reason(distances, labels)
+    if reason is not None:
+        return {"degenerate": reason}
+    return calibrate(distances, labels, target_fpr)
+
+
+def _summarize(runs, what):
+    """Resumo só das execuções válidas; as degeneradas são contadas à parte, não entram na média"""
+    valid = [run for run in runs if "degenerate" not in run]
+    if not valid:
+        reasons = sorted({run["degenerate"] for run in runs})
+        raise ValueError(f"Todos os {len(runs)} {what} são degenerados: {', '.join(reasons)}")
+    return len(runs) - len(valid), summarize_runs(valid)
+
+
+def _init_worker(data):
+    _worker_data.clear()
+    _worker_data.update(data)
+
+
+def _fold_task(task):
+    """Ajusta média/covariância sem um fold de normais e avalia no fold e nas anomalias dele"""
+    normal, anomaly = _worker_data["normal"], _worker_data["anomaly"]
+    held_out = task["normal_idx"]
+    train = np.ones(len(normal), dtype=bool)
+    train[held_out] = False
+
+    # Padronizar não muda a distância de Mahalanobis; a escala só condiciona a fatoração
+    mu = normal[train].mean(axis=0)
+    cov = np.cov(normal[train], rowvar=False)
+    std = np.sqrt(np.diag(cov))
+    X = np.vstack([normal[held_out], anomaly[task["anomaly_idx"]]])
+    scorer = MahalanobisScorer(mu, cov, scale=np.where(std > 0, std, 1.0))
+    if scorer.is_singular:
+        return {"degenerate": "covariância não fatorável"}
+    distances = scorer.distance(X)
+    labels = np.r_[np.zeros(len(held_out)), np.ones(len(task["anomaly_idx"]))]
+    return _evaluate(distances, labels, task["target_fpr"])
+
+
+def _bootstrap_task(task):
+    distances, labels = _worker_data["distances"], _worker_data["labels"]
+    rng = np.random.default_rng(task["seed"])
+    results = []
+    for _ in range(task["count"]):
+        idx = rng.integers(0, len(distances), len(distances))
+        results.append(_evaluate(distances[idx], labels[idx], task["target_fpr"]))
+    return results
+
+
+def _run(fn, tasks, data, workers):
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        _init_worker(data)
+        try:
+            return [fn(task) for task in tasks]
+        finally:
+            _worker_data.clear()
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(data,)) as pool:
+        return list(pool.map(fn, tasks))
+
+
+def cross_validate(normal, anomaly, folds=5, target_fpr=0.05, workers=None, seed=42):
+    """k-fold sobre as linhas de features, um fold por processo.
+
+    Cada fold treina nos outros ``folds - 1`` blocos de normais e é avaliado
+    nos normais separados mais um bloco das anomalias. Folds degenerados
+    (scorer singular, distâncias não finitas) ficam em ``runs`` com o motivo e
+    são contados em ``degenerate``, fora do resumo.
+    """
+    normal = np.asarray(normal, dtype=np.float64)
+    anomaly = np.asarray(anomaly, dtype=np.float64)
+    if folds < 2:
+        raise ValueError(f"folds deve ser pelo menos 2: {folds}")
+    if normal.ndim != 2 or anomaly.ndim != 2 or normal.shape[1] != anomaly.shape[1]:
+        raise ValueError(f"Features incompatíveis: normais {normal.shape}, anomalias {anomaly.shape}")
+    # Cada fold precisa de anomalias para avaliar e de ao menos 2 normais fora dele para a covariância
+    if len(normal) < 2 * folds:
+        raise ValueError(f"{folds} folds exigem pelo menos {2 * folds} amostras normais, há {len(normal)}")
+    if len(anomaly) < folds:
+        raise ValueError(f"{folds} folds exigem pelo menos {folds} anomalias, há {len(anomaly)}")
+    rng = np.random.default_rng(seed)
+    normal_folds = np.array_split(rng.permutation(len(normal)), folds)
+    anomaly_folds = np.array_split(rng.permutation(len(anomaly)), folds)
+    tasks = [
+        {"normal_idx": n_idx, "anomaly_idx": a_idx, "target_fpr": target_fpr}
+        for n_idx, a_idx in zip(normal_folds, anomaly_folds)
+    ]
+    runs = _run(_fold_task, tasks, {"normal": normal, "anomaly": anomaly}, workers)
+    degenerate, summary = _summarize(runs, "folds")
+    return {"folds": folds, "degenerate": degenerate, "summary": summary, "runs": runs}
+
+
+def bootstrap(distances, labels, rounds=200, target_fpr=0.05, workers=None, seed=42):
+    """Reamostra as distâncias de teste para medir a incerteza do limiar e das métricas"""
+    # Blocos de tamanho fixo com sementes próprias: o resultado não depende de ``workers``
+    sizes = [len(part) for part in np.array_split(np.arange(rounds), -(-rounds // BOOTSTRAP_CHUNK))]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [{"seed": s, "count": count, "target_fpr": target_fpr} for s, count in zip(seeds, sizes)]
+    data = {"distances": np.asarray(distances, dtype=np.float64), "labels": np.asarray(labels)}
+    runs = [run for chunk in _run(_bootstrap_task, tasks, data, workers) for run in chunk]
+    degenerate, summary = _summarize(runs, "reamostragens")
+    return {"rounds": rounds, "degenerate": degenerate, "summary": summary}
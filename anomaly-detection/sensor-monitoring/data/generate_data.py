@@ -1,42 +1,259 @@
+"""Gerador de dados sintéticos em escala, para benchmarks e treinos com volume de produção.
+
+Tipos de dado (``--kind``):
+  - ``accel``: janelas de acelerômetro (amostras x 3 eixos) com gravidade,
+    rotação da máquina e harmônicos, ruído, deriva lenta configurável e, nas
+    janelas anômalas, falha de rolamento (portadora modulada pela rotação,
+    com bandas laterais em ``f_falha ± f_rotação``, e impactos periódicos);
+  - ``tabular``: o formato antigo temperatura/vibracao/energia usado por
+    ``training.py`` (padrão, 10 arquivos de 50 linhas por classe).
+
+Formatos de saída (``--format``):
+  - ``csv``: um CSV por janela em ``<out>/<classe>/`` (layout de ``datasets/ac``);
+  - ``npz``: blocos comprimidos ``<out>/<classe>/chunk_XXXXX.npz``;
+  - ``packed``: o layout mapeado em memória de ``dataset.py``, escrito direto
+    no arquivo final por todos os workers.
+
+A geração é vetorizada por bloco de janelas e os blocos são distribuídos num
+pool de processos. Cada bloco tem sua própria semente derivada de ``--seed``,
+então o resultado não depende do número de workers.
+
+Exemplos::
+
+    python data/generate_data.py
+    python data/generate_data.py --kind accel --windows 1000000 --format packed --out /tmp/big
+    python data/generate_data.py --kind accel --windows 20000 --format csv --drift 0.5
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+import json
 import os
+import sys
+import time
+
 import numpy as np
-import pandas as pd
-
-base_path = "sensor-monitoring/data"
-
-normal_path = os.path.join(base_path, "normal")
-anomaly_path = os.path.join(base_path, "anomaly")
-
-os.makedirs(normal_path, exist_ok=True)
-os.makedirs(anomaly_path, exist_ok=True)
-
-# Gera arquivos CSV com dados simulados
-def gerar_csv(tipo: str, path: str, n_arquivos: int = 10, linhas: int = 50):
-    for i in range(n_arquivos):
-        if tipo == "normal":
-            temperatura = np.random.normal(loc=25, scale=1, size=linhas)
-            vibracao = np.random.normal(loc=1.2, scale=0.2, size=linhas)
-            energia = np.random.normal(loc=110, scale=5, size=linhas)
-        elif tipo == "anomaly":
-            temperatura = np.random.normal(loc=60, scale=5, size=linhas)
-            vibracao = np.random.normal(loc=3.5, scale=1.0, size=linhas)
-            energia = np.random.normal(loc=250, scale=30, size=linhas)
-        else:
-            continue
-
-        df = pd.DataFrame({
-            "temperatura": temperatura,
-            "vibracao": vibracao,
-            "energia": energia
-        })
-
-        nome_arquivo = f"{tipo}_{i+1}.csv"
-        df.to_csv(os.path.join(path, nome_arquivo), index=False)
-
-# Geração
-gerar_csv("normal", normal_path)
-gerar_csv("anomaly", anomaly_path)
-
-print("✅ Arquivos gerados em:")
-print(f"📂 {normal_path}")
-print(f"📂 {anomaly_path}")
\ No newline at end of file
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import dataset  # noqa: E402
+
+DATA_DIR = Path(__file__).resolve().parent
+GRAVITY = 9.80665
+TABULAR_COLUMNS = ["temperatura", "vibracao", "energia"]
+TABULAR_PARAMS = {
+    "normal": {"loc": [25, 1.2, 110], "scale": [1, 0.2, 5]},
+    "anomaly": {"loc": [60, 3.5, 250], "scale": [5, 1.0, 30]},
+}
+
+
+def synthesize_accel(
+    rng, n_windows, samples=100, sample_rate=200.0, anomaly=False, drift=0.0, progress=None
+):
+    """Gera ``n_windows`` janelas (n, samples, 3) de uma vez.
+
+    ``progress`` é a posição de cada janela na vida útil simulada (0 a 1);
+    a deriva aumenta amplitude e desloca o offset proporcionalmente a ela.
+    """
+    if progress is None:
+        progress = np.zeros(n_windows)
+    t = np.arange(samples) / sample_rate
+
+    # Parâmetros por janela: rotação, amplitudes e fases dos harmônicos, montagem
+    shaft = rng.uniform(20.0, 45.0, size=(n_windows, 1, 1))
+    phase = rng.uniform(0.0, 2 * np.pi, size=(n_windows, 1, 3))
+    amplitude = rng.uniform(0.02, 0.08, size=(n_windows, 1, 3)) * (1.0 + drift * progress)[:, None, None]
+    angle = 2 * np.pi * shaft * t[None, :, None] + phase
+
+    data = amplitude * (np.sin(angle) + 0.35 * np.sin(2 * angle) + 0.1 * np.sin(3 * angle))
+    data += rng.normal(0.0, 0.01, size=data.shape)
+    data += rng.normal(0.0, 0.05, size=(n_windows, 1, 3)) + 0.05 * drift * progress[:, None, None]
+    data[..., 2] += GRAVITY
+
+    if anomaly:
+        # Falha de rolamento: portadora em f_falha modulada pela rotação => bandas laterais
+        fault = shaft * rng.uniform(1.6, 2.2, size=(n_windows, 1, 1))
+        depth = rng.uniform(0.5, 1.0, size=(n_windows, 1, 1))
+        strength = rng.uniform(0.1, 0.4, size=(n_windows, 1, 3))
+        modulation = 1.0 + depth * np.cos(2 * np.pi * shaft * t[None, :, None])
+        data += strength * modulation * np.sin(2 * np.pi * fault * t[None, :, None])
+
+        # Impactos periódicos na frequência de falha
+        period = np.maximum((sample_rate / fault[:, 0, 0]).astype(int), 1)
+        idx = np.arange(samples)
+        impacts = (idx[None, :] % period[:, None]) == rng.integers(0, period)[:, None]
+        data += impacts[..., None] * rng.uniform(0.3, 1.5, size=(n_windows, 1, 3))
+    return data.astype(np.float32)
+
+
+def synthesize_tabular(rng, n_files, rows, anomaly=False):
+    params = TABULAR_PARAMS["anomaly" if anomaly else "normal"]
+    return rng.normal(params["loc"], params["scale"], size=(n_files, rows, 3))
+
+
+def _chunk_windows(task):
+    kind = task["kind"]
+    rng = np.random.default_rng(task["seed"])
+    n = task["stop"] - task["start"]
+    anomaly = task["label"] == "anomaly"
+    if kind == "tabular":
+        return synthesize_tabular(rng, n, task["samples"], anomaly)
+    progress = np.arange(task["start"], task["stop"]) / max(task["total"] - 1, 1)
+    return synthesize_accel(
+        rng, n, task["samples"], task["sample_rate"], anomaly, task["drift"], progress
+    )
+
+
+def _write_chunk(task):
+    """Gera e grava um bloco; roda num processo do pool"""
+    windows = _chunk_windows(task)
+    out = Path(task["out"])
+    fmt = task["format"]
+
+    if fmt == "packed":
+        data = np.load(out / dataset.DATA_FILE, mmap_mode="r+")
+        rows = windows.reshape(-1, windows.shape[-1])
+        start = task["row_offset"]
+        data[start : start + len(rows)] = rows
+        data.flush()
+    elif fmt == "npz":
+        np.savez_compressed(
+            out / task["label"] / f"chunk_{task['chunk']:05d}.npz", windows=windows
+        )
+    else:
+        directory = out / task["label"]
+        header = ",".join(TABULAR_COLUMNS) if task["kind"] == "tabular" else ""
+        fmt_str = "%.6f"
+        for i, window in enumerate(windows, start=task["start"]):
+            name = f"{task['label']}_{i + 1}.csv" if task["kind"] == "tabular" else f"sensor_data_{i:08d}.csv"
+            np.savetxt(directory / name, window, delimiter=",", fmt=fmt_str, header=header, comments="")
+    return len(windows)
+
+
+def plan_tasks(kind, counts, samples, fmt, out, seed, chunk_size, sample_rate=200.0, drift=0.0):
+    """Divide cada classe em blocos com sementes independentes"""
+    seeds = np.random.SeedSequence(seed)
+    tasks = []
+    row_offset = 0
+    for label, total in counts.items():
+        for chunk, start in enumerate(range(0, total, chunk_size)):
+            stop = min(start + chunk_size, total)
+            tasks.append(
+                {
+                    "kind": kind,
+                    "label": label,
+                    "chunk": chunk,
+                    "start": start,
+                    "stop": stop,
+                    "total": total,
+                    "samples": samples,
+                    "sample_rate": sample_rate,
+                    "drift": drift,
+                    "format": fmt,
+                    "out": str(out),
+                    "row_offset": row_offset,
+                    "seed": seeds.spawn(1)[0],
+                }
+            )
+            row_offset += (stop - start) * samples
+    return tasks
+
+
+def _prepare_packed(out, counts, samples, columns):
+    labels = list(counts)
+    total = sum(counts.values())
+    out.mkdir(parents=True, exist_ok=True)
+    np.lib.format.open_memmap(
+        out / dataset.DATA_FILE, mode="w+", dtype=np.float32, shape=(total * samples, 3)
+    ).flush()
+    np.save(out / dataset.OFFSETS_FILE, np.arange(total + 1, dtype=np.int64) * samples)
+    np.save(
+        out / dataset.LABELS_FILE,
+        np.repeat(np.arange(len(labels), dtype=np.int16), list(counts.values())),
+    )
+    with open(out / dataset.INDEX_FILE, "w") as f:
+        json.dump(
+            {
+                "version": dataset.FORMAT_VERSION,
+                "source": "synthetic",
+                "columns": columns,
+                "operations": labels,
+                "normal_operations": ["normal"],
+            },
+            f,
+            indent=2,
+        )
+
+
+def generate(
+    out,
+    kind="accel",
+    windows=1000,
+    anomaly_fraction=0.1,
+    samples=100,
+    fmt="packed",
+    seed=42,
+    drift=0.0,
+    sample_rate=200.0,
+    workers=None,
+    chunk_size=10000,
+):
+    """Gera o conjunto completo e devolve o número de janelas escritas"""
+    out = Path(out)
+    n_anomaly = int(round(windows * anomaly_fraction))
+    counts = {"normal": windows - n_anomaly, "anomaly": n_anomaly}
+    columns = TABULAR_COLUMNS if kind == "tabular" else ["x", "y", "z"]
+
+    if fmt == "packed":
+        _prepare_packed(out, counts, samples, columns)
+    else:
+        for label in counts:
+            (out / label).mkdir(parents=True, exist_ok=True)
+
+    # CSV é limitado pela formatação de texto: blocos menores equilibram melhor o pool
+    if fmt == "csv":
+        chunk_size = min(chunk_size, 500)
+    tasks = plan_tasks(kind, counts, samples, fmt, out, seed, chunk_size, sample_rate, drift)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) == 1:
+        return sum(_write_chunk(task) for task in tasks)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(_write_chunk, tasks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerador de dados sintéticos")
+    parser.add_argument("--kind", choices=["tabular", "accel"], default="tabular")
+    parser.add_argument("--format", choices=["csv", "npz", "packed"], default="csv")
+    parser.add_argument("--out", default=str(DATA_DIR), help="diretório de saída (padrão: data/)")
+    parser.add_argument("--windows", type=int, default=20, help="janelas/arquivos no total")
+    parser.add_argument("--anomaly-fraction", type=float, default=0.5)
+    parser.add_argument("--samples", type=int, default=None, help="linhas por janela")
+    parser.add_argument("--sample-rate", type=float, default=200.0, help="Hz (accel)")
+    parser.add_argument("--drift", type=float, default=0.0, help="deriva relativa ao fim da série")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=10000, help="janelas por tarefa")
+    args = parser.parse_args()
+
+    samples = args.samples or (50 if args.kind == "tabular" else 100)
+    start = time.perf_counter()
+    written = generate(
+        args.out,
+        kind=args.kind,
+        windows=args.windows,
+        anomaly_fraction=args.anomaly_fraction,
+        samples=samples,
+        fmt=args.format,
+        seed=args.seed,
+        drift=args.drift,
+        sample_rate=args.sample_rate,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"✅ {written} janelas ({args.kind}, {args.format}) geradas em {args.out} em {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
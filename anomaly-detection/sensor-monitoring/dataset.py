@@ -0,0 +1,297 @@
+"""Packed, memory-mapped capture datasets.
+
+A directory of capture CSVs grouped by operation (``datasets/ac/<operation>/*.csv``
+or ``data/normal``, ``data/anomaly``) is converted once into::
+
+    <out>/data.npy      all rows of all captures, float32 (total_rows, columns)
+    <out>/offsets.npy   int64 (captures + 1), rows of capture i are offsets[i]:offsets[i+1]
+    <out>/labels.npy    int16 operation index of each capture
+    <out>/index.json    columns, operations, normal operations and source file names
+
+``open_dataset`` maps the arrays read-only, so every capture is a view into
+the page cache instead of a freshly parsed text file.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+FORMAT_VERSION = 1
+DATA_FILE = "data.npy"
+OFFSETS_FILE = "offsets.npy"
+LABELS_FILE = "labels.npy"
+INDEX_FILE = "index.json"
+
+
+def read_capture(file_path):
+    """Parse one capture CSV, with or without a header row, as float32 (rows, columns)"""
+    with open(file_path) as f:
+        first = f.readline()
+    try:
+        [float(value) for value in first.split(",")]
+        columns, skiprows = None, 0
+    except ValueError:
+        columns, skiprows = [name.strip() for name in first.split(",")], 1
+    data = np.loadtxt(file_path, delimiter=",", skiprows=skiprows, dtype=np.float32, ndmin=2)
+    return columns, data
+
+
+def column_means(data):
+    """Default capture feature: mean of each selected column"""
+    return data.mean(axis=0, dtype=np.float64)
+
+
+class LoadFailure:
+    """A capture that could not be turned into a feature row"""
+
+    __slots__ = ("path", "reason", "message")
+
+    def __init__(self, path, reason, message):
+        self.path = path
+        self.reason = reason
+        self.message = message
+
+    def to_dict(self):
+        return {"path": str(self.path), "reason": self.reason, "message": self.message}
+
+    def __repr__(self):
+        return f"LoadFailure({str(self.path)!r}, {self.reason!r}, {self.message!r})"
+
+
+class LoadReport:
+    """Counts of loaded captures and the failures collected while streaming"""
+
+    def __init__(self):
+        self.loaded = 0
+        self.failures = []
+
+    def reasons(self):
+        counts = {}
+        for failure in self.failures:
+            counts[failure.reason] = counts.get(failure.reason, 0) + 1
+        return counts
+
+    def to_dict(self):
+        return {
+            "loaded": self.loaded,
+            "failed": len(self.failures),
+            "reasons": self.reasons(),
+            "failures": [failure.to_dict() for failure in self.failures],
+        }
+
+
+def _capture_features(path, columns, features):
+    try:
+        file_columns, data = read_capture(path)
+    except OSError as e:
+        return LoadFailure(path, "io_error", str(e))
+    except ValueError as e:
+        return LoadFailure(path, "parse_error", str(e))
+
+    if len(data) == 0:
+        return LoadFailure(path, "empty", "no data rows")
+    if columns is not None:
+        if file_columns is None or not set(columns).issubset(file_columns):
+            return LoadFailure(path, "missing_columns", f"expected columns {columns}")
+        data = data[:, [file_columns.index(name) for name in columns]]
+    try:
+        return features(data)
+    except Exception as e:
+        return LoadFailure(path, "feature_error", f"{type(e).__name__}: {e}")
+
+
+def _capture_features_chunk(paths, columns, features):
+    return [(path, _capture_features(path, columns, features)) for path in paths]
+
+
+def iter_capture_features(
+    files, columns=None, features=column_means, workers=None, chunksize=32, report=None
+):
+    """Yield ``(path, feature_row)`` for each capture, parsing files in a process pool.
+
+    Files are sent to the workers in chunks of ``chunksize`` and at most
+    ``4 * workers`` chunks are in flight, so rows stream back in file order
+    without the whole file list being parsed (or held) first. Captures that
+    cannot be read are skipped and recorded in ``report.failures``.
+    ``features`` must be a module-level function so it can be pickled.
+    """
+    report = report if report is not None else LoadReport()
+    workers = workers or os.cpu_count() or 1
+    files = iter(files)
+
+    def chunks():
+        while True:
+            chunk = [path for _, path in zip(range(chunksize), files)]
+            if not chunk:
+                return
+            yield chunk
+
+    def collect(results):
+        for path, result in results:
+            if isinstance(result, LoadFailure):
+                report.failures.append(result)
+            else:
+                report.loaded += 1
+                yield path, result
+
+    if workers == 1:
+        for chunk in chunks():
+            yield from collect(_capture_features_chunk(chunk, columns, features))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        inflight = deque()
+        for chunk in chunks():
+            inflight.append(pool.submit(_capture_features_chunk, chunk, columns, features))
+            if len(inflight) >= 4 * workers:
+                yield from collect(inflight.popleft().result())
+        while inflight:
+            yield from collect(inflight.popleft().result())
+
+
+def convert(source, output, operations=None, normal_operations=None):
+    """Pack the CSV captures under ``source/<operation>/`` into a dataset at ``output``"""
+    source = Path(source)
+    output = Path(output)
+    if operations is None:
+        operations = sorted(p.name for p in source.iterdir() if p.is_dir() and any(p.glob("*.csv")))
+    if normal_operations is None:
+        normal_operations = [op for op in operations if "normal" in op or "baseline" in op]
+
+    chunks, lengths, labels, files = [], [], [], []
+    columns = None
+    for label, op in enumerate(operations):
+        for file_path in sorted((source / op).glob("*.csv")):
+            file_columns, data = read_capture(file_path)
+            if columns is None:
+                columns = file_columns or [f"axis_{i}" for i in range(data.shape[1])]
+            if data.shape[1] != len(columns):
+                raise ValueError(
+                    f"{file_path}: expected {len(columns)} columns, got {data.shape[1]}"
+                )
+            chunks.append(data)
+            lengths.append(len(data))
+            labels.append(label)
+            files.append(f"{op}/{file_path.name}")
+
+    if not chunks:
+        raise ValueError(f"No CSV captures found under {source}")
+
+    output.mkdir(parents=True, exist_ok=True)
+    np.save(output / DATA_FILE, np.concatenate(chunks))
+    np.save(output / OFFSETS_FILE, np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64))
+    np.save(output / LABELS_FILE, np.asarray(labels, dtype=np.int16))
+    index = {
+        "version": FORMAT_VERSION,
+        "source": str(source),
+        "columns": columns,
+        "operations": list(operations),
+        "normal_operations": list(normal_operations),
+        "files": files,
+    }
+    with open(output / INDEX_FILE, "w") as f:
+        json.dump(index, f, indent=2)
+    return open_dataset(output)
+
+
+class CaptureDataset:
+    """Read-only view of a packed dataset; captures are zero-copy slices of ``data``"""
+
+    def __init__(self, path, data, offsets, labels, index):
+        self.path = Path(path)
+        self.data = data
+        self.offsets = offsets
+        self.labels = labels
+        self.columns = index["columns"]
+        self.operations = index["operations"]
+        self.normal_operations = index["normal_operations"]
+        self.files = index.get("files", [])
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[i] : self.offsets[i + 1]]
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    @property
+    def is_anomaly(self):
+        normal = [self.operations.index(op) for op in self.normal_operations]
+        return ~np.isin(self.labels, normal)
+
+    def indices(self, operations):
+        """Capture indices belonging to the given operations"""
+        wanted = [self.operations.index(op) for op in operations]
+        return np.flatnonzero(np.isin(self.labels, wanted))
+
+    def captures(self, operations=None):
+        """List of (rows, columns) views, optionally restricted to some operations"""
+        indices = range(len(self)) if operations is None else self.indices(operations)
+        return [self[i] for i in indices]
+
+    def windows(self, operations=None):
+        """All captures as one (captures, rows, columns) view; requires equal-length captures"""
+        lengths = self.lengths
+        if len(lengths) and np.any(lengths != lengths[0]):
+            raise ValueError("Captures have different lengths; use captures() instead")
+        stacked = self.data.reshape(len(self), -1, self.data.shape[1])
+        return stacked if operations is None else stacked[self.indices(operations)]
+
+    def column_means(self, columns=None, start=0, stop=None):
+        """Per-capture mean of each column for captures [start, stop), computed on the mapped rows"""
+        offsets = self.offsets[start : (len(self) if stop is None else stop) + 1]
+        data = self.data[offsets[0] : offsets[-1]]
+        if columns is not None:
+            data = data[:, [self.columns.index(name) for name in columns]]
+        sums = np.add.reduceat(data, offsets[:-1] - offsets[0], axis=0, dtype=np.float64)
+        return sums / np.diff(offsets)[:, None]
+
+
+def open_dataset(path):
+    """Memory-map a dataset created by ``convert``"""
+    path = Path(path)
+    with open(path / INDEX_FILE) as f:
+        index = json.load(f)
+    if index.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported dataset version in {path}: {index.get('version')}")
+    return CaptureDataset(
+        path,
+        np.load(path / DATA_FILE, mmap_mode="r"),
+        np.load(path / OFFSETS_FILE),
+        np.load(path / LABELS_FILE),
+        index,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack capture CSVs into a memory-mapped dataset")
+    parser.add_argument("source", help="Directory with one sub-directory of CSVs per operation")
+    parser.add_argument("output", help="Output dataset directory")
+    parser.add_argument("--ops", nargs="+", help="Operations to include (default: all)")
+    parser.add_argument(
+        "--normal",
+        nargs="+",
+        help="Operations labelled as normal (default: names containing 'normal' or 'baseline')",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    dataset = convert(args.source, args.output, args.ops, args.normal)
+    print(
+        f"Packed {len(dataset)} captures ({dataset.data.shape[0]} rows, "
+        f"{len(dataset.operations)} operations) into {args.output} "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODES = ("inline", "thread", "process")
+
+# Detectores carregados dentro de cada processo worker, indexados pelo caminho do modelo
+_worker_detectors = {}
+
+
+class ExecutorBusyError(RuntimeError):
+    """A fila de predições pendentes está cheia"""
+
+
+def _init_worker(model_path):
+    """Pré-carrega o modelo no processo worker antes da primeira predição"""
+    if model_path is not None and os.path.exists(model_path):
+        _worker_detector(model_path, os.stat(model_path).st_mtime_ns)
+
+
+def _worker_detector(model_path, version):
+    detector = _worker_detectors.get(model_path)
+    if detector is None or detector.version != version:
+        # Modelo novo ou recarregado no processo principal
+        from api import AnomalyDetector
+
+        detector = AnomalyDetector(model_path)
+        _worker_detectors[model_path] = detector
+    return detector
+
+
+def _timed_call(submitted_at, fn, args):
+    started_at = time.time()
+    return started_at - submitted_at, fn(*args)
+
+
+def _process_call(submitted_at, model_path, version, method, args):
+    started_at = time.time()
+    detector = _worker_detector(model_path, version)
+    return started_at - submitted_at, getattr(detector, method)(*args)
+
+
+class PredictionExecutor:
+    """Executa o trabalho numérico das predições fora do event loop.
+
+    Modos:
+      - ``inline``: executa no próprio event loop (comportamento antigo);
+      - ``thread``: pool de threads compartilhando o detector do processo;
+      - ``process``: pool de processos, cada um com o modelo pré-carregado.
+
+    No máximo ``max_workers + max_queue`` chamadas ficam pendentes; acima
+    disso ``run`` levanta ``ExecutorBusyError`` em vez de enfileirar sem limite.
+    """
+
+    def __init__(self, mode="thread", max_workers=None, max_queue=64, model_path=None):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Modo de execução inválido: {mode}")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.model_path = model_path
+        self._pool = None
+
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.mode == "thread":
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="predict"
+                )
+            elif self.mode == "process":
+                # Importado só aqui: multiprocessing não entra no import da API
+                from concurrent.futures import ProcessPoolExecutor
+
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_init_worker,
+                    initargs=(self.model_path,),
+                )
+            logger.info("Pool de predição '%s' iniciado com %d workers", self.mode, self.max_workers)
+        return self._pool
+
+    async def run(self, detector, method, *args):
+        """Executa ``detector.<method>(*args)`` conforme o modo configurado"""
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise ExecutorBusyError("Fila de predições cheia")
+
+        self.pending += 1
+        self.submitted += 1
+        try:
+            if self.mode == "inline":
+                wait, result = 0.0, getattr(detector, method)(*args)
+            else:
+                loop = asyncio.get_running_loop()
+                submitted_at = time.time()
+                if self.mode == "thread":
+                    call = (_timed_call, submitted_at, getattr(detector, method), args)
+                else:
+                    call = (
+                        _process_call,
+                        submitted_at,
+                        detector.model_path,
+                        detector.version,
+                        method,
+                        args,
+                    )
+                wait, result = await loop.run_in_executor(self._get_pool(), *call)
+        finally:
+            self.pending -= 1
+
+        self.completed += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return result
+
+    def stats(self):
+        """Profundidade da fila e tempos de espera (em ms) até um worker assumir a chamada"""
+        workers = 1 if self.mode == "inline" else self.max_workers
+        return {
+            "mode": self.mode,
+            "workers": workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "queue_depth": max(self.pending - workers, 0),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": self.total_wait / self.completed * 1000 if self.completed else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
@@ -0,0 +1,46 @@
+import numpy as np
+
+# Ordem das estatísticas dentro de cada eixo; o vetor final é [eixo 0 | eixo 1 | ...]
+FEATURE_NAMES = ["std", "kurtosis", "peak_amplitude", "rms", "peak_to_peak"]
+N_FEATURES_PER_AXIS = len(FEATURE_NAMES)
+
+
+def extract_features(windows, remove_dc=True):
+    """Calcula as 5 estatísticas de tempo para todos os eixos de uma ou várias janelas.
+
+    Aceita uma janela ``(amostras, eixos)`` ou um lote ``(lote, amostras, eixos)``
+    e devolve ``(eixos * 5,)`` ou ``(lote, eixos * 5)``, na mesma ordem de
+    ``AnomalyDetector.extract_features``. Os momentos centrados são calculados
+    uma única vez e compartilhados por std, curtose e RMS.
+    """
+    x = np.asarray(windows, dtype=np.float64)
+    single = x.ndim == 2
+    if single:
+        x = x[np.newaxis]
+
+    centered = x - x.mean(axis=1, keepdims=True)
+    squared = centered * centered
+    m2 = squared.mean(axis=1)
+    m4 = np.einsum("bsa,bsa->ba", squared, squared) / x.shape[1]
+
+    data = centered if remove_dc else x
+    high = data.max(axis=1)
+    low = data.min(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kurtosis = m4 / (m2 * m2) - 3.0
+    std = np.sqrt(m2)
+    rms = std if remove_dc else np.sqrt(np.einsum("bsa,bsa->ba", x, x) / x.shape[1])
+
+    features = np.stack([std, kurtosis, np.maximum(high, -low), rms, high - low], axis=-1)
+    features = features.reshape(x.shape[0], -1)
+    return features[0] if single else features
+
+
+def feature_stats(features):
+    """Organiza um vetor de features em ``{"axis_i": {nome: valor}}``"""
+    per_axis = np.asarray(features).reshape(-1, N_FEATURES_PER_AXIS)
+    return {
+        f"axis_{axis_idx}": {name: float(value) for name, value in zip(FEATURE_NAMES, values)}
+        for axis_idx, values in enumerate(per_axis)
+    }
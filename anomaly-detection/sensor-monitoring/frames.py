@@ -0,0 +1,120 @@
+"""Formato binário compacto para janelas do acelerômetro.
+
+Cada frame é um cabeçalho little-endian seguido das amostras em ordem
+amostra-major (``x0 y0 z0 x1 y1 z1 ...``)::
+
+    magic       4s   b"ACCW"
+    version     u8   1
+    dtype       u8   1 = float32, 2 = int16
+    axes        u16  número de eixos
+    n_samples   u32  número de amostras
+    sample_rate f32  Hz
+    scale       f32  fator para converter int16 em g (1.0 para float32)
+    id_len      u16  tamanho do sensor_id em bytes
+    sensor_id   utf-8, seguido de zeros até alinhar o payload em 4 bytes
+
+Vários frames podem ser concatenados no mesmo corpo (usado em ``/predict/batch``).
+"""
+
+import struct
+
+import numpy as np
+
+CONTENT_TYPE = "application/x-accel-frame"
+MAGIC = b"ACCW"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sBBHIffH")
+_DTYPES = {1: np.dtype("<f4"), 2: np.dtype("<i2")}
+_DTYPE_CODES = {np.dtype("<f4"): 1, np.dtype("<i2"): 2}
+
+
+class FrameError(ValueError):
+    """Frame binário malformado"""
+
+
+class SensorFrame:
+    __slots__ = ("sensor_id", "sample_rate", "scale", "data")
+
+    def __init__(self, sensor_id, sample_rate, scale, data):
+        self.sensor_id = sensor_id
+        self.sample_rate = sample_rate
+        self.scale = scale
+        self.data = data
+
+
+def _padded(length):
+    return (length + 3) & ~3
+
+
+def encode_frame(data, sensor_id="default", sample_rate=200.0, dtype="float32", scale=1.0):
+    """Serializa uma janela ``(amostras, eixos)``; com ``int16`` os valores são divididos por ``scale``"""
+    data = np.asarray(data)
+    if data.ndim != 2:
+        raise FrameError(f"Janela deve ser 2-D, recebido {data.shape}")
+    dtype = np.dtype(dtype).newbyteorder("<")
+    if dtype not in _DTYPE_CODES:
+        raise FrameError(f"Tipo não suportado: {dtype}")
+
+    if dtype.kind == "i":
+        payload = np.clip(np.rint(data / scale), -32768, 32767).astype(dtype)
+    else:
+        payload = data.astype(dtype)
+        scale = 1.0
+
+    sensor_bytes = sensor_id.encode("utf-8")
+    header = _HEADER.pack(
+        MAGIC,
+        VERSION,
+        _DTYPE_CODES[dtype],
+        data.shape[1],
+        data.shape[0],
+        sample_rate,
+        scale,
+        len(sensor_bytes),
+    )
+    id_block = sensor_bytes.ljust(_padded(_HEADER.size + len(sensor_bytes)) - _HEADER.size, b"\0")
+    return header + id_block + payload.tobytes()
+
+
+def decode_frame(buffer, offset=0):
+    """Lê um frame a partir de ``offset`` e devolve ``(SensorFrame, próximo offset)``.
+
+    Para float32 ``data`` é uma visão (sem cópia) sobre ``buffer``; para int16
+    é convertido para float64 já multiplicado por ``scale``.
+    """
+    if len(buffer) - offset < _HEADER.size:
+        raise FrameError("Frame truncado: cabeçalho incompleto")
+    magic, version, dtype_code, axes, n_samples, sample_rate, scale, id_len = _HEADER.unpack_from(
+        buffer, offset
+    )
+    if magic != MAGIC:
+        raise FrameError("Assinatura de frame inválida")
+    if version != VERSION:
+        raise FrameError(f"Versão de frame não suportada: {version}")
+    if dtype_code not in _DTYPES:
+        raise FrameError(f"Tipo de dado desconhecido: {dtype_code}")
+
+    id_start = offset + _HEADER.size
+    data_start = offset + _padded(_HEADER.size + id_len)
+    dtype = _DTYPES[dtype_code]
+    count = n_samples * axes
+    data_end = data_start + count * dtype.itemsize
+    if data_end > len(buffer):
+        raise FrameError("Frame truncado: payload incompleto")
+
+    sensor_id = bytes(buffer[id_start : id_start + id_len]).decode("utf-8")
+    data = np.frombuffer(buffer, dtype=dtype, count=count, offset=data_start).reshape(n_samples, axes)
+    if dtype_code == 2:
+        data = data * float(scale)
+    return SensorFrame(sensor_id, sample_rate, scale, data), data_end
+
+
+def decode_frames(buffer):
+    """Decodifica todos os frames concatenados em ``buffer``"""
+    frames = []
+    offset = 0
+    while offset < len(buffer):
+        frame, offset = decode_frame(buffer, offset)
+        frames.append(frame)
+    return frames
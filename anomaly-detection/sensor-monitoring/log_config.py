@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener
+import copy
+import json
+import logging
+import queue
+import threading
+import time
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+_listener = None
+_installed = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Um registro JSON por linha; campos passados em ``extra={"fields": {...}}`` viram chaves"""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato de texto original, com os campos estruturados ao fim da mesma linha"""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " | " + json.dumps(fields, default=str, ensure_ascii=False)
+        return line
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Enfileira sem bloquear; com a fila cheia o registro é descartado e contado"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Só congela mensagem e traceback; a formatação fica para a thread de escrita
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(level=logging.INFO, fmt="text", use_queue=False, queue_size=10000):
+    """Configura o logger raiz.
+
+    ``fmt`` é ``text`` (formato antigo) ou ``json`` (uma linha JSON por
+    registro). Com ``use_queue`` os handlers de saída rodam numa thread de
+    fundo (``QueueListener``); quem loga só enfileira, e com a fila cheia o
+    registro é descartado em vez de bloquear o event loop.
+    """
+    global _listener, _installed
+    stop_logging()
+
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    root = logging.getLogger()
+    if _installed is not None:
+        root.removeHandler(_installed)
+    root.setLevel(level)
+
+    if use_queue:
+        _installed = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+        _listener = QueueListener(_installed.queue, output, respect_handler_level=True)
+        _listener.start()
+    else:
+        _installed = output
+    root.addHandler(_installed)
+    return _installed
+
+
+def stop_logging():
+    """Esvazia a fila de logs e encerra a thread de escrita"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class SensorLogSampler:
+    """Limita logs de rotina por sensor (token bucket).
+
+    Cada sensor pode emitir até ``burst`` registros seguidos e depois
+    ``rate`` por segundo. ``rate=0`` desliga os logs de rotina; anomalias
+    não passam por aqui e são sempre registradas.
+    """
+
+    def __init__(self, rate=1.0, burst=5, max_sensors=10000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_sensors = max_sensors
+        self.clock = clock
+        self.suppressed = 0
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, sensor_id):
+        if self.rate <= 0:
+            self.suppressed += 1
+            return False
+        now = self.clock()
+        with self._lock:
+            tokens, last = self._buckets.pop(sensor_id, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            else:
+                self.suppressed += 1
+            self._buckets[sensor_id] = (tokens, now)
+            if len(self._buckets) > self.max_sensors:
+                self._buckets.popitem(last=False)
+        return allowed
@@ -0,0 +1,205 @@
+from bisect import bisect_left
+import threading
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Limites (em segundos) pensados para etapas de microssegundos até requisições inteiras
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+OVERFLOW_LABEL = "_other"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+    suffix = ""  # sufixo das amostras; HELP/TYPE usam o mesmo nome (formato 0.0.4)
+
+    def __init__(self, name, documentation, label_names=(), max_series=1000):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        # Limita a cardinalidade (ex.: ids de sensores); o excedente vai para "_other"
+        self.max_series = max_series
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, label_values):
+        if len(label_values) != len(self.label_names):
+            raise ValueError(f"{self.name} espera os rótulos {self.label_names}")
+        if label_values not in self._series and len(self._series) >= self.max_series:
+            return (OVERFLOW_LABEL,) * len(label_values)
+        return label_values
+
+    def render(self):
+        name = self.name + self.suffix
+        lines = [f"# HELP {name} {self.documentation}", f"# TYPE {name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+            lines.extend(self._render_series(series))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+    suffix = "_total"
+
+    def inc(self, *label_values, amount=1):
+        key = self._key(label_values)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, *label_values):
+        return self._series.get(label_values, 0)
+
+    def _render_series(self, series):
+        for values, count in series:
+            yield f"{self.name}{self.suffix}{_format_labels(self.label_names, values)} {_format_value(count)}"
+
+
+class _Timer:
+    __slots__ = ("histogram", "label_values", "start")
+
+    def __init__(self, histogram, label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS, **kwargs):
+        super().__init__(name, documentation, label_names, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        self.enabled = True
+
+    def observe(self, value, *label_values):
+        key = self._key(label_values)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *label_values):
+        """Context manager que registra a duração do bloco"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, label_values)
+
+    def _render_series(self, series):
+        for values, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                labels = _format_labels(self.label_names, values, le)
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.label_names, values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class Gauge:
+    """Valor lido no momento da coleta (ex.: profundidade de fila)"""
+
+    kind = "gauge"
+    suffix = ""
+
+    def __init__(self, name, documentation, read):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+
+    def render(self):
+        name = self.name + self.suffix
+        return [
+            f"# HELP {name} {self.documentation}",
+            f"# TYPE {name} {self.kind}",
+            f"{name} {_format_value(self.read())}",
+        ]
+
+
+class CounterFunc(Gauge):
+    """Total crescente mantido por outro objeto (ex.: logs suprimidos), lido na coleta"""
+
+    kind = "counter"
+    suffix = "_total"
+
+
+class MetricsRegistry:
+    """Contadores e histogramas em memória, exportados no formato texto do Prometheus.
+
+    Com ``enabled=False`` os timers viram no-ops e o custo por etapa cai a
+    uma chamada de função; os contadores continuam sendo mantidos.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._metrics = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, label_names=(), **kwargs):
+        return self._register(Counter(name, documentation, label_names, **kwargs))
+
+    def histogram(self, name, documentation, label_names=(), **kwargs):
+        histogram = Histogram(name, documentation, label_names, **kwargs)
+        histogram.enabled = self.enabled
+        return self._register(histogram)
+
+    def gauge(self, name, documentation, read):
+        return self._register(Gauge(name, documentation, read))
+
+    def counter_func(self, name, documentation, read):
+        return self._register(CounterFunc(name, documentation, read))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
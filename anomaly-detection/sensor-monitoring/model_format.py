@@ -0,0 +1,192 @@
+"""Formato binário do modelo: cabeçalho JSON + arrays crus alinhados, sem pickle.
+
+Layout do arquivo::
+
+    MAGIC (8 bytes) | tamanho do cabeçalho (uint32 LE) | cabeçalho JSON | padding
+    array 0 (alinhado em 64 bytes) | array 1 | ...
+
+O cabeçalho traz versão, limiar, pipeline de features, diagnóstico da
+fatoração e, para cada array, dtype, formato e offset. ``load_model`` mapeia
+o arquivo uma vez (``np.memmap``) e devolve visões somente leitura: abrir um
+modelo custa a leitura do cabeçalho, e vários workers (ou vários modelos por
+máquina) compartilham as mesmas páginas do cache do sistema.
+
+Arrays gravados: ``mu``, ``cov``, ``whitening`` (fator ``W`` já com a escala
+dobrada, então a API não refatora a covariância ao carregar) e, se houver,
+``scale_mean``/``scale_std``.
+
+Uso::
+
+    python model_format.py models/mahalanobis_model.npz models/mahalanobis_model.model
+"""
+
+from datetime import datetime
+import json
+import math
+import os
+import struct
+import sys
+
+import numpy as np
+
+from pipeline import FeaturePipeline
+from scoring import MahalanobisScorer
+
+MAGIC = b"ADMODEL\x00"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_PREFIX = struct.Struct("<8sI")
+
+
+class ModelFormatError(ValueError):
+    """Arquivo de modelo inválido, truncado ou de versão não suportada"""
+
+
+class ModelArtifact:
+    """Conteúdo de um modelo carregado, em qualquer um dos formatos suportados"""
+
+    def __init__(self, mu, cov, threshold, pipeline, whitening=None, diagnostics=None, header=None):
+        self.mu = mu
+        self.cov = cov
+        self.threshold = threshold
+        self.pipeline = pipeline
+        self.whitening = whitening
+        self.diagnostics = diagnostics
+        self.header = header or {}
+
+    def scorer(self):
+        """Scorer pronto; com o fator gravado não há fatoração no carregamento"""
+        if self.whitening is None:
+            return MahalanobisScorer(self.mu, self.cov, scale=self.pipeline.scale_std)
+        return MahalanobisScorer.from_factor(
+            self.mu, self.cov, self.whitening, scale=self.pipeline.scale_std, diagnostics=self.diagnostics
+        )
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_model(path, mu, cov, threshold, pipeline, scorer=None, metadata=None):
+    """Grava o modelo de forma atômica (temporário + rename).
+
+    Quem tem o arquivo antigo mapeado continua lendo o inode antigo até
+    recarregar, então a troca é segura com a API no ar.
+    """
+    scorer = scorer or MahalanobisScorer(mu, cov, scale=pipeline.scale_std)
+    arrays = {"mu": mu, "cov": cov}
+    if scorer.whitening is not None:
+        arrays["whitening"] = scorer.whitening
+    if pipeline.scale_std is not None:
+        arrays["scale_mean"] = pipeline.scale_mean
+        arrays["scale_std"] = pipeline.scale_std
+    arrays = {name: np.ascontiguousarray(value, dtype="<f8") for name, value in arrays.items()}
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "created_at": datetime.now().isoformat(),
+        "threshold": float(threshold),
+        "pipeline": pipeline.config(),
+        "diagnostics": scorer.diagnostics(),
+        "metadata": metadata or {},
+        "arrays": {},
+    }
+    # O tamanho do cabeçalho depende dos offsets e vice-versa: reserva espaço de sobra
+    layout = {name: {"dtype": "<f8", "shape": list(a.shape), "offset": 0} for name, a in arrays.items()}
+    header["arrays"] = layout
+    reserved = _aligned(_PREFIX.size + len(json.dumps(header).encode()) + 64 * len(arrays) + 256)
+    offset = reserved
+    for name, array in arrays.items():
+        layout[name]["offset"] = offset
+        offset = _aligned(offset + array.nbytes)
+    encoded = json.dumps(header).encode()
+    if _PREFIX.size + len(encoded) > reserved:
+        raise ModelFormatError("Cabeçalho maior que o espaço reservado")
+
+    tmp_path = f"{path}.tmp"
+    os.makedirs(os.path.dirname(os.fspath(path)) or ".", exist_ok=True)
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, len(encoded)))
+        f.write(encoded)
+        for name, array in arrays.items():
+            f.write(b"\x00" * (layout[name]["offset"] - f.tell()))
+            f.write(array.tobytes())
+        f.write(b"\x00" * (offset - f.tell()))
+    os.replace(tmp_path, path)
+    return path
+
+
+def is_model_file(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _load_binary(path):
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    if len(raw) < _PREFIX.size:
+        raise ModelFormatError(f"Arquivo de modelo truncado: {path}")
+    magic, header_size = _PREFIX.unpack(raw[: _PREFIX.size].tobytes())
+    if magic != MAGIC:
+        raise ModelFormatError(f"Não é um arquivo de modelo: {path}")
+    header = json.loads(raw[_PREFIX.size : _PREFIX.size + header_size].tobytes())
+    if header.get("format_version", 0) > FORMAT_VERSION:
+        raise ModelFormatError(f"Versão de modelo não suportada: {header['format_version']}")
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = math.prod(spec["shape"])
+        if spec["offset"] + count * dtype.itemsize > len(raw):
+            raise ModelFormatError(f"Array '{name}' fora do arquivo: {path}")
+        arrays[name] = np.frombuffer(raw, dtype, count, spec["offset"]).reshape(spec["shape"])
+
+    pipeline = FeaturePipeline.from_config(
+        header["pipeline"], arrays.get("scale_mean"), arrays.get("scale_std")
+    )
+    return ModelArtifact(
+        arrays["mu"],
+        arrays["cov"],
+        header["threshold"],
+        pipeline,
+        whitening=arrays.get("whitening"),
+        diagnostics=header.get("diagnostics"),
+        header=header,
+    )
+
+
+def _load_npz(path):
+    # Formato antigo: lido sem allow_pickle; um "scaler" serializado é simplesmente ignorado
+    with np.load(path, allow_pickle=False) as model:
+        return ModelArtifact(
+            model["mu"],
+            model["cov"],
+            float(model["threshold"]),
+            FeaturePipeline.from_model(model),
+        )
+
+
+def load_model(path):
+    """Carrega um modelo no formato binário (mapeado em memória) ou ``.npz`` antigo"""
+    if is_model_file(path):
+        return _load_binary(path)
+    return _load_npz(path)
+
+
+def convert(source, output):
+    """Converte um modelo ``.npz`` para o formato binário"""
+    model = load_model(source)
+    return save_model(
+        output,
+        model.mu,
+        model.cov,
+        model.threshold,
+        model.pipeline,
+        metadata={"converted_from": os.path.basename(os.fspath(source))},
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Uso: python model_format.py <modelo.npz> <saida.model>")
+        sys.exit(2)
+    print(f"✅ Modelo convertido: {convert(sys.argv[1], sys.argv[2])}")
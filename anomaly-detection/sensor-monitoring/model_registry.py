@@ -0,0 +1,220 @@
+from collections import OrderedDict
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GROUP = "default"
+
+
+class _Entry:
+    __slots__ = ("detector", "path", "mtime", "checked_at")
+
+    def __init__(self, detector, path, mtime, checked_at):
+        self.detector = detector
+        self.path = path
+        self.mtime = mtime
+        self.checked_at = checked_at
+
+
+class ModelRegistry:
+    """Mapeia sensores para grupos de máquinas e cada grupo para um arquivo de modelo.
+
+    Os modelos são carregados na primeira requisição do grupo e mantidos num
+    cache LRU de até ``max_models`` entradas. A cada ``check_interval``
+    segundos o ``mtime`` do arquivo é conferido; se mudou, o modelo novo é
+    carregado e trocado de uma vez. Requisições em andamento continuam com a
+    referência ao detector antigo, então nenhuma é perdida na troca.
+
+    O arquivo de configuração opcional (JSON) tem o formato::
+
+        {
+            "default": "models/mahalanobis_model.model",
+            "models": {"compressores": "models/compressores.model"},
+            "sensors": {"esp32-01": "compressores"}
+        }
+
+    Com ``lazy=True`` o arquivo só é lido no primeiro uso (ou em
+    ``load_config``), sem acesso a disco na construção.
+    """
+
+    def __init__(
+        self,
+        factory,
+        default_path=None,
+        config_path=None,
+        max_models=16,
+        check_interval=5.0,
+        clock=time.monotonic,
+        lazy=False,
+    ):
+        self.factory = factory
+        self.default_path = default_path
+        self.config_path = config_path
+        self.max_models = max_models
+        self.check_interval = check_interval
+        self.clock = clock
+
+        self.model_paths = {}
+        self.sensor_groups = {}
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._loading = {}  # grupo -> lock da carga em andamento
+        self.configured = False
+        if not lazy:
+            self.load_config()
+
+    def load_config(self):
+        """(Re)lê o mapeamento de grupos e sensores"""
+        model_paths = {}
+        sensor_groups = {}
+        if self.default_path is not None:
+            model_paths[DEFAULT_GROUP] = self.default_path
+        if self.config_path is not None and os.path.exists(self.config_path):
+            with open(self.config_path) as f:
+                config = json.load(f)
+            if "default" in config:
+                model_paths[DEFAULT_GROUP] = config["default"]
+            model_paths.update(config.get("models", {}))
+            sensor_groups = dict(config.get("sensors", {}))
+
+        with self._lock:
+            self.model_paths = model_paths
+            self.sensor_groups = sensor_groups
+            self.configured = True
+            # Entradas cujo arquivo mudou de caminho são descartadas e recarregadas sob demanda
+            for group, entry in list(self._entries.items()):
+                if model_paths.get(group) != entry.path:
+                    del self._entries[group]
+
+    def group_for(self, sensor_id):
+        if not self.configured:
+            self.load_config()
+        group = self.sensor_groups.get(sensor_id, DEFAULT_GROUP)
+        return group if group in self.model_paths else DEFAULT_GROUP
+
+    def cached(self, sensor_id="default"):
+        """``(True, detector)`` se o cache do grupo ainda vale, sem acessar o disco; senão ``(False, None)``.
+
+        Caminho rápido para código assíncrono: numa falha, ``get`` (que pode
+        consultar o ``mtime`` e carregar o modelo) deve rodar fora do event loop.
+        """
+        if not self.configured:
+            return False, None
+        group = self.group_for(sensor_id)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(group)
+            if entry is None or now - entry.checked_at >= self.check_interval:
+                return False, None
+            self._entries.move_to_end(group)
+            return True, entry.detector
+
+    def get(self, sensor_id="default"):
+        """Detector responsável pelo sensor, ou ``None`` se o modelo não estiver disponível"""
+        return self.get_group(self.group_for(sensor_id))
+
+    def get_group(self, group):
+        if not self.configured:
+            self.load_config()
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(group)
+            if entry is not None:
+                self._entries.move_to_end(group)
+                if now - entry.checked_at < self.check_interval:
+                    return entry.detector
+            path = self.model_paths.get(group)
+            loading = self._loading.setdefault(group, threading.Lock())
+        if path is None:
+            return None
+
+        # A carga roda fora do lock global: os outros grupos não esperam por ela e,
+        # se já há um detector em serviço, os pedidos do grupo seguem com ele
+        if entry is not None and entry.detector is not None:
+            if not loading.acquire(blocking=False):
+                return entry.detector
+        else:
+            loading.acquire()
+        try:
+            return self._refresh(group, path, now)
+        finally:
+            loading.release()
+
+    def _refresh(self, group, path, now):
+        with self._lock:
+            entry = self._entries.get(group)
+        if entry is not None and entry.path != path:
+            entry = None
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        if mtime is None:
+            if entry is not None:
+                # Arquivo ausente (ex.: durante a cópia da versão nova): segue com o modelo atual
+                entry.checked_at = now
+                return entry.detector
+            logger.error("Modelo não encontrado: %s", path)
+            detector = None
+        elif entry is not None and entry.mtime == mtime:
+            # Sem mudança (ou outra thread acabou de carregar esta versão)
+            entry.checked_at = now
+            return entry.detector
+        else:
+            try:
+                detector = self.factory(path)
+            except Exception as e:
+                logger.error("Falha ao carregar modelo %s: %s", path, e)
+                if entry is not None and entry.detector is not None:
+                    # Mantém o modelo anterior em serviço até o arquivo novo ser válido
+                    entry.checked_at = now
+                    return entry.detector
+                detector = None
+            else:
+                if entry is not None:
+                    logger.info("Modelo do grupo '%s' recarregado de %s", group, path)
+
+        # Troca sob o lock; descarta o resultado se a configuração mudou durante a carga
+        with self._lock:
+            if self.model_paths.get(group) == path:
+                self._entries[group] = _Entry(detector, path, mtime, now)
+                self._entries.move_to_end(group)
+                while len(self._entries) > self.max_models:
+                    self._entries.popitem(last=False)
+        return detector
+
+    def reload(self, group=None):
+        """Relê a configuração e força a verificação dos modelos (todos ou de um grupo)"""
+        self.load_config()
+        with self._lock:
+            groups = [group] if group is not None else list(self._entries)
+            for name in groups:
+                entry = self._entries.get(name)
+                if entry is not None:
+                    entry.checked_at = -float("inf")
+                    entry.mtime = None  # garante a recarga mesmo sem mudança de mtime
+        return {name: self.get_group(name) is not None for name in groups}
+
+    def status(self):
+        with self._lock:
+            return {
+                group: {
+                    "path": entry.path,
+                    "loaded": entry.detector is not None,
+                    "version": entry.mtime,
+                    "threshold": (
+                        float(entry.detector.threshold) if entry.detector is not None else None
+                    ),
+                    "adaptation": (
+                        entry.detector.adapter.stats()
+                        if getattr(entry.detector, "adapter", None) is not None
+                        else None
+                    ),
+                }
+                for group, entry in self._entries.items()
+            }
@@ -0,0 +1,185 @@
+from contextlib import nullcontext
+import json
+
+import numpy as np
+
+from features import FEATURE_NAMES, extract_features
+from spectral import SAMPLE_RATE, SpectralFeatures
+
+PIPELINE_VERSION = 1
+
+# Estatísticas de tempo disponíveis por eixo; "mean" reproduz as médias por coluna do treino antigo
+TIME_STATS = ["mean"] + FEATURE_NAMES
+
+
+def _no_timer(stage):
+    return nullcontext()
+
+
+class FeaturePipeline:
+    """Definição única das features, executada igual no treino e na inferência.
+
+    O vetor de uma janela ``(amostras, eixos)`` é ``[estatísticas de tempo
+    (eixos * len(stats)) | bandas (eixos * bandas)]``. A configuração vai
+    para o cabeçalho do modelo (``config``, gravado só por
+    ``model_format.save_model``) e é lida de volta por ``from_config``;
+    ``from_model`` apenas lê os ``.npz`` antigos. A padronização ajustada
+    no treino não é aplicada às features: ela é dobrada na média, na
+    covariância e no fator de branqueamento do ``MahalanobisScorer`` (ver
+    ``fold``).
+    """
+
+    def __init__(
+        self,
+        axes=3,
+        stats=None,
+        remove_dc=True,
+        spectral=None,
+        scale_mean=None,
+        scale_std=None,
+    ):
+        stats = list(FEATURE_NAMES if stats is None else stats)
+        unknown = set(stats) - set(TIME_STATS)
+        if unknown:
+            raise ValueError(f"Estatísticas desconhecidas: {sorted(unknown)}")
+        self.axes = int(axes)
+        self.stats = stats
+        self.remove_dc = remove_dc
+        self.spectral = spectral
+        self.scale_mean = None if scale_mean is None else np.asarray(scale_mean, dtype=np.float64)
+        self.scale_std = None if scale_std is None else np.asarray(scale_std, dtype=np.float64)
+
+    @property
+    def features_per_axis(self):
+        return len(self.stats) + (self.spectral.n_bands if self.spectral is not None else 0)
+
+    @property
+    def n_features(self):
+        return self.axes * self.features_per_axis
+
+    @property
+    def streamable(self):
+        """Se ``StreamingFeatures`` calcula exatamente estas features amostra a amostra"""
+        return self.stats == FEATURE_NAMES and self.remove_dc and self.spectral is None
+
+    def time_features(self, windows):
+        if self.stats == FEATURE_NAMES:
+            return extract_features(windows, remove_dc=self.remove_dc)
+        x = np.asarray(windows, dtype=np.float64)
+        single = x.ndim == 2
+        if single:
+            x = x[np.newaxis]
+        full = None
+        columns = []
+        for name in self.stats:
+            if name == "mean":
+                columns.append(x.mean(axis=1))
+                continue
+            if full is None:
+                full = extract_features(x, remove_dc=self.remove_dc).reshape(x.shape[0], x.shape[2], -1)
+            columns.append(full[..., FEATURE_NAMES.index(name)])
+        features = np.stack(columns, axis=-1).reshape(x.shape[0], -1)
+        return features[0] if single else features
+
+    def transform(self, windows, timer=None):
+        """Features de uma janela ``(amostras, eixos)`` ou de um lote ``(lote, amostras, eixos)``.
+
+        ``timer(etapa)`` é um context manager opcional para medir cada etapa.
+        """
+        timer = timer or _no_timer
+        with timer("extract_features"):
+            features = self.time_features(windows)
+        if self.spectral is None:
+            return features
+        with timer("spectral_features"):
+            spectral = self.spectral(windows)
+        return np.concatenate([features, spectral], axis=-1)
+
+    __call__ = transform
+
+    def feature_names(self):
+        names = list(self.stats)
+        if self.spectral is not None:
+            names += self.spectral.feature_names
+        return names
+
+    def feature_stats(self, features):
+        """Organiza um vetor de features em ``{"axis_i": {nome: valor}}``"""
+        features = np.asarray(features)
+        n_time = self.axes * len(self.stats)
+        time_block = features[:n_time].reshape(self.axes, -1)
+        values = {
+            f"axis_{axis_idx}": {name: float(value) for name, value in zip(self.stats, row)}
+            for axis_idx, row in enumerate(time_block)
+        }
+        if self.spectral is not None:
+            for axis, bands in self.spectral.stats(features[n_time:]).items():
+                values[axis].update(bands)
+        return values
+
+    def set_scaling(self, mean, std):
+        """Guarda a padronização ajustada no treino (``StandardScaler.mean_``/``scale_``)"""
+        self.scale_mean = np.asarray(mean, dtype=np.float64)
+        self.scale_std = np.asarray(std, dtype=np.float64)
+
+    def fold(self, mu, cov):
+        """Leva média e covariância do espaço padronizado para o espaço das features brutas.
+
+        ``MahalanobisScorer(mu, cov, scale=pipeline.scale_std)`` devolve então as
+        mesmas distâncias do treino sem padronizar cada janela na inferência.
+        """
+        if self.scale_std is None:
+            return mu, cov
+        mu = self.scale_mean + self.scale_std * np.asarray(mu)
+        cov = np.asarray(cov) * np.outer(self.scale_std, self.scale_std)
+        return mu, cov
+
+    def config(self):
+        config = {
+            "version": PIPELINE_VERSION,
+            "axes": self.axes,
+            "stats": self.stats,
+            "remove_dc": self.remove_dc,
+            "spectral": None,
+        }
+        if self.spectral is not None:
+            config["spectral"] = {
+                "bands": {
+                    name: list(band)
+                    for name, band in zip(self.spectral.band_names, self.spectral.bands)
+                },
+                "sample_rate": self.spectral.sample_rate,
+            }
+        return config
+
+    @classmethod
+    def from_config(cls, config, scale_mean=None, scale_std=None):
+        if config.get("version", PIPELINE_VERSION) > PIPELINE_VERSION:
+            raise ValueError(f"Versão de pipeline não suportada: {config['version']}")
+        spectral = None
+        if config.get("spectral"):
+            spectral = SpectralFeatures(
+                {name: tuple(band) for name, band in config["spectral"]["bands"].items()},
+                config["spectral"].get("sample_rate", SAMPLE_RATE),
+            )
+        return cls(
+            axes=config["axes"],
+            stats=config["stats"],
+            remove_dc=config.get("remove_dc", True),
+            spectral=spectral,
+            scale_mean=scale_mean,
+            scale_std=scale_std,
+        )
+
+    @classmethod
+    def from_model(cls, model):
+        """Pipeline de um ``.npz`` antigo; os sem chave ``pipeline`` usam as 5 estatísticas por eixo"""
+        if "pipeline" in model:
+            return cls.from_config(
+                json.loads(str(model["pipeline"])),
+                model["scale_mean"] if "scale_mean" in model else None,
+                model["scale_std"] if "scale_std" in model else None,
+            )
+        spectral = SpectralFeatures.from_model(model)
+        per_axis = len(FEATURE_NAMES) + (spectral.n_bands if spectral is not None else 0)
+        return cls(axes=len(model["mu"]) // per_axis, spectral=spectral)
@@ -0,0 +1,62 @@
+import numpy as np
+
+
+class RunningCovariance:
+    """Média e covariância incrementais em memória O(d²) (atualizações de Welford/Chan).
+
+    ``update`` incorpora um lote de linhas; ``merge`` combina estatísticas
+    acumuladas de forma independente (outros shards, processos ou dias), de
+    modo que ``a.merge(b)`` equivale a acumular as linhas de ambos numa só
+    passada.
+    """
+
+    def __init__(self, n_features):
+        self.n_features = n_features
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros((n_features, n_features))
+
+    def _combine(self, count, mean, m2):
+        if count == 0:
+            return self
+        total = self.count + count
+        delta = mean - self.mean
+        self.m2 += m2 + np.outer(delta, delta) * (self.count * count / total)
+        self.mean += delta * (count / total)
+        self.count = total
+        return self
+
+    def update(self, rows):
+        """Adiciona um lote ``(linhas, features)`` ou uma única linha ``(features,)``"""
+        rows = np.atleast_2d(np.asarray(rows, dtype=np.float64))
+        if rows.shape[1] != self.n_features:
+            raise ValueError(f"Esperadas {self.n_features} features, recebidas {rows.shape[1]}")
+        if len(rows) == 0:
+            return self
+        mean = rows.mean(axis=0)
+        centered = rows - mean
+        return self._combine(len(rows), mean, centered.T @ centered)
+
+    def merge(self, other):
+        """Incorpora outro acumulador a este"""
+        if other.n_features != self.n_features:
+            raise ValueError(f"Não é possível combinar {other.n_features} features com {self.n_features}")
+        return self._combine(other.count, other.mean, other.m2)
+
+    def variance(self, ddof=0):
+        return np.diag(self.m2) / max(self.count - ddof, 1)
+
+    def covariance(self, ddof=1):
+        return self.m2 / max(self.count - ddof, 1)
+
+    def state(self):
+        """Arrays simples, por exemplo para checkpoints ``np.savez`` entre execuções"""
+        return {"count": np.int64(self.count), "mean": self.mean.copy(), "m2": self.m2.copy()}
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls(len(state["mean"]))
+        stats.count = int(state["count"])
+        stats.mean = np.array(state["mean"], dtype=np.float64)
+        stats.m2 = np.array(state["m2"], dtype=np.float64)
+        return stats
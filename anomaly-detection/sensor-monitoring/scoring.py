@@ -0,0 +1,174 @@
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MahalanobisScorer:
+    """Distância de Mahalanobis com a covariância fatorada uma única vez.
+
+    A covariância regularizada (``cov + epsilon * I``) é reescalada pela
+    mediana da diagonal e fatorada por Cholesky no construtor. Cada predição
+    passa a custar apenas um produto matricial pelo fator de branqueamento
+    ``W`` (``W.T @ W`` é a inversa da covariância regularizada).
+
+    Com ``scale`` (desvios do ``StandardScaler`` do treino), ``mu``/``cov``
+    estão no espaço das features brutas, mas a regularização e a fatoração
+    são feitas no espaço padronizado e a escala é dobrada em ``W``: as
+    distâncias são as do treino sem padronizar cada amostra.
+
+    Média e fator ficam juntos na tupla ``_state``: ``update`` publica os
+    dois numa única atribuição e ``distance`` lê a tupla uma vez, então uma
+    predição concorrente nunca combina a média nova com o fator antigo.
+    """
+
+    def __init__(self, mu, cov, epsilon=1e-6, scale=None):
+        self._state = (np.asarray(mu, dtype=np.float64), None)
+        self.cov = np.asarray(cov, dtype=np.float64)
+        self.epsilon = epsilon
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float64)
+        self.n_features = self.cov.shape[0]
+
+        self.updates = 0
+        self._factorize()
+
+    @classmethod
+    def from_factor(cls, mu, cov, whitening, epsilon=1e-6, scale=None, diagnostics=None):
+        """Scorer a partir de um fator ``W`` já calculado (ex.: gravado no modelo), sem fatorar"""
+        scorer = cls.__new__(cls)
+        scorer._state = (np.asarray(mu, dtype=np.float64), np.asarray(whitening, dtype=np.float64))
+        scorer.cov = np.asarray(cov, dtype=np.float64)
+        scorer.epsilon = epsilon
+        scorer.scale = None if scale is None else np.asarray(scale, dtype=np.float64)
+        scorer.n_features = scorer.cov.shape[0]
+        scorer.updates = 0
+        scorer.eigenvalues = None
+        scorer.is_singular = False
+        diagnostics = diagnostics or {}
+        scorer.rank = diagnostics.get("rank", scorer.n_features)
+        scorer.condition_number = diagnostics.get("condition_number", np.nan)
+        scorer.log_det = diagnostics.get("log_det", np.nan)
+        scorer.epsilon = diagnostics.get("epsilon", epsilon)
+        return scorer
+
+    @property
+    def mu(self):
+        return self._state[0]
+
+    @property
+    def whitening(self):
+        """Fator ``W`` (já com a escala dobrada), ou ``None`` se a covariância for singular"""
+        return self._state[1]
+
+    def _factorize(self):
+        self._state = (self.mu, None)
+        self.eigenvalues = None
+        self.rank = 0
+        self.condition_number = np.inf
+        self.log_det = -np.inf
+        self.is_singular = True
+
+        if not np.all(np.isfinite(self.cov)):
+            logger.warning("Matriz de covariância contém valores não finitos.")
+            return
+        cov = self.cov
+        if self.scale is not None:
+            cov = cov / np.outer(self.scale, self.scale)
+
+        # Diagnóstico pelo espectro: det() de uma 15x15 estoura ou zera com facilidade
+        self.eigenvalues = np.linalg.eigvalsh(cov)
+        max_eig = max(float(self.eigenvalues[-1]), 0.0)
+        tol = max_eig * self.n_features * np.finfo(np.float64).eps
+        self.rank = int(np.sum(self.eigenvalues > tol))
+        if self.eigenvalues[0] > 0:
+            self.condition_number = float(self.eigenvalues[-1] / self.eigenvalues[0])
+        if self.rank < self.n_features:
+            # Só diagnóstico: a regularização abaixo ainda dá uma inversa utilizável
+            logger.warning(
+                "Covariância com posto %d de %d; usando a regularização epsilon=%g.",
+                self.rank,
+                self.n_features,
+                self.epsilon,
+            )
+
+        cov_reg = cov + self.epsilon * np.eye(self.n_features)
+        scale = np.median(np.diag(cov_reg))
+        try:
+            chol = np.linalg.cholesky(cov_reg / scale)
+        except np.linalg.LinAlgError:
+            logger.warning("Falha na fatoração de Cholesky da covariância.")
+            return
+
+        # cov_reg = scale * L @ L.T  =>  inv(cov_reg) = W.T @ W, com W = inv(L) / sqrt(scale)
+        whitening = np.linalg.inv(chol) / np.sqrt(scale)
+        self.log_det = float(2.0 * np.sum(np.log(np.diag(chol))) + self.n_features * np.log(scale))
+        if self.scale is not None:
+            # z = (x - mu) / s  =>  W_bruto = W diag(1 / s)
+            whitening = whitening / self.scale
+            self.log_det += float(2.0 * np.sum(np.log(self.scale)))
+        self._state = (self.mu, whitening)
+        self.is_singular = False
+
+        logger.info(
+            "Covariância fatorada (posto %d, número de condição %.2e).",
+            self.rank,
+            self.condition_number,
+        )
+
+    def refactor(self):
+        """Refaz a fatoração a partir de ``mu``/``cov`` atuais (elimina o erro acumulado das atualizações)"""
+        self._factorize()
+
+    def update(self, x, alpha):
+        """Atualização exponencial de posto 1 com uma amostra normal, em O(d²).
+
+        ``mu += alpha * d`` e ``cov = (1 - alpha) * (cov + alpha * d d^T)``,
+        com ``d = x - mu``. A inversa é atualizada por Sherman–Morrison
+        diretamente no fator ``W``: ``W' = (I - beta z z^T) W / sqrt(1 - alpha)``
+        com ``z = W d``, sem refatorar a covariância.
+        """
+        mu, whitening = self._state
+        if whitening is None:
+            return False
+        d = np.asarray(x, dtype=np.float64) - mu
+        z = whitening @ d
+        zz = float(np.dot(z, z))
+        c = alpha / (1.0 + alpha * zz)
+        beta = c / (1.0 + np.sqrt(1.0 - c * zz))
+
+        whitening = (whitening - beta * np.outer(z, z @ whitening)) / np.sqrt(1.0 - alpha)
+        self.cov = (1.0 - alpha) * (self.cov + alpha * np.outer(d, d))
+        # Média e fator publicados juntos: predições concorrentes veem o par antigo ou o novo
+        self._state = (mu + alpha * d, whitening)
+        self.updates += 1
+        return True
+
+    @property
+    def inv_cov(self):
+        """Inversa da covariância regularizada, reconstruída a partir do fator"""
+        if self.whitening is None:
+            return None
+        return self.whitening.T @ self.whitening
+
+    def diagnostics(self):
+        """Resumo numérico da fatoração, para logs e endpoints de saúde"""
+        return {
+            "singular": bool(self.is_singular),
+            "rank": self.rank,
+            "n_features": self.n_features,
+            "condition_number": float(self.condition_number),
+            "log_det": float(self.log_det),
+            "epsilon": self.epsilon,
+        }
+
+    def distance(self, x):
+        """Distância de uma amostra (1-D) ou de um lote de amostras (2-D, uma por linha)"""
+        x = np.asarray(x, dtype=np.float64)
+        mu, whitening = self._state
+        if whitening is None:
+            return np.inf if x.ndim == 1 else np.full(x.shape[0], np.inf)
+
+        z = (x - mu) @ whitening.T
+        if z.ndim == 1:
+            return np.sqrt(np.dot(z, z))
+        return np.sqrt(np.einsum("ij,ij->i", z, z))
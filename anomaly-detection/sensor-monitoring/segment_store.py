@@ -0,0 +1,293 @@
+"""Append-only, per-sensor segment storage for the data collector.
+
+Layout under the root directory::
+
+    <sensor>/segment_000001.seg   file header + records
+    <sensor>/segment_000001.idx   one fixed-size entry per record
+
+Segment header: ``b"SSEG"``, version (u16), sensor id length (u16), the
+UTF-8 sensor id, zero padded to 8 bytes. Each record is a 16-byte header
+(timestamp f64, samples u32, axes u16, dtype u16) followed by the samples
+as little-endian float32, one column per axis (all x, then all y, ...).
+Index entries map a record timestamp to its byte offset in the segment.
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+import hashlib
+import os
+import re
+import struct
+import threading
+import time
+
+import numpy as np
+
+SEGMENT_MAGIC = b"SSEG"
+SEGMENT_VERSION = 1
+FLOAT32 = 1
+INDEX_BUFFER_SIZE = 8192  # index entries are 24 bytes; a big buffer only wastes memory
+
+_SEGMENT_HEADER = struct.Struct("<4sHH")
+_RECORD_HEADER = struct.Struct("<dIHH")
+INDEX_DTYPE = np.dtype(
+    [
+        ("timestamp", "<f8"),
+        ("offset", "<u8"),
+        ("n_samples", "<u4"),
+        ("axes", "<u2"),
+        ("pad", "<u2"),
+    ]
+)
+
+
+def sensor_dirname(sensor_id):
+    """Filesystem-safe, collision-free directory name for a sensor id.
+
+    Ids that are already safe are used as is. Anything else is sanitized and
+    suffixed with ``~`` plus a hash of the raw id; ``~`` never appears in a
+    safe id, so ``"motor/1"`` and ``"motor_1"`` get different directories.
+    """
+    name = re.sub(r"[^A-Za-z0-9._-]", "_", sensor_id).strip(".")
+    if name and name == sensor_id:
+        return name
+    digest = hashlib.sha1(sensor_id.encode("utf-8")).hexdigest()[:12]
+    return f"{name[:64] or '_'}~{digest}"
+
+
+def _segment_header(sensor_id):
+    sensor_bytes = sensor_id.encode("utf-8")
+    header = _SEGMENT_HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION, len(sensor_bytes))
+    header += sensor_bytes
+    return header.ljust((len(header) + 7) & ~7, b"\0")
+
+
+def encode_record(data, timestamp):
+    """Serialize a (samples, axes) window as one columnar float32 record"""
+    data = np.asarray(data)
+    header = _RECORD_HEADER.pack(timestamp, data.shape[0], data.shape[1], FLOAT32)
+    return header + np.ascontiguousarray(data.T, dtype="<f4").tobytes()
+
+
+def read_index(index_path):
+    """Load a segment index as a structured array"""
+    return np.fromfile(index_path, dtype=INDEX_DTYPE)
+
+
+def read_segment_header(segment_path):
+    with open(segment_path, "rb") as f:
+        magic, version, id_len = _SEGMENT_HEADER.unpack(f.read(_SEGMENT_HEADER.size))
+        if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION:
+            raise ValueError(f"Not a segment file: {segment_path}")
+        return f.read(id_len).decode("utf-8")
+
+
+def iter_records(segment_path, entries=None):
+    """Yield (timestamp, window) for a segment's records, or only for the given index entries"""
+    if entries is None:
+        entries = read_index(Path(segment_path).with_suffix(".idx"))
+    if len(entries) == 0:
+        return
+    segment = np.memmap(segment_path, dtype=np.uint8, mode="r")
+    for entry in entries:
+        start = int(entry["offset"]) + _RECORD_HEADER.size
+        count = int(entry["n_samples"]) * int(entry["axes"])
+        columns = np.frombuffer(segment, dtype="<f4", count=count, offset=start)
+        yield float(entry["timestamp"]), columns.reshape(int(entry["axes"]), -1).T
+
+
+class _SegmentWriter:
+    """Buffered appender for one sensor's current segment"""
+
+    def __init__(self, sensor_id, directory, max_segment_bytes, buffer_size):
+        self.sensor_id = sensor_id
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.buffer_size = buffer_size
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.closed = False
+        self.last_used = time.monotonic()
+        self.header = _segment_header(sensor_id)
+
+        directory.mkdir(parents=True, exist_ok=True)
+        existing = sorted(directory.glob("segment_*.seg"))
+        self.seq = int(existing[-1].stem.split("_")[1]) if existing else 1
+        self._open()
+
+    def _open(self):
+        path = self.directory / f"segment_{self.seq:06d}.seg"
+        self.data_file = open(path, "ab", buffering=self.buffer_size)
+        self.index_file = open(path.with_suffix(".idx"), "ab", buffering=INDEX_BUFFER_SIZE)
+        self.size = self.data_file.tell()
+        if self.size == 0:
+            self.data_file.write(self.header)
+            self.size = len(self.header)
+
+    def _rotate(self):
+        self.flush(fsync=True)
+        self.data_file.close()
+        self.index_file.close()
+        self.seq += 1
+        self._open()
+
+    def append(self, data, timestamp):
+        """Append a record; returns False if the writer was closed (evicted) meanwhile"""
+        record = encode_record(data, timestamp)
+        with self.lock:
+            if self.closed:
+                return False
+            self.last_used = time.monotonic()
+            # Rotate before overflowing, unless the segment is still empty
+            if self.size + len(record) > self.max_segment_bytes and self.size > len(self.header):
+                self._rotate()
+            entry = np.array(
+                [(timestamp, self.size, data.shape[0], data.shape[1], 0)], dtype=INDEX_DTYPE
+            )
+            self.data_file.write(record)
+            self.index_file.write(entry.tobytes())
+            self.size += len(record)
+            self.dirty = True
+        return True
+
+    def flush(self, fsync=True):
+        if not self.dirty:
+            return
+        self.data_file.flush()
+        self.index_file.flush()
+        if fsync:
+            os.fsync(self.data_file.fileno())
+            os.fsync(self.index_file.fileno())
+        self.dirty = False
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.flush(fsync=True)
+            self.data_file.close()
+            self.index_file.close()
+            self.closed = True
+
+
+class SegmentStore:
+    """Thread-safe, append-only storage of sensor windows in size-rotated segments.
+
+    Writes go through per-sensor buffered files; a background thread flushes
+    and fsyncs every ``fsync_interval`` seconds, so a burst of windows costs
+    one fsync per sensor instead of one per request. At most
+    ``max_open_writers`` sensors keep their files open (least recently used
+    are closed first), and writers idle for ``idle_timeout`` seconds are
+    closed by the flush thread; a closed sensor reopens its last segment on
+    the next append.
+    """
+
+    def __init__(
+        self,
+        root,
+        max_segment_bytes=64 * 1024 * 1024,
+        buffer_size=1024 * 1024,
+        fsync_interval=1.0,
+        max_open_writers=128,
+        idle_timeout=300.0,
+    ):
+        self.root = Path(root)
+        self.max_segment_bytes = max_segment_bytes
+        self.buffer_size = buffer_size
+        self.fsync_interval = fsync_interval
+        self.max_open_writers = max_open_writers
+        self.idle_timeout = idle_timeout
+        self._writers = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = None
+        if fsync_interval:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="segment-flush", daemon=True
+            )
+            self._flusher.start()
+
+    def _writer(self, sensor_id):
+        # Keyed by directory: one writer (and one size counter) per segment file
+        dirname = sensor_dirname(sensor_id)
+        evicted = []
+        with self._lock:
+            writer = self._writers.get(dirname)
+            if writer is None:
+                writer = _SegmentWriter(
+                    sensor_id,
+                    self.root / dirname,
+                    self.max_segment_bytes,
+                    self.buffer_size,
+                )
+                self._writers[dirname] = writer
+                while len(self._writers) > self.max_open_writers:
+                    evicted.append(self._writers.popitem(last=False)[1])
+            else:
+                self._writers.move_to_end(dirname)
+        # Flush and fsync of the evicted writers happen outside the store lock
+        for old in evicted:
+            old.close()
+        return writer
+
+    def append(self, sensor_id, data, timestamp=None):
+        """Append one (samples, axes) window for a sensor"""
+        data = np.asarray(data)
+        if data.ndim != 2:
+            raise ValueError(f"Expected a (samples, axes) window, got {data.shape}")
+        timestamp = time.time() if timestamp is None else timestamp
+        # A writer evicted between lookup and append is closed: look it up again
+        while not self._writer(sensor_id).append(data, timestamp):
+            pass
+
+    def close_idle(self, now=None):
+        """Close writers unused for ``idle_timeout`` seconds; returns how many were closed"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [
+                name
+                for name, writer in self._writers.items()
+                if now - writer.last_used >= self.idle_timeout
+            ]
+            closing = [self._writers.pop(name) for name in idle]
+        for writer in closing:
+            writer.close()
+        return len(closing)
+
+    def flush(self, fsync=True):
+        with self._lock:
+            writers = list(self._writers.values())
+        for writer in writers:
+            with writer.lock:
+                if not writer.closed:
+                    writer.flush(fsync=fsync)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.fsync_interval):
+            self.flush(fsync=True)
+            if self.idle_timeout:
+                self.close_idle()
+
+    def close(self):
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            writers = list(self._writers.values())
+            self._writers.clear()
+        for writer in writers:
+            writer.close()
+
+    def segments(self, sensor_id):
+        return sorted((self.root / sensor_dirname(sensor_id)).glob("segment_*.seg"))
+
+    def read(self, sensor_id, start=None, end=None):
+        """Yield (timestamp, window) for a sensor, optionally within [start, end)"""
+        self.flush(fsync=False)
+        for segment_path in self.segments(sensor_id):
+            entries = read_index(segment_path.with_suffix(".idx"))
+            if start is not None:
+                entries = entries[entries["timestamp"] >= start]
+            if end is not None:
+                entries = entries[entries["timestamp"] < end]
+            yield from iter_records(segment_path, entries)
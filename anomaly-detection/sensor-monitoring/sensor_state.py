@@ -0,0 +1,105 @@
+from collections import OrderedDict
+import threading
+import time
+
+HISTORY_SIZE = 20  # distâncias guardadas para o fator de estabilidade da confiança
+DEBOUNCE_SIZE = 3  # predições consideradas na regra "2 de 3"
+DEBOUNCE_MIN_ANOMALIES = 2
+
+
+class SensorState:
+    """Histórico de um sensor em buffers circulares de tamanho fixo"""
+
+    __slots__ = (
+        "distances",
+        "distance_pos",
+        "distance_count",
+        "flags",
+        "flag_pos",
+        "anomaly_count",
+        "last_seen",
+        "lock",
+    )
+
+    def __init__(self):
+        self.distances = [0.0] * HISTORY_SIZE
+        self.distance_pos = 0
+        self.distance_count = 0
+        self.flags = [False] * DEBOUNCE_SIZE
+        self.flag_pos = 0
+        self.anomaly_count = 0
+        self.last_seen = 0.0
+        self.lock = threading.Lock()
+
+    def push_prediction(self, is_anomaly):
+        """Registra uma predição bruta e devolve a decisão estabilizada (2 de 3)"""
+        self.anomaly_count += int(is_anomaly) - int(self.flags[self.flag_pos])
+        self.flags[self.flag_pos] = is_anomaly
+        self.flag_pos = (self.flag_pos + 1) % DEBOUNCE_SIZE
+        return self.anomaly_count >= DEBOUNCE_MIN_ANOMALIES
+
+    def push_distance(self, distance):
+        self.distances[self.distance_pos] = distance
+        self.distance_pos = (self.distance_pos + 1) % HISTORY_SIZE
+        if self.distance_count < HISTORY_SIZE:
+            self.distance_count += 1
+
+    def recent_distances(self, n):
+        """Últimas ``n`` distâncias em ordem cronológica"""
+        n = min(n, self.distance_count)
+        start = self.distance_pos - n
+        return [self.distances[(start + i) % HISTORY_SIZE] for i in range(n)]
+
+
+class SensorStateStore:
+    """Estados por sensor com despejo LRU e por inatividade (TTL).
+
+    A ordem do ``OrderedDict`` é a ordem do último acesso, então os sensores
+    mais antigos ficam sempre no início e o despejo não precisa varrer o
+    dicionário.
+    """
+
+    def __init__(self, max_sensors=10000, ttl=3600.0, clock=time.monotonic):
+        self.max_sensors = max_sensors
+        self.ttl = ttl
+        self.clock = clock
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sensor_id):
+        """Devolve o estado do sensor, criando-o se necessário, e marca o acesso"""
+        now = self.clock()
+        with self._lock:
+            state = self._states.get(sensor_id)
+            if state is None:
+                state = SensorState()
+                self._states[sensor_id] = state
+            else:
+                self._states.move_to_end(sensor_id)
+            state.last_seen = now
+            self._evict(now)
+            return state
+
+    def _evict(self, now):
+        while len(self._states) > self.max_sensors:
+            self._states.popitem(last=False)
+        if self.ttl is not None:
+            while self._states:
+                oldest = next(iter(self._states.values()))
+                if now - oldest.last_seen <= self.ttl:
+                    break
+                self._states.popitem(last=False)
+
+    def remove(self, sensor_id):
+        with self._lock:
+            self._states.pop(sensor_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+    def __contains__(self, sensor_id):
+        return sensor_id in self._states
+
+    def __len__(self):
+        return len(self._states)
@@ -1,15 +1,49 @@
 import json
 import argparse
+import itertools
+import numpy as np
 from pathlib import Path
 from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from frames import CONTENT_TYPE as FRAME_CONTENT_TYPE, decode_frames
+from segment_store import SegmentStore
+
+
+class CsvStorage:
+    """Legacy storage: one CSV file per received window"""
+
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self._counter = itertools.count()
+
+    def append(self, sensor_id, data, timestamp=None):
+        when = datetime.now() if timestamp is None else datetime.fromtimestamp(timestamp)
+        # Microseconds plus a counter keep concurrent posts from overwriting each other
+        stamp = when.strftime("%Y%m%d_%H%M%S_%f")
+        filepath = self.output_dir / f"sensor_data_{stamp}_{next(self._counter)}.csv"
+        # repr() is the shortest string that round-trips, as the old per-value writes were
+        with open(filepath, "w") as f:
+            for row in np.asarray(data).tolist():
+                f.write(",".join(map(repr, row)) + "\n")
+        print(f"Data saved to {filepath}")
+
+    def close(self):
+        pass
+
+
+class CollectorServer(ThreadingHTTPServer):
+    """HTTP server with one thread per connection and a deeper accept queue"""
+
+    daemon_threads = True
+    request_queue_size = 128  # socketserver's default backlog of 5 drops bursts of devices
 
 
 class SensorDataHandler(BaseHTTPRequestHandler):
     """Handler for sensor data requests"""
 
-    def __init__(self, output_dir, *args, **kwargs):
-        self.output_dir = output_dir
+    def __init__(self, storage, *args, **kwargs):
+        self.storage = storage
         super().__init__(*args, **kwargs)
 
     def do_GET(self):
@@ -23,17 +57,21 @@ class SensorDataHandler(BaseHTTPRequestHandler):
         try:
             # Read and parse data
             content_length = int(self.headers["Content-Length"])
-            post_data = self.rfile.read(content_length).decode("utf-8")
-            sensor_data = json.loads(post_data)
-
-            # Generate filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filepath = Path(self.output_dir) / f"sensor_data_{timestamp}.csv"
-
-            # Save data to CSV
-            self._save_data_to_csv(sensor_data, filepath)
-
-            print(f"Data saved to {filepath}")
+            post_data = self.rfile.read(content_length)
+
+            content_type = self.headers.get("Content-Type", "").split(";")[0].strip()
+            if content_type == FRAME_CONTENT_TYPE:
+                # Binary frames, decoded without parsing text
+                windows = [(frame.sensor_id, frame.data) for frame in decode_frames(post_data)]
+            else:
+                sensor_data = json.loads(post_data.decode("utf-8"))
+                sensor_id = sensor_data.get(
+                    "sensor_id", self.headers.get("X-Sensor-Id", "default")
+                )
+                windows = [(sensor_id, self._json_to_array(sensor_data))]
+
+            for sensor_id, data in windows:
+                self.storage.append(sensor_id, data)
             self.send_response(204)  # Success, no content to return
 
         except Exception as e:
@@ -42,26 +80,50 @@ class SensorDataHandler(BaseHTTPRequestHandler):
 
         self.end_headers()
 
-    def _save_data_to_csv(self, data, filepath):
-        """Save sensor data to CSV file"""
-        with open(filepath, "w") as f:
-            num_samples = len(data["x"])
-            for i in range(num_samples):
-                f.write(f"{data['x'][i]},{data['y'][i]},{data['z'][i]}\n")
-
-
-def create_server(output_dir, port):
+    def _json_to_array(self, data):
+        """Convert the firmware's {"x": [...], "y": [...], "z": [...]} payload to (samples, 3)"""
+        # Kept at full precision here; the segment store converts to float32 itself
+        return np.column_stack(
+            [np.asarray(data[axis], dtype=np.float64) for axis in ("x", "y", "z")]
+        )
+
+    def log_message(self, format, *args):
+        # Per-request access logs on stderr are serialized across all threads
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def create_server(
+    output_dir,
+    port,
+    storage_format="segments",
+    segment_size_mb=64,
+    fsync_interval=1.0,
+    verbose=False,
+):
     """Create and configure the HTTP server"""
 
     # Ensure output directory exists
     Path(output_dir).mkdir(parents=True, exist_ok=True)
 
-    # Create handler with output directory configuration
+    if storage_format == "csv":
+        storage = CsvStorage(output_dir)
+    else:
+        storage = SegmentStore(
+            output_dir,
+            max_segment_bytes=int(segment_size_mb * 1024 * 1024),
+            fsync_interval=fsync_interval,
+        )
+
+    # Create handler with storage configuration
     def handler(*args, **kwargs):
-        return SensorDataHandler(output_dir, *args, **kwargs)
+        return SensorDataHandler(storage, *args, **kwargs)
 
     # Create and return server
-    return HTTPServer(("", port), handler)
+    server = CollectorServer(("", port), handler)
+    server.storage = storage
+    server.verbose = verbose
+    return server
 
 
 def main():
@@ -78,14 +140,41 @@ def main():
     parser.add_argument(
         "-p", "--port", type=int, default=4242, help="Server port (default: 4242)"
     )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=["segments", "csv"],
+        default="segments",
+        help="Storage format: per-sensor binary segments or one CSV per window (default: segments)",
+    )
+    parser.add_argument(
+        "--segment-size",
+        type=float,
+        default=64,
+        help="Segment rotation size in MB (default: 64)",
+    )
+    parser.add_argument(
+        "--fsync-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between batched flush+fsync of segment files (default: 1.0)",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request")
     args = parser.parse_args()
 
     # Create and start server
-    server = create_server(args.dir, args.port)
+    server = create_server(
+        args.dir,
+        args.port,
+        storage_format=args.format,
+        segment_size_mb=args.segment_size,
+        fsync_interval=args.fsync_interval,
+        verbose=args.verbose,
+    )
 
     # Print startup message
     print("\nSensor Data Collection Server")
-    print(f"Saving data to: {args.dir}")
+    print(f"Saving data to: {args.dir} ({args.format})")
     print(f"Server running on port {args.port}")
     print("Press Ctrl+C to stop\n")
 
@@ -93,7 +182,9 @@ def main():
         server.serve_forever()
     except KeyboardInterrupt:
         print("\nServer shutting down...")
+    finally:
         server.server_close()
+        server.storage.close()
 
 
 if __name__ == "__main__":
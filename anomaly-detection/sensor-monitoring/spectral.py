@@ -0,0 +1,110 @@
+from functools import lru_cache
+
+import numpy as np
+
+SAMPLE_RATE = 200  # Hz, taxa de amostragem do acelerômetro
+
+# Bandas (Hz) com limite inferior fechado e superior aberto; a última inclui Nyquist.
+# Desbalanceamento e desalinhamento aparecem na rotação (1x e 2x), defeitos de
+# rolamento nas frequências de falha acima dela.
+DEFAULT_BANDS = {
+    "low": (0.0, 15.0),
+    "imbalance": (15.0, 50.0),
+    "bearing": (50.0, 90.0),
+    "high": (90.0, 100.0),
+}
+
+
+@lru_cache(maxsize=32)
+def spectral_plan(samples, sample_rate, bands):
+    """Janela de Hann e matriz ``(bins, bandas)`` para um comprimento de janela.
+
+    Calculadas uma vez por ``(samples, sample_rate, bands)``. A matriz já
+    inclui o fator 2 do espectro unilateral e a normalização de Parseval, de
+    modo que a soma de todas as bandas aproxima a variância da janela.
+    """
+    window = np.hanning(samples)
+    freqs = np.fft.rfftfreq(samples, d=1.0 / sample_rate)
+    nyquist = sample_rate / 2
+
+    one_sided = np.full(len(freqs), 2.0)
+    one_sided[0] = 1.0
+    if samples % 2 == 0:
+        one_sided[-1] = 1.0
+
+    membership = np.zeros((len(freqs), len(bands)))
+    for j, (low, high) in enumerate(bands):
+        upper = freqs <= high if high >= nyquist else freqs < high
+        membership[:, j] = (freqs >= low) & upper & (freqs > 0)
+    membership *= one_sided[:, None] / (samples * np.sum(window * window))
+
+    window.flags.writeable = False
+    membership.flags.writeable = False
+    return window, membership
+
+
+class SpectralFeatures:
+    """Energia por banda de frequência de uma ou várias janelas, com uma única FFT em lote.
+
+    Cada feature é o RMS da banda (mesma unidade de ``std``), na ordem
+    ``[eixo 0: bandas | eixo 1: bandas | ...]``.
+    """
+
+    def __init__(self, bands=None, sample_rate=SAMPLE_RATE):
+        bands = DEFAULT_BANDS if bands is None else bands
+        if isinstance(bands, dict):
+            names, ranges = list(bands), list(bands.values())
+        else:
+            ranges = [tuple(band) for band in bands]
+            names = [f"{low:g}_{high:g}hz" for low, high in ranges]
+        self.band_names = names
+        self.bands = tuple((float(low), float(high)) for low, high in ranges)
+        self.sample_rate = float(sample_rate)
+        self.feature_names = [f"band_{name}" for name in names]
+
+    @property
+    def n_bands(self):
+        return len(self.bands)
+
+    def _windowed_fft(self, windows, remove_dc):
+        x = np.asarray(windows, dtype=np.float64)
+        single = x.ndim == 2
+        if single:
+            x = x[np.newaxis]
+        window, membership = spectral_plan(x.shape[1], self.sample_rate, self.bands)
+        if remove_dc:
+            x = x - x.mean(axis=1, keepdims=True)
+        return np.fft.rfft(x * window[:, None], axis=1), membership, single
+
+    def __call__(self, windows, remove_dc=True):
+        """``(eixos * bandas,)`` para uma janela ou ``(lote, eixos * bandas)`` para um lote"""
+        spectrum, membership, single = self._windowed_fft(windows, remove_dc)
+        power = spectrum.real**2 + spectrum.imag**2
+        energy = np.einsum("bka,kj->baj", power, membership)
+        features = np.sqrt(energy).reshape(energy.shape[0], -1)
+        return features[0] if single else features
+
+    def spectrum(self, windows, remove_dc=False):
+        """Magnitude da FFT janelada por eixo, sem o bin DC: ``([lote,] bins, eixos)``"""
+        spectrum, _, single = self._windowed_fft(windows, remove_dc)
+        magnitude = np.abs(spectrum[:, 1:])
+        return magnitude[0] if single else magnitude
+
+    def stats(self, features):
+        """Organiza as features espectrais em ``{"axis_i": {nome: valor}}``"""
+        per_axis = np.asarray(features).reshape(-1, self.n_bands)
+        return {
+            f"axis_{axis_idx}": {
+                name: float(value) for name, value in zip(self.feature_names, values)
+            }
+            for axis_idx, values in enumerate(per_axis)
+        }
+
+    @classmethod
+    def from_model(cls, model):
+        """Configuração espectral de um ``.npz`` antigo, ou ``None`` se ele não usar bandas"""
+        if "spectral_bands" not in model:
+            return None
+        names = [str(name) for name in model["spectral_band_names"]]
+        bands = dict(zip(names, map(tuple, model["spectral_bands"])))
+        return cls(bands, float(model["spectral_sample_rate"]))
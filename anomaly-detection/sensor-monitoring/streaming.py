@@ -0,0 +1,198 @@
+from collections import deque
+
+import numpy as np
+
+from features import N_FEATURES_PER_AXIS
+
+
+class SlidingWindowBuffer:
+    """Buffer circular de amostras que entrega uma janela a cada ``hop`` amostras.
+
+    As amostras são gravadas duas vezes (posições ``i`` e ``i + window``), de
+    modo que a janela mais recente é sempre uma fatia contígua do buffer, sem
+    reordenação. A primeira janela sai quando ``window`` amostras chegaram;
+    depois disso, uma nova a cada ``hop`` amostras.
+    """
+
+    def __init__(self, window=100, hop=25, axes=3):
+        if window < 2:
+            raise ValueError("window deve ter pelo menos 2 amostras")
+        if not 1 <= hop <= window:
+            raise ValueError("hop deve estar entre 1 e window")
+        self.window = window
+        self.hop = hop
+        self.axes = axes
+        self._buffer = np.zeros((2 * window, axes))
+        self._pos = 0
+        self.count = 0  # total de amostras recebidas
+        self._since_emit = 0
+
+    def _write(self, samples):
+        n = len(samples)
+        first = min(n, self.window - self._pos)
+        for offset in (0, self.window):
+            start = self._pos + offset
+            self._buffer[start : start + first] = samples[:first]
+            self._buffer[offset : offset + n - first] = samples[first:]
+        self._pos = (self._pos + n) % self.window
+        self.count += n
+
+    def latest(self):
+        """Cópia das últimas ``window`` amostras em ordem cronológica"""
+        return self._buffer[self._pos : self._pos + self.window].copy()
+
+    def extend(self, samples):
+        """Adiciona amostras ``(n, eixos)`` e devolve as janelas completadas, com a posição final de cada uma"""
+        samples = np.asarray(samples, dtype=np.float64)
+        if samples.ndim != 2 or samples.shape[1] != self.axes:
+            raise ValueError(f"Esperado (n, {self.axes}) amostras, recebido {samples.shape}")
+
+        windows = []
+        while len(samples):
+            if self.count < self.window:
+                step = self.window - self.count
+            else:
+                step = self.hop - self._since_emit
+            chunk, samples = samples[:step], samples[step:]
+            self._write(chunk)
+
+            if self.count < self.window:
+                continue
+            if self.count - len(chunk) < self.window:
+                self._since_emit = self.hop  # janela inicial acabou de completar
+            else:
+                self._since_emit += len(chunk)
+            if self._since_emit >= self.hop:
+                self._since_emit = 0
+                windows.append((self.count, self.latest()))
+        return windows
+
+
+class StreamingFeatures:
+    """Features de ``extract_features`` mantidas incrementalmente sobre uma janela deslizante.
+
+    Cada amostra nova entra e a mais antiga sai em O(1) amortizado: somas de
+    potências (1 a 4) alimentam std, curtose e RMS, e deques monotônicos dão
+    máximo e mínimo (pico e pico a pico). As somas são acumuladas em relação a
+    um deslocamento por eixo e recalculadas do zero a cada ``refresh_every``
+    amostras, o que limita o erro de arredondamento em fluxos longos.
+    """
+
+    def __init__(self, window=100, hop=25, axes=3, refresh_every=None):
+        if window < 2:
+            raise ValueError("window deve ter pelo menos 2 amostras")
+        if not 1 <= hop <= window:
+            raise ValueError("hop deve estar entre 1 e window")
+        self.window = window
+        self.hop = hop
+        self.axes = axes
+        self.refresh_every = refresh_every or 10 * window
+
+        self._samples = [[0.0] * axes for _ in range(window)]
+        self._shift = [0.0] * axes
+        self._sums = [[0.0] * 4 for _ in range(axes)]
+        self._max = [deque() for _ in range(axes)]  # (índice, valor), valores decrescentes
+        self._min = [deque() for _ in range(axes)]  # (índice, valor), valores crescentes
+        self.count = 0
+        self._since_refresh = 0
+
+    def push(self, sample):
+        """Adiciona uma amostra (sequência com um valor por eixo)"""
+        idx = self.count
+        slot = idx % self.window
+        full = idx >= self.window
+        old = self._samples[slot]
+        expired = idx - self.window
+        if idx == 0:
+            # Deslocamento inicial na primeira amostra evita somas enormes (ex.: gravidade no eixo z)
+            self._shift = [float(sample[a]) for a in range(self.axes)]
+
+        for a in range(self.axes):
+            value = float(sample[a])
+            sums = self._sums[a]
+            d = value - self._shift[a]
+            d2 = d * d
+            sums[0] += d
+            sums[1] += d2
+            sums[2] += d2 * d
+            sums[3] += d2 * d2
+            if full:
+                o = old[a] - self._shift[a]
+                o2 = o * o
+                sums[0] -= o
+                sums[1] -= o2
+                sums[2] -= o2 * o
+                sums[3] -= o2 * o2
+
+            maxq = self._max[a]
+            while maxq and maxq[-1][1] <= value:
+                maxq.pop()
+            maxq.append((idx, value))
+            if maxq[0][0] <= expired:
+                maxq.popleft()
+
+            minq = self._min[a]
+            while minq and minq[-1][1] >= value:
+                minq.pop()
+            minq.append((idx, value))
+            if minq[0][0] <= expired:
+                minq.popleft()
+
+            old[a] = value
+
+        self.count += 1
+        self._since_refresh += 1
+        if self._since_refresh >= self.refresh_every and self.count >= self.window:
+            self._refresh()
+
+    def _refresh(self):
+        """Recalcula as somas a partir da janela atual, centradas na média"""
+        values = np.array(self._samples)
+        mean = values.mean(axis=0)
+        self._shift = mean.tolist()
+        d = values - mean
+        d2 = d * d
+        self._sums = np.stack(
+            [d.sum(axis=0), d2.sum(axis=0), (d2 * d).sum(axis=0), (d2 * d2).sum(axis=0)], axis=1
+        ).tolist()
+        self._since_refresh = 0
+
+    @property
+    def ready(self):
+        return self.count >= self.window
+
+    def features(self):
+        """Vetor ``(eixos * 5,)`` equivalente a ``extract_features(janela, remove_dc=True)``"""
+        n = min(self.count, self.window)
+        out = np.empty(self.axes * N_FEATURES_PER_AXIS)
+        for a in range(self.axes):
+            s1, s2, s3, s4 = (s / n for s in self._sums[a])
+            # Momentos centrais a partir dos momentos em torno do deslocamento
+            m2 = max(s2 - s1 * s1, 0.0)
+            m4 = s4 - 4 * s1 * s3 + 6 * s1 * s1 * s2 - 3 * s1**4
+            mean = self._shift[a] + s1
+            high = self._max[a][0][1] - mean
+            low = self._min[a][0][1] - mean
+            std = np.sqrt(m2)
+            kurtosis = m4 / (m2 * m2) - 3.0 if m2 > 0 else np.nan
+            out[a * N_FEATURES_PER_AXIS : (a + 1) * N_FEATURES_PER_AXIS] = (
+                std,
+                kurtosis,
+                max(high, -low),
+                std,
+                high - low,
+            )
+        return out
+
+    def extend(self, samples):
+        """Adiciona amostras ``(n, eixos)`` e devolve ``(contagem, features)`` a cada ``hop`` amostras"""
+        samples = np.asarray(samples, dtype=np.float64)
+        if samples.ndim != 2 or samples.shape[1] != self.axes:
+            raise ValueError(f"Esperado (n, {self.axes}) amostras, recebido {samples.shape}")
+
+        emitted = []
+        for sample in samples.tolist():
+            self.push(sample)
+            if self.count >= self.window and (self.count - self.window) % self.hop == 0:
+                emitted.append((self.count, self.features()))
+        return emitted
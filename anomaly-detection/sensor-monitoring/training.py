@@ -1,45 +1,123 @@
 from pathlib import Path
+import argparse
+import json
+import sys
+import tempfile
+import time
 import numpy as np
-import pandas as pd
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, roc_auc_score, confusion_matrix
-import matplotlib.pyplot as plt
-import seaborn as sns
+from sklearn.metrics import classification_report
+
+from calibration import bootstrap, calibrate, cross_validate
+from dataset import LoadReport, iter_capture_features, open_dataset
+from features import FEATURE_NAMES
+from model_format import save_model
+from pipeline import FeaturePipeline
+from running_stats import RunningCovariance
+from scoring import MahalanobisScorer
+from spectral import SpectralFeatures
 
 DATA_PATH = Path("sensor-monitoring/data")
 NORMAL_PATH = DATA_PATH / "normal"
 ANOMALY_PATH = DATA_PATH / "anomaly"
-MODEL_PATH = Path("models/mahalanobis_model.npz")
-
-def load_csv_files(path):
-    files = list(path.glob("*.csv"))
-    data = []
-    for f in files:
-        try:
-            df = pd.read_csv(f)
-            if {"temperatura", "vibracao", "energia"}.issubset(df.columns):
-                # Extração de features simples: média de cada coluna
-                features = df[["temperatura", "vibracao", "energia"]].mean().values
-                data.append(features)
-            else:
-                print(f"⚠️  Ignorando arquivo inválido: {f}")
-        except Exception as e:
-            print(f"⚠️  Erro ao ler {f}: {e}")
+PACKED_PATH = Path("sensor-monitoring/data.packed")  # gerado por dataset.py a partir de DATA_PATH
+MODEL_PATH = Path("models/mahalanobis_model.model")
+REPORT_PATH = MODEL_PATH.with_name("training_report.json")
+FEATURE_COLUMNS = ["temperatura", "vibracao", "energia"]
+FEATURE_SETS = ("means", "stats", "spectral")
+
+def build_pipeline(kind="means", axes=len(FEATURE_COLUMNS)):
+    """Pipeline de features do treino; vai no modelo e é o mesmo que a API executa.
+
+    ``means``: média de cada coluna (feature original do treino);
+    ``stats``: estatísticas de tempo por eixo; ``spectral``: ``stats`` mais a
+    energia por banda de frequência.
+    """
+    if kind not in FEATURE_SETS:
+        raise ValueError(f"Conjunto de features inválido: {kind}")
+    if kind == "means":
+        return FeaturePipeline(axes, stats=["mean"])
+    # Com a remoção de DC o rms é idêntico ao std e deixaria a covariância singular
+    stats = [name for name in FEATURE_NAMES if name != "rms"]
+    spectral = SpectralFeatures() if kind == "spectral" else None
+    return FeaturePipeline(axes, stats=stats, spectral=spectral)
+
+def load_csv_files(path, workers=None, report=None, pipeline=None, columns=FEATURE_COLUMNS):
+    # Arquivos lidos em paralelo; cada linha é o vetor do pipeline de features da captura
+    report = report if report is not None else LoadReport()
+    pipeline = pipeline or build_pipeline()
+    files = sorted(path.glob("*.csv"))
+    data = [
+        features
+        for _, features in iter_capture_features(
+            files, columns=columns, features=pipeline, workers=workers, report=report
+        )
+    ]
+    for failure in report.failures:
+        print(f"⚠️  Ignorando {failure.path} ({failure.reason}): {failure.message}")
     return np.array(data)
 
-def train_model():
-    print("🧠 Iniciando treino com CSVs no formato temperatura/vibracao/energia")
+def _column_indices(dataset, columns):
+    if columns is None:
+        return slice(None)
+    if not set(columns).issubset(dataset.columns):
+        raise ValueError(f"Dataset sem as colunas {columns}")
+    return [dataset.columns.index(column) for column in columns]
 
-    normal_data = load_csv_files(NORMAL_PATH)
-    anomaly_data = load_csv_files(ANOMALY_PATH)
+def _packed_features(dataset, indices, pipeline, col_idx):
+    # Capturas de mesmo tamanho viram um único lote; tamanhos variados vão uma a uma
+    captures = [dataset[i][:, col_idx] for i in indices]
+    if not captures:
+        return np.empty((0, pipeline.n_features))
+    if all(len(capture) == len(captures[0]) for capture in captures):
+        return pipeline.transform(np.stack(captures))
+    return np.array([pipeline.transform(capture) for capture in captures])
 
-    print(f"📁 Arquivos válidos: {len(normal_data)} normais, {len(anomaly_data)} anômalos")
+def load_packed(path, operation, pipeline=None, columns=FEATURE_COLUMNS):
+    # Mesmas features de load_csv_files, calculadas direto sobre o dataset mapeado em memória
+    dataset = open_dataset(path)
+    col_idx = _column_indices(dataset, columns)
+    return _packed_features(dataset, dataset.indices([operation]), pipeline or build_pipeline(), col_idx)
 
-    if len(normal_data) < 2 or len(anomaly_data) < 2:
-        print("❌ Dados insuficientes ou com falhas.")
-        return
+def packed_blocks(path, operation, block_size=4096, pipeline=None, columns=FEATURE_COLUMNS):
+    # Features calculadas em blocos de capturas, sem materializar o dataset inteiro
+    dataset = open_dataset(path)
+    col_idx = _column_indices(dataset, columns)
+    pipeline = pipeline or build_pipeline()
+    indices = dataset.indices([operation])
+    for start in range(0, len(indices), block_size):
+        yield _packed_features(dataset, indices[start : start + block_size], pipeline, col_idx)
 
+def spill_csv_features(path, workers=None, pipeline=None, columns=FEATURE_COLUMNS):
+    # Uma única leitura dos CSVs; as linhas de features vão para um arquivo temporário mapeado em memória
+    pipeline = pipeline or build_pipeline()
+    spill = tempfile.TemporaryFile()
+    count = width = 0
+    for _, features in iter_capture_features(
+        sorted(path.glob("*.csv")), columns=columns, features=pipeline, workers=workers
+    ):
+        row = np.asarray(features, dtype=np.float64)
+        width = len(row)
+        spill.write(row.tobytes())
+        count += 1
+    spill.flush()
+    if count == 0:
+        return np.empty((0, pipeline.n_features))
+    return np.memmap(spill, dtype=np.float64, mode="r", shape=(count, width))
+
+def array_blocks(array, block_size=4096):
+    for start in range(0, len(array), block_size):
+        yield np.asarray(array[start : start + block_size])
+
+def split_mask(n):
+    # Mesma divisão de train_test_split(..., test_size=0.3, random_state=42): depende só de n
+    train_idx, _ = train_test_split(np.arange(n), test_size=0.3, random_state=42)
+    is_train = np.zeros(n, dtype=bool)
+    is_train[train_idx] = True
+    return is_train
+
+def fit_batch(normal_data, anomaly_data):
     X = np.vstack([normal_data, anomaly_data])
     y = np.array([0] * len(normal_data) + [1] * len(anomaly_data))
 
@@ -51,29 +129,262 @@ def train_model():
     # Treina modelo baseado em Mahalanobis
     mu = np.mean(X_train[y_train == 0], axis=0)
     cov = np.cov(X_train[y_train == 0].T)
-    inv_cov = np.linalg.inv(cov + 1e-6 * np.eye(cov.shape[0]))
 
-    def mahalanobis(x): return np.sqrt(np.sum((x - mu) @ inv_cov * (x - mu), axis=1))
+    # Mesmo scorer da API: as distâncias (e o limiar) do treino são as da inferência
+    dist_test = MahalanobisScorer(mu, cov).distance(X_test)
+    threshold = np.percentile(dist_test[y_test == 0], 95)
+    return mu, cov, threshold, scaler, dist_test, y_test
+
+def accumulate_stats(blocks, is_train, n_normal, start=0):
+    """Estatísticas parciais (todas as linhas, normais de treino) de um trecho do stream.
 
-    dist_test = mahalanobis(X_test)
+    Cada worker pode processar um trecho diferente a partir de ``start``; os
+    resultados são combinados com ``RunningCovariance.merge``.
+    """
+    all_stats = normal_stats = None
+    for rows in blocks:
+        idx = np.arange(start, start + len(rows))
+        start += len(rows)
+        if all_stats is None:
+            all_stats = RunningCovariance(rows.shape[1])
+            normal_stats = RunningCovariance(rows.shape[1])
+        all_stats.update(rows)
+        normal_stats.update(rows[is_train[idx] & (idx < n_normal)])
+    return all_stats, normal_stats
+
+def fit_streaming(blocks, n_normal, n_anomaly, stats=None):
+    """Mesmo resultado de ``fit_batch`` em memória fixa.
+
+    ``blocks()`` devolve um iterador de blocos de linhas (normais primeiro) e
+    é percorrido duas vezes: estatísticas e, depois, distâncias do conjunto
+    de teste para o limiar. ``stats`` permite passar estatísticas já
+    combinadas de vários workers e pular a primeira passada.
+    """
+    n = n_normal + n_anomaly
+    is_train = split_mask(n)
+    all_stats, normal_stats = stats or accumulate_stats(blocks(), is_train, n_normal)
+
+    # StandardScaler equivalente ao ajustado em todas as linhas
+    scaler = StandardScaler()
+    scaler.n_features_in_ = all_stats.n_features
+    scaler.n_samples_seen_ = all_stats.count
+    scaler.mean_ = all_stats.mean.copy()
+    scaler.var_ = all_stats.variance(ddof=0)
+    scaler.scale_ = np.where(scaler.var_ > 0, np.sqrt(scaler.var_), 1.0)
+
+    # Estatísticas dos dados escalados são uma transformação afim das originais
+    mu = (normal_stats.mean - scaler.mean_) / scaler.scale_
+    cov = normal_stats.covariance(ddof=1) / np.outer(scaler.scale_, scaler.scale_)
+
+    # Segunda passada: só as distâncias do conjunto de teste são guardadas
+    scorer = MahalanobisScorer(mu, cov)
+    dist_test, y_test = [], []
+    start = 0
+    for rows in blocks():
+        idx = np.arange(start, start + len(rows))
+        start += len(rows)
+        test = ~is_train[idx]
+        scaled = (rows[test] - scaler.mean_) / scaler.scale_
+        dist_test.append(scorer.distance(scaled))
+        y_test.append((idx[test] >= n_normal).astype(int))
+    dist_test = np.concatenate(dist_test)
+    y_test = np.concatenate(y_test)
     threshold = np.percentile(dist_test[y_test == 0], 95)
+    return mu, cov, threshold, scaler, dist_test, y_test
 
-    y_pred = (dist_test > threshold).astype(int)
+class DegenerateModelError(ValueError):
+    """O modelo treinado não consegue pontuar (covariância singular ou limiar não finito)"""
 
-    print("\n📊 Classification Report:")
-    print(classification_report(y_test, y_pred, target_names=["Normal", "Anomaly"]))
-    print(f"AUC Score: {roc_auc_score(y_test, dist_test):.4f}")
+def check_model(mu, cov, threshold):
+    """Recusa um modelo que a API carregaria sem nunca acusar anomalia"""
+    if MahalanobisScorer(mu, cov).is_singular:
+        raise DegenerateModelError("Covariância não fatorável (valores não finitos nas features?)")
+    if not np.isfinite(threshold):
+        raise DegenerateModelError(f"Limiar não finito: {threshold}")
+
+def save_confusion_plot(confusion, path):
+    # Backend sem janela: o treino roda em jobs sem display
+    import matplotlib
 
-    cm = confusion_matrix(y_test, y_pred)
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    cm = [[confusion["tn"], confusion["fp"]], [confusion["fn"], confusion["tp"]]]
     sns.heatmap(cm, annot=True, fmt="d", cmap="Blues", xticklabels=["Normal", "Anomaly"], yticklabels=["Normal", "Anomaly"])
     plt.title("Matriz de Confusão")
     plt.xlabel("Predito")
     plt.ylabel("Real")
-    plt.show()
+    plt.savefig(path, bbox_inches="tight")
+    plt.close()
+
+def train_model(
+    streaming=False,
+    workers=None,
+    block_size=4096,
+    calibrate_threshold=False,
+    target_fpr=0.05,
+    folds=0,
+    bootstrap_rounds=0,
+    report_path=REPORT_PATH,
+    plot_path=None,
+    features="means",
+    columns=FEATURE_COLUMNS,
+):
+    print(f"🧠 Iniciando treino (features: {features}, colunas: {', '.join(columns or ['todas'])})")
+    started_at = time.perf_counter()
+    pipeline = build_pipeline(features, len(columns) if columns else 0)
+    source = {"pipeline": pipeline, "columns": columns}
+
+    if streaming:
+        if PACKED_PATH.exists():
+            dataset = open_dataset(PACKED_PATH)
+            n_normal = len(dataset.indices(["normal"]))
+            n_anomaly = len(dataset.indices(["anomaly"]))
+
+            def blocks():
+                yield from packed_blocks(PACKED_PATH, "normal", block_size, **source)
+                yield from packed_blocks(PACKED_PATH, "anomaly", block_size, **source)
+        else:
+            normal_rows = spill_csv_features(NORMAL_PATH, workers, **source)
+            anomaly_rows = spill_csv_features(ANOMALY_PATH, workers, **source)
+            n_normal, n_anomaly = len(normal_rows), len(anomaly_rows)
+
+            def blocks():
+                yield from array_blocks(normal_rows, block_size)
+                yield from array_blocks(anomaly_rows, block_size)
+    elif PACKED_PATH.exists():
+        normal_data = load_packed(PACKED_PATH, "normal", **source)
+        anomaly_data = load_packed(PACKED_PATH, "anomaly", **source)
+        n_normal, n_anomaly = len(normal_data), len(anomaly_data)
+    else:
+        normal_data = load_csv_files(NORMAL_PATH, workers=workers, **source)
+        anomaly_data = load_csv_files(ANOMALY_PATH, workers=workers, **source)
+        n_normal, n_anomaly = len(normal_data), len(anomaly_data)
+
+    print(f"📁 Arquivos válidos: {n_normal} normais, {n_anomaly} anômalos")
+
+    if n_normal < 2 or n_anomaly < 2:
+        print("❌ Dados insuficientes ou com falhas.")
+        return
+
+    if streaming:
+        mu, cov, threshold, scaler, dist_test, y_test = fit_streaming(blocks, n_normal, n_anomaly)
+    else:
+        mu, cov, threshold, scaler, dist_test, y_test = fit_batch(normal_data, anomaly_data)
+
+    # Com todas as colunas o número de eixos só é conhecido depois de ler os dados
+    if not pipeline.axes:
+        pipeline.axes = len(mu) // pipeline.features_per_axis
+    pipeline.set_scaling(scaler.mean_, scaler.scale_)
+    # Curvas ROC/PR e troca limiar x falso alarme num único passe ordenado
+    calibration = calibrate(dist_test, y_test, target_fpr, include_curve=True)
+    method = "percentile_95"
+    if calibrate_threshold:
+        threshold = calibration["threshold"]
+        method = f"fpr<={target_fpr:g}"
+    # Antes de relatório e modelo: um treino degenerado não pode substituir o modelo em produção
+    check_model(mu, cov, threshold)
+
+    y_pred = (dist_test > threshold).astype(int)
+
+    print("\n📊 Classification Report:")
+    print(classification_report(y_test, y_pred, target_names=["Normal", "Anomaly"]))
+    print(f"AUC Score: {calibration['roc_auc']:.4f}  AP: {calibration['average_precision']:.4f}")
+    print(f"Limiar ({method}): {threshold:.4f}")
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "samples": {"normal": n_normal, "anomaly": n_anomaly, "test": len(y_test)},
+        "threshold": float(threshold),
+        "threshold_method": method,
+        "pipeline": pipeline.config(),
+        "classification": classification_report(
+            y_test, y_pred, target_names=["Normal", "Anomaly"], output_dict=True, zero_division=0
+        ),
+        "confusion": {
+            "tn": int(np.sum((y_test == 0) & (y_pred == 0))),
+            "fp": int(np.sum((y_test == 0) & (y_pred == 1))),
+            "fn": int(np.sum((y_test == 1) & (y_pred == 0))),
+            "tp": int(np.sum((y_test == 1) & (y_pred == 1))),
+        },
+        "calibration": calibration,
+    }
+
+    if folds > 1:
+        if streaming:
+            print("⚠️  --folds ignorado no modo --streaming (as features não ficam em memória)")
+        else:
+            report["cross_validation"] = cross_validate(
+                normal_data, anomaly_data, folds, target_fpr, workers=workers
+            )
+            auc = report["cross_validation"]["summary"]["roc_auc"]
+            print(f"🔁 {folds}-fold AUC: {auc['mean']:.4f} ± {auc['std']:.4f}")
+            if report["cross_validation"]["degenerate"]:
+                print(f"⚠️  {report['cross_validation']['degenerate']} fold(s) degenerado(s) fora do resumo")
+    if bootstrap_rounds > 0:
+        report["bootstrap"] = bootstrap(
+            dist_test, y_test, bootstrap_rounds, target_fpr, workers=workers
+        )
+        ci = report["bootstrap"]["summary"]["threshold"]["ci95"]
+        print(f"🎲 Limiar (bootstrap, IC 95%): {ci[0]:.4f} – {ci[1]:.4f}")
+        if report["bootstrap"]["degenerate"]:
+            print(f"⚠️  {report['bootstrap']['degenerate']} reamostragem(ns) degenerada(s) fora do resumo")
+
+    if plot_path:
+        save_confusion_plot(report["confusion"], plot_path)
+        print(f"🖼️  Matriz de confusão salva em {plot_path}")
 
     MODEL_PATH.parent.mkdir(exist_ok=True)
-    np.savez(MODEL_PATH, mu=mu, cov=cov, threshold=threshold, scaler=scaler)
+    # Média e covariância no espaço das features brutas; a escala vai dobrada no fator W gravado
+    mu_raw, cov_raw = pipeline.fold(mu, cov)
+    save_model(MODEL_PATH, mu_raw, cov_raw, threshold, pipeline, metadata={"features": features, "columns": columns})
     print(f"\n✅ Modelo salvo em {MODEL_PATH}")
 
+    report["elapsed_s"] = time.perf_counter() - started_at
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Relatório salvo em {report_path}")
+    return report
+
 if __name__ == "__main__":
-    train_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Treino do modelo de Mahalanobis")
+    parser.add_argument(
+        "--streaming", action="store_true", help="média/covariância incrementais em memória fixa"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="processos para ler os CSVs e avaliar")
+    parser.add_argument(
+        "--calibrate", action="store_true", help="limiar pela curva ROC em vez do percentil 95"
+    )
+    parser.add_argument(
+        "--target-fpr", type=float, default=0.05, help="taxa de falso alarme alvo (padrão: 0.05)"
+    )
+    parser.add_argument("--folds", type=int, default=0, help="avaliação k-fold em paralelo")
+    parser.add_argument("--bootstrap", type=int, default=0, help="reamostragens para IC do limiar")
+    parser.add_argument("--report", default=str(REPORT_PATH), help="relatório JSON do treino")
+    parser.add_argument("--plot", help="salva a matriz de confusão neste PNG")
+    parser.add_argument(
+        "--features", choices=FEATURE_SETS, default="means", help="pipeline de features do modelo"
+    )
+    parser.add_argument(
+        "--columns",
+        default=",".join(FEATURE_COLUMNS),
+        help="colunas usadas, separadas por vírgula, ou 'all' (ex.: CSVs de acelerômetro sem cabeçalho)",
+    )
+    args = parser.parse_args()
+    try:
+        train_model(
+            streaming=args.streaming,
+            workers=args.workers,
+            calibrate_threshold=args.calibrate,
+            target_fpr=args.target_fpr,
+            folds=args.folds,
+            bootstrap_rounds=args.bootstrap,
+            report_path=args.report,
+            plot_path=args.plot,
+            features=args.features,
+            columns=None if args.columns == "all" else args.columns.split(","),
+        )
+    except DegenerateModelError as e:
+        sys.exit(f"❌ Treino abortado, modelo anterior mantido: {e}")
@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Os módulos do serviço ficam em sensor-monitoring/ e são importados sem pacote
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "sensor-monitoring"))
+
+
+MODEL_PATH = Path(__file__).resolve().parent.parent / "sensor-monitoring" / "models" / "mahalanobis_model.npz"
+
+
+class FakeClock:
+    """Relógio controlado pelo teste: ``clock.now`` é o instante atual"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def model_path():
+    """Modelo ``.npz`` distribuído com o serviço"""
+    return str(MODEL_PATH)
+
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def loaded_detector(monkeypatch):
+    import api
+
+    states = api.SensorStateStore()
+    registry = api.ModelRegistry(
+        lambda path: api.AnomalyDetector(path, states=states), default_path=str(MODEL_PATH)
+    )
+    monkeypatch.setattr(api, "registry", registry)
+    return registry.get()
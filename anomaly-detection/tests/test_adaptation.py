@@ -0,0 +1,86 @@
+# Testes da adaptação online do modelo
+import numpy as np
+
+from adaptation import OnlineAdapter
+from api import AnomalyDetector
+from features import extract_features
+from scoring import MahalanobisScorer
+
+
+def make_scorer(n_features=15, seed=0):
+    rng = np.random.default_rng(seed)
+    samples = rng.normal(size=(500, n_features)) @ rng.normal(size=(n_features, n_features))
+    return MahalanobisScorer(samples.mean(axis=0), np.cov(samples.T)), rng
+
+
+def test_rank_one_updates_match_refactorization():
+    scorer, rng = make_scorer()
+    alpha = 0.01
+    mu, cov = scorer.mu.copy(), scorer.cov.copy()
+    for _ in range(300):
+        x = mu + rng.normal(size=15)
+        scorer.update(x, alpha)
+        d = x - mu
+        mu = mu + alpha * d
+        cov = (1 - alpha) * (cov + alpha * np.outer(d, d))
+
+    np.testing.assert_allclose(scorer.mu, mu)
+    np.testing.assert_allclose(scorer.cov, cov)
+    reference = MahalanobisScorer(mu, cov)
+    x = rng.normal(size=(20, 15))
+    np.testing.assert_allclose(scorer.distance(x), reference.distance(x), rtol=1e-4)
+    scorer.refactor()
+    np.testing.assert_allclose(scorer.distance(x), reference.distance(x), rtol=1e-9)
+
+
+def test_guardrails_skip_anomalies_and_freeze_on_drift():
+    scorer, rng = make_scorer()
+    adapter = OnlineAdapter(scorer, threshold=10.0, alpha=0.05, max_drift=1.0)
+    base_mu = scorer.mu.copy()
+
+    assert not adapter.observe(base_mu, 1.0, is_anomaly=True)
+    assert not adapter.observe(base_mu, 9.0, is_anomaly=False)  # acima de margin * threshold
+    np.testing.assert_array_equal(scorer.mu, base_mu)
+    assert adapter.skipped_anomaly == 1 and adapter.skipped_margin == 1
+
+    # Amostras "normais" deslocadas empurram a média até o limite de deriva
+    shifted = base_mu + 3.0 * np.sqrt(np.diag(scorer.cov))
+    updates = 0
+    while adapter.observe(shifted, 1.0, is_anomaly=False):
+        updates += 1
+        assert updates < 1000
+    assert adapter.frozen
+    assert adapter.drift() > 1.0
+    assert not adapter.observe(base_mu, 1.0, is_anomaly=False)
+
+
+def test_snapshot_is_a_loadable_model(tmp_path):
+    rng = np.random.default_rng(2)
+    windows = rng.normal(size=(300, 100, 3))
+    features = extract_features(windows)
+    model_path = tmp_path / "model.npz"
+    # rms e std coincidem sem DC; a diagonal extra mantém a covariância inversível
+    cov = np.cov(features.T) + 1e-3 * np.eye(15)
+    np.savez(model_path, mu=features.mean(axis=0), cov=cov, threshold=50.0)
+
+    now = [0.0]
+    detector = AnomalyDetector(
+        str(model_path),
+        adaptation={
+            "alpha": 0.01,
+            "snapshot_path": str(tmp_path / "snapshots" / "model.adapted.model"),
+            "snapshot_interval": 10.0,
+            "clock": lambda: now[0],
+        },
+    )
+    detector.build_result(*detector.score(windows[0]), "s1")
+    assert detector.adapter.updates == 1
+    assert not (tmp_path / "snapshots").exists()
+
+    now[0] = 11.0
+    detector.build_result(*detector.score(windows[1]), "s1")
+    detector.adapter.wait_snapshot(10)
+    assert detector.adapter.snapshots == 1
+    snapshot = AnomalyDetector(str(tmp_path / "snapshots" / "model.adapted.model"))
+    np.testing.assert_allclose(snapshot.mu, detector.scorer.mu)
+    assert float(snapshot.threshold) == 50.0
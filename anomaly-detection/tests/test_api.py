@@ -1,10 +1,190 @@
 # Testes automatizados para a API
+
+import numpy as np
+import pytest
 from fastapi.testclient import TestClient
+
+import api
 from api import app
+from frames import CONTENT_TYPE as FRAME_CONTENT_TYPE, encode_frame
 
 client = TestClient(app)
 
+
 def test_home():
     response = client.get("/")
     assert response.status_code == 200
     assert response.json() == {"status": "API Running"}
+
+
+def make_window(seed, n_samples=100, scale=0.05):
+    rng = np.random.default_rng(seed)
+    return rng.normal(loc=[0.0, 0.0, 9.8], scale=scale, size=(n_samples, 3)).tolist()
+
+
+def test_predict_batch_matches_single_predictions(loaded_detector, model_path):
+    windows = [make_window(seed) for seed in range(5)]
+    response = client.post(
+        "/predict/batch",
+        json={"windows": [{"data": w, "sensor_id": f"s{i}"} for i, w in enumerate(windows)]},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 5
+    assert [r["sensor_id"] for r in body["results"]] == ["s0", "s1", "s2", "s3", "s4"]
+
+    reference = api.AnomalyDetector(model_path)
+    for window, result in zip(windows, body["results"]):
+        expected = reference.predict(np.array(window))
+        assert result["distance"] == pytest.approx(expected["distance"])
+        assert result["is_anomaly"] == expected["is_anomaly"]
+
+
+def test_predict_batch_reports_invalid_windows(loaded_detector):
+    response = client.post(
+        "/predict/batch",
+        json={"windows": [{"data": make_window(0)}, {"data": [[1.0, 2.0]]}, {"data": make_window(1, 50)}]},
+    )
+    results = response.json()["results"]
+    assert "distance" in results[0] and "distance" in results[2]
+    assert "error" in results[1]
+
+
+def test_predict_accepts_binary_frames(loaded_detector, model_path):
+    window = np.array(make_window(3), dtype=np.float32)
+    response = client.post(
+        "/predict",
+        content=encode_frame(window, sensor_id="bin"),
+        headers={"Content-Type": FRAME_CONTENT_TYPE},
+    )
+    assert response.status_code == 200
+
+    expected = api.AnomalyDetector(model_path).predict(window.astype(np.float64))
+    assert response.json()["distance"] == pytest.approx(expected["distance"])
+
+
+def test_predict_rejects_malformed_payloads(loaded_detector):
+    assert client.post("/predict", json={"sensor_id": "x"}).status_code == 422
+    response = client.post(
+        "/predict", content=b"ACCW\x01", headers={"Content-Type": FRAME_CONTENT_TYPE}
+    )
+    assert response.status_code == 400
+
+
+def test_websocket_stream_emits_sliding_window_verdicts(loaded_detector, model_path):
+    samples = np.array(make_window(4, n_samples=150))
+    reference = api.AnomalyDetector(model_path)
+
+    with client.websocket_connect("/ws/line-1?window=100&hop=25") as ws:
+        ws.send_json({"data": samples[:60].tolist()})
+        ws.send_bytes(encode_frame(samples[60:], sensor_id="line-1", dtype="float32"))
+        verdicts = [ws.receive_json() for _ in range(3)]
+
+    assert [v["sample_count"] for v in verdicts] == [100, 125, 150]
+    streamed = samples.copy()
+    streamed[60:] = streamed[60:].astype(np.float32)
+    expected = reference.predict(streamed[50:150], "line-1")
+    assert verdicts[-1]["distance"] == pytest.approx(expected["distance"])
+
+
+@pytest.mark.parametrize("query", ["window=1000000000", "window=1", "hop=0", "hop=-5", "window=50&hop=51"])
+def test_websocket_rejects_invalid_window_and_hop(loaded_detector, query):
+    from starlette.websockets import WebSocketDisconnect
+
+    with client.websocket_connect(f"/ws/line-3?{query}") as ws:
+        assert "error" in ws.receive_json()
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+    assert exc.value.code == 1008
+
+
+def test_websocket_incremental_mode_matches_full_window(loaded_detector, model_path):
+    samples = np.array(make_window(5, n_samples=130))
+    with client.websocket_connect("/ws/line-2?window=100&hop=30&incremental=true") as ws:
+        ws.send_json({"data": samples.tolist()})
+        verdicts = [ws.receive_json() for _ in range(2)]
+
+    reference = api.AnomalyDetector(model_path)
+    features, distance = reference.score(samples[30:130])
+    assert [v["sample_count"] for v in verdicts] == [100, 130]
+    assert verdicts[-1]["distance"] == pytest.approx(distance, rel=1e-6)
+
+
+def test_metrics_endpoint_counts_predictions(loaded_detector):
+    before = api.PREDICTIONS.value("metrics-test")
+    window = [[0.0, 0.0, 9.8 + 0.01 * (i % 7)] for i in range(100)]
+    client.post("/predict", json={"data": window, "sensor_id": "metrics-test"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert api.PREDICTIONS.value("metrics-test") == before + 1
+    assert 'anomaly_stage_seconds_count{stage="extract_features"}' in response.text
+    assert 'anomaly_requests_total{endpoint="/predict"}' in response.text
+
+
+def test_api_import_has_no_startup_side_effects(model_path):
+    """O import só define a aplicação: modelo, configuração, logging e pools ficam para o lifespan"""
+    import json
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    code = """
+import json, logging, os, sys, threading
+
+opened = []
+def audit(event, args):
+    if event == "open" and isinstance(args[0], str):
+        path = os.path.abspath(args[0])
+        if path.startswith(os.getcwd()) and not path.endswith((".py", ".pyc")):
+            opened.append(path)
+sys.addaudithook(audit)
+
+import api
+print(json.dumps({
+    "opened": opened,
+    "heavy": sorted({m.split(".")[0] for m in sys.modules} & {"scipy", "sklearn", "pandas", "matplotlib", "multiprocessing"}),
+    "handlers": len(logging.getLogger().handlers),
+    "threads": threading.active_count(),
+    "configured": api.registry.configured,
+    "models": len(api.registry.status()),
+    "pool": api.executor._pool is not None,
+}))
+"""
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(model_path).parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(out.stdout.splitlines()[-1])
+    assert result == {
+        "opened": [],  # nenhum modelo nem registry.json lido no import
+        "heavy": [],
+        "handlers": 0,  # logging só é configurado no lifespan
+        "threads": 1,  # sem fila de logs nem pool de predição
+        "configured": False,
+        "models": 0,
+        "pool": False,
+    }
+
+
+def test_lifespan_preloads_and_warms_default_model(loaded_detector, monkeypatch):
+    calls = []
+    monkeypatch.setattr(api, "setup_logging", lambda: None)
+    monkeypatch.setattr(api, "executor", api.PredictionExecutor(mode="inline"))
+    monkeypatch.setattr(loaded_detector, "warm_up", lambda samples: calls.append(samples))
+
+    api.registry.configured = False
+    with TestClient(app) as warm_client:
+        assert api.registry.configured
+        assert calls == [api.STREAM_WINDOW]
+        assert warm_client.get("/").status_code == 200
+    assert loaded_detector.states.get("default").distance_count == 0
+
+
+def test_warm_up_does_not_touch_sensor_state(loaded_detector):
+    assert loaded_detector.warm_up(64) == 64
+    assert len(loaded_detector.states) == 0
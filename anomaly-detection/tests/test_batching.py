@@ -0,0 +1,64 @@
+# Testes do micro-batching de /predict
+import asyncio
+
+import numpy as np
+import pytest
+
+from api import AnomalyDetector
+from batching import MicroBatcher
+
+
+def test_concurrent_calls_are_coalesced_and_finalized_in_order():
+    finalized = []
+
+    async def score(windows, sensor_ids):
+        # Lotes maiores terminam antes, invertendo a ordem de conclusão
+        await asyncio.sleep(0.02 / len(windows))
+        return [w * 10 for w in windows]
+
+    def finalize(scored, sensor_ids):
+        finalized.extend(scored)
+        return scored
+
+    async def main():
+        batcher = MicroBatcher(score, finalize, max_batch_size=8, max_delay=0.01, max_inflight=2)
+        results = await asyncio.gather(*(batcher.submit(i, "s") for i in range(20)))
+        return batcher, results
+
+    batcher, results = asyncio.run(main())
+    assert results == [i * 10 for i in range(20)]
+    assert finalized == [i * 10 for i in range(20)]
+    assert batcher.stats()["batches"] < 20
+    assert batcher.stats()["max_batch_seen"] <= 8
+
+
+def test_errors_are_propagated_to_every_caller():
+    async def score(windows, sensor_ids):
+        raise RuntimeError("falha")
+
+    async def main():
+        batcher = MicroBatcher(score, lambda scored, ids: scored, max_delay=0.001)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main()))
+
+
+def test_batched_predictions_match_sequential_predictions(model_path):
+    batched = AnomalyDetector(model_path)
+    sequential = AnomalyDetector(model_path)
+    rng = np.random.default_rng(0)
+    windows = [rng.normal(size=(100, 3)) for _ in range(12)]
+    sensor_ids = [f"s{i % 3}" for i in range(12)]
+
+    async def score(batch, sensor_ids):
+        return batched.score_batch(batch)
+
+    async def main():
+        batcher = MicroBatcher(score, batched.build_results, max_batch_size=5, max_delay=0.001)
+        return await asyncio.gather(*(batcher.submit(w, s) for w, s in zip(windows, sensor_ids)))
+
+    for result, window, sensor_id in zip(asyncio.run(main()), windows, sensor_ids):
+        expected = sequential.predict(window, sensor_id)
+        assert result["distance"] == pytest.approx(expected["distance"])
+        assert result["confidence"] == pytest.approx(expected["confidence"])
+        assert result["is_anomaly"] == expected["is_anomaly"]
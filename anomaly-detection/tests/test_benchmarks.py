@@ -0,0 +1,33 @@
+# Testes da suíte de benchmarks (benchmarks/bench.py)
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+import bench  # noqa: E402
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = {"results": {"a": {"median_us": 100.0}, "b": {"median_us": 100.0}}}
+    current = {
+        "results": {
+            "a": {"median_us": 120.0},
+            "b": {"median_us": 140.0},
+            "new": {"median_us": 1.0},
+        }
+    }
+    regressions = bench.compare(current, baseline, tolerance=0.25)
+    assert [item["name"] for item in regressions] == ["b"]
+    assert regressions[0]["ratio"] == 1.4
+
+
+def test_micro_benchmarks_cover_detector_stages():
+    results = bench.micro_benchmarks(repeat=2, window_sizes=(50,), batch_sizes=(4,))
+    assert {
+        "extract_features/window=50",
+        "predict/window=50",
+        "mahalanobis_distance/single",
+        "calculate_confidence",
+        "predict_batch/batch=4/window=100",
+    } <= set(results)
+    assert all(result["median_us"] > 0 for result in results.values())
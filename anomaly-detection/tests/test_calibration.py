@@ -0,0 +1,126 @@
+# Testes da calibração de limiar e da avaliação paralela
+import json
+
+import numpy as np
+import pytest
+from sklearn.metrics import average_precision_score, roc_auc_score
+
+import training
+from calibration import bootstrap, calibrate, cross_validate, threshold_curve
+from model_format import load_model
+
+
+def scored(n=2000, seed=0, ties=False):
+    rng = np.random.default_rng(seed)
+    labels = rng.random(n) < 0.2
+    distances = rng.gamma(2.0, 1.0, n) + labels * rng.gamma(2.0, 1.5, n)
+    if ties:
+        distances = np.round(distances, 1)
+    return distances, labels
+
+
+@pytest.mark.parametrize("ties", [False, True])
+def test_curve_metrics_match_sklearn(ties):
+    distances, labels = scored(ties=ties)
+    report = calibrate(distances, labels)
+    assert report["roc_auc"] == pytest.approx(roc_auc_score(labels, distances))
+    assert report["average_precision"] == pytest.approx(average_precision_score(labels, distances))
+
+
+def test_threshold_respects_target_fpr_and_counts_agree():
+    distances, labels = scored()
+    report = calibrate(distances, labels, target_fpr=0.05)
+    threshold = report["threshold"]
+    predicted = distances > threshold
+
+    fpr = np.sum(predicted & ~labels) / np.sum(~labels)
+    assert fpr <= 0.05
+    assert fpr == pytest.approx(report["at_threshold"]["fpr"])
+    assert report["at_threshold"]["confusion"]["tp"] == np.sum(predicted & labels)
+    # O próximo limiar abaixo já passaria do alvo
+    curve = threshold_curve(distances, labels)
+    lower = curve["thresholds"][curve["thresholds"] < threshold][0]
+    assert np.sum((distances > lower) & ~labels) / np.sum(~labels) > 0.05
+
+    tradeoff = report["tradeoff"]
+    assert [row["tpr"] for row in tradeoff] == sorted(row["tpr"] for row in tradeoff)
+
+
+def test_parallel_evaluation_is_deterministic():
+    rng = np.random.default_rng(1)
+    normal = rng.normal(size=(400, 3))
+    anomaly = rng.normal(loc=2.0, size=(100, 3))
+    inline = cross_validate(normal, anomaly, folds=4, workers=1)
+    pooled = cross_validate(normal, anomaly, folds=4, workers=2)
+    assert inline["summary"] == pooled["summary"]
+    assert inline["summary"]["roc_auc"]["mean"] > 0.9
+
+    distances, labels = scored(500)
+    assert bootstrap(distances, labels, 60, workers=1) == bootstrap(distances, labels, 60, workers=2)
+
+
+
+@pytest.mark.parametrize(
+    "n_normal, n_anomaly, folds",
+    [(400, 3, 4), (7, 100, 4), (400, 100, 1)],
+)
+def test_cross_validate_rejects_empty_folds(n_normal, n_anomaly, folds):
+    rng = np.random.default_rng(2)
+    with pytest.raises(ValueError, match="folds"):
+        cross_validate(rng.normal(size=(n_normal, 3)), rng.normal(size=(n_anomaly, 3)), folds=folds)
+
+def test_train_model_writes_report_without_display(tmp_path, monkeypatch):
+    rng = np.random.default_rng(2)
+    monkeypatch.setattr(training, "load_csv_files", lambda path, workers=None, **kwargs: rng.normal(
+        loc=0.0 if path == training.NORMAL_PATH else 3.0, size=(60, 3)
+    ))
+    monkeypatch.setattr(training, "PACKED_PATH", tmp_path / "missing.packed")
+    monkeypatch.setattr(training, "MODEL_PATH", tmp_path / "model.npz")
+
+    report_path = tmp_path / "report.json"
+    training.train_model(
+        calibrate_threshold=True, folds=3, bootstrap_rounds=10, workers=1,
+        report_path=report_path, plot_path=tmp_path / "cm.png",
+    )
+
+    report = json.loads(report_path.read_text())
+    assert report["threshold_method"] == "fpr<=0.05"
+    assert report["threshold"] == report["calibration"]["threshold"]
+    assert report["cross_validation"]["folds"] == 3
+    assert (tmp_path / "cm.png").exists()
+    assert load_model(tmp_path / "model.npz").threshold == report["threshold"]
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")  # percentil de distâncias infinitas
+def test_degenerate_training_keeps_deployed_model(tmp_path, monkeypatch):
+    def load(path, workers=None, **kwargs):
+        rows = np.random.default_rng(3).normal(size=(60, 3))
+        rows[::7, 1] = np.nan  # leitura com falha: a covariância não é fatorável
+        return rows
+
+    monkeypatch.setattr(training, "load_csv_files", load)
+    monkeypatch.setattr(training, "PACKED_PATH", tmp_path / "missing.packed")
+    monkeypatch.setattr(training, "MODEL_PATH", tmp_path / "model.model")
+    (tmp_path / "model.model").write_bytes(b"deployed")
+
+    with pytest.raises(training.DegenerateModelError):
+        training.train_model(workers=1, report_path=tmp_path / "report.json")
+    assert (tmp_path / "model.model").read_bytes() == b"deployed"
+    assert not (tmp_path / "report.json").exists()
+
+
+def test_degenerate_runs_are_counted_not_averaged():
+    rng = np.random.default_rng(4)
+    normal = rng.normal(size=(40, 3))
+    anomaly = rng.normal(loc=3.0, size=(20, 3))
+    anomaly[0] = np.nan  # só o fold que avalia esta linha fica degenerado
+    result = cross_validate(normal, anomaly, folds=4, workers=1)
+    assert result["degenerate"] == 1
+    assert [run.get("degenerate") for run in result["runs"]].count("distâncias não finitas") == 1
+    assert np.isfinite(result["summary"]["roc_auc"]["mean"])
+    assert result["summary"]["roc_auc"]["mean"] > 0.9
+
+    distances, labels = scored(200)
+    distances[:150] = np.inf
+    with pytest.raises(ValueError, match="degenerad"):
+        bootstrap(distances, labels, 10, workers=1)
@@ -0,0 +1,83 @@
+# Testes do dataset compactado e mapeado em memória
+import numpy as np
+import pytest
+
+from dataset import LoadReport, convert, iter_capture_features, open_dataset
+
+
+def write_captures(root, op, captures, header=None):
+    directory = root / op
+    directory.mkdir(parents=True)
+    for i, capture in enumerate(captures):
+        np.savetxt(
+            directory / f"capture_{i:03d}.csv",
+            capture,
+            delimiter=",",
+            fmt="%.6f",
+            header=",".join(header) if header else "",
+            comments="",
+        )
+
+
+def test_convert_and_zero_copy_windows(tmp_path):
+    rng = np.random.default_rng(0)
+    normal = [rng.normal(size=(200, 3)) for _ in range(4)]
+    anomaly = [rng.normal(loc=1.0, size=(200, 3)) for _ in range(3)]
+    write_captures(tmp_path / "ac", "silent_0_baseline", normal)
+    write_captures(tmp_path / "ac", "high_0", anomaly)
+
+    convert(tmp_path / "ac", tmp_path / "packed")
+    dataset = open_dataset(tmp_path / "packed")
+
+    assert len(dataset) == 7
+    assert dataset.operations == ["high_0", "silent_0_baseline"]
+    assert dataset.normal_operations == ["silent_0_baseline"]
+    assert dataset.is_anomaly.tolist() == [True] * 3 + [False] * 4
+
+    windows = dataset.windows(["silent_0_baseline"])
+    assert windows.shape == (4, 200, 3)
+    np.testing.assert_allclose(windows, np.stack(normal), atol=1e-6)
+
+    capture = dataset[0]
+    assert not capture.flags.owndata and not capture.flags.writeable
+    np.testing.assert_allclose(capture, anomaly[0], atol=1e-6)
+
+
+def test_headers_and_ragged_captures(tmp_path):
+    columns = ["temperatura", "vibracao", "energia"]
+    captures = [np.full((n, 3), float(n)) for n in (5, 8)]
+    write_captures(tmp_path / "data", "normal", captures, header=columns)
+
+    dataset = convert(tmp_path / "data", tmp_path / "packed")
+    assert dataset.columns == columns
+    assert dataset.lengths.tolist() == [5, 8]
+    np.testing.assert_allclose(dataset.column_means(["energia"]).ravel(), [5.0, 8.0])
+    with pytest.raises(ValueError):
+        dataset.windows()
+
+
+def test_parallel_features_stream_in_order_with_failures(tmp_path):
+    columns = ["temperatura", "vibracao", "energia"]
+    files = []
+    for i in range(10):
+        path = tmp_path / f"capture_{i}.csv"
+        header = ",".join(columns)
+        np.savetxt(path, np.full((4, 3), float(i)), delimiter=",", header=header, comments="")
+        files.append(path)
+    (tmp_path / "capture_3.csv").write_text("a,b,c\n1,2,3\n")
+    (tmp_path / "capture_5.csv").write_text("temperatura,vibracao,energia\n1,2\n3\n")
+    (tmp_path / "capture_7.csv").write_text("temperatura,vibracao,energia\n")
+    files.append(tmp_path / "missing.csv")
+
+    report = LoadReport()
+    rows = list(iter_capture_features(files, columns, workers=2, chunksize=2, report=report))
+
+    assert [path.name for path, _ in rows] == [f"capture_{i}.csv" for i in (0, 1, 2, 4, 6, 8, 9)]
+    np.testing.assert_allclose(rows[3][1], [4.0, 4.0, 4.0])
+    assert report.loaded == 7
+    assert report.reasons() == {
+        "missing_columns": 1,
+        "parse_error": 1,
+        "empty": 1,
+        "io_error": 1,
+    }
@@ -0,0 +1,44 @@
+# Testes do executor de predições (inline, threads e processos)
+import asyncio
+
+import numpy as np
+import pytest
+
+from api import AnomalyDetector
+from executor import ExecutorBusyError, PredictionExecutor
+
+
+@pytest.mark.parametrize("mode", ["inline", "thread", "process"])
+def test_modes_return_same_scores(mode, model_path):
+    detector = AnomalyDetector(model_path)
+    executor = PredictionExecutor(mode=mode, max_workers=2, model_path=model_path)
+    window = np.random.default_rng(0).normal(size=(100, 3))
+
+    try:
+        features, distance = asyncio.run(executor.run(detector, "score", window))
+    finally:
+        executor.shutdown()
+
+    expected_features, expected_distance = detector.score(window)
+    np.testing.assert_allclose(features, expected_features)
+    assert distance == pytest.approx(expected_distance)
+    assert executor.stats()["completed"] == 1
+
+
+def test_rejects_when_queue_is_full(model_path):
+    detector = AnomalyDetector(model_path)
+    executor = PredictionExecutor(mode="thread", max_workers=1, max_queue=0)
+    window = np.random.default_rng(0).normal(size=(100, 3))
+
+    async def burst():
+        return await asyncio.gather(
+            *(executor.run(detector, "score", window) for _ in range(3)), return_exceptions=True
+        )
+
+    try:
+        results = asyncio.run(burst())
+    finally:
+        executor.shutdown()
+
+    assert sum(isinstance(r, ExecutorBusyError) for r in results) == 2
+    assert executor.stats()["rejected"] == 2
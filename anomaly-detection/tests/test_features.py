@@ -0,0 +1,53 @@
+# Testes do extrator vetorizado de features
+import numpy as np
+from scipy import stats as scipy_stats
+from features import extract_features, feature_stats
+
+
+def legacy_features(sample):
+    features = []
+    for axis_idx in range(sample.shape[1]):
+        axis_data = sample[:, axis_idx]
+        features.extend(
+            [
+                np.std(axis_data),
+                scipy_stats.kurtosis(axis_data),
+                np.max(np.abs(axis_data)),
+                np.sqrt(np.mean(np.square(axis_data))),
+                np.max(axis_data) - np.min(axis_data),
+            ]
+        )
+    return np.array(features)
+
+
+def test_single_window_matches_legacy_loop():
+    rng = np.random.default_rng(0)
+    window = rng.normal(loc=[0.1, -0.3, 9.8], scale=0.2, size=(100, 3))
+
+    expected = legacy_features(window - np.mean(window, axis=0))
+    np.testing.assert_allclose(extract_features(window), expected, rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(
+        extract_features(window, remove_dc=False), legacy_features(window), rtol=1e-10
+    )
+
+
+def test_batch_matches_single_windows():
+    rng = np.random.default_rng(1)
+    windows = rng.normal(size=(8, 64, 3))
+
+    batch = extract_features(windows)
+    assert batch.shape == (8, 15)
+    for i, window in enumerate(windows):
+        np.testing.assert_allclose(batch[i], extract_features(window), rtol=1e-12)
+
+
+def test_feature_stats_layout():
+    stats = feature_stats(np.arange(15.0))
+    assert list(stats) == ["axis_0", "axis_1", "axis_2"]
+    assert stats["axis_1"] == {
+        "std": 5.0,
+        "kurtosis": 6.0,
+        "peak_amplitude": 7.0,
+        "rms": 8.0,
+        "peak_to_peak": 9.0,
+    }
@@ -0,0 +1,35 @@
+# Testes do formato binário de janelas
+import numpy as np
+import pytest
+
+from frames import FrameError, decode_frame, decode_frames, encode_frame
+
+
+def test_float32_roundtrip_is_zero_copy():
+    window = np.random.default_rng(0).normal(size=(100, 3))
+    body = encode_frame(window, sensor_id="motor-7", sample_rate=200.0)
+
+    frame, end = decode_frame(body)
+    assert end == len(body)
+    assert frame.sensor_id == "motor-7"
+    assert frame.sample_rate == 200.0
+    assert frame.data.shape == (100, 3)
+    assert not frame.data.flags.owndata
+    np.testing.assert_allclose(frame.data, window.astype(np.float32))
+
+
+def test_int16_frames_are_rescaled():
+    window = np.random.default_rng(1).normal(scale=2.0, size=(50, 3))
+    frame, _ = decode_frame(encode_frame(window, dtype="int16", scale=1 / 4096))
+    np.testing.assert_allclose(frame.data, window, atol=1 / 8192)
+
+
+def test_concatenated_frames_and_truncation():
+    window = np.ones((10, 3))
+    body = encode_frame(window, "a") + encode_frame(window, "sensor-b")
+    assert [f.sensor_id for f in decode_frames(body)] == ["a", "sensor-b"]
+
+    with pytest.raises(FrameError):
+        decode_frames(body[:-4])
+    with pytest.raises(FrameError):
+        decode_frame(b"XXXX" + body[4:])
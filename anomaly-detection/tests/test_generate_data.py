@@ -0,0 +1,43 @@
+# Testes do gerador de dados sintéticos
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "sensor-monitoring" / "data"))
+
+from dataset import open_dataset  # noqa: E402
+from features import extract_features  # noqa: E402
+from generate_data import generate  # noqa: E402
+
+
+def test_packed_output_independent_of_workers(tmp_path):
+    kwargs = dict(kind="accel", windows=60, anomaly_fraction=0.25, fmt="packed", chunk_size=16)
+    assert generate(tmp_path / "a", workers=1, **kwargs) == 60
+    assert generate(tmp_path / "b", workers=2, **kwargs) == 60
+
+    a = open_dataset(tmp_path / "a")
+    b = open_dataset(tmp_path / "b")
+    assert len(a) == 60
+    assert a.operations == ["normal", "anomaly"]
+    assert int(a.is_anomaly.sum()) == 15
+    np.testing.assert_array_equal(a.windows(), b.windows())
+
+
+def test_anomalies_have_more_vibration(tmp_path):
+    generate(tmp_path, kind="accel", windows=200, anomaly_fraction=0.5, fmt="npz", workers=1)
+    normal = np.load(tmp_path / "normal" / "chunk_00000.npz")["windows"]
+    anomaly = np.load(tmp_path / "anomaly" / "chunk_00000.npz")["windows"]
+    assert normal.shape == anomaly.shape == (100, 100, 3)
+    assert abs(normal[..., 2].mean() - 9.8) < 0.1
+
+    # RMS do eixo X (índice 0) separa as classes com folga
+    assert np.median(extract_features(anomaly)[:, 0]) > 2 * np.median(extract_features(normal)[:, 0])
+
+
+def test_tabular_csv_keeps_legacy_layout(tmp_path):
+    generate(tmp_path, kind="tabular", windows=4, anomaly_fraction=0.5, samples=50, fmt="csv")
+    files = sorted(p.name for p in (tmp_path / "normal").iterdir())
+    assert files == ["normal_1.csv", "normal_2.csv"]
+    header = (tmp_path / "anomaly" / "anomaly_1.csv").read_text().splitlines()[0]
+    assert header == "temperatura,vibracao,energia"
@@ -0,0 +1,57 @@
+# Testes do logging estruturado, amostrado e em fila
+import json
+import logging
+import queue
+
+import numpy as np
+
+import api
+from log_config import DroppingQueueHandler, JsonFormatter, SensorLogSampler
+
+
+def make_record(msg, *args, fields=None):
+    record = logging.LogRecord("api", logging.INFO, __file__, 1, msg, args, None)
+    if fields is not None:
+        record.fields = fields
+    return record
+
+
+def test_json_records_are_single_line_with_fields():
+    line = JsonFormatter().format(make_record("a\nb %d", 3, fields={"sensor_id": "s1", "x": 1.5}))
+    assert "\n" not in line
+    entry = json.loads(line)
+    assert entry["msg"] == "a\nb 3"
+    assert entry["sensor_id"] == "s1" and entry["x"] == 1.5
+
+
+def test_sampler_rate_limits_each_sensor_independently():
+    now = [0.0]
+    sampler = SensorLogSampler(rate=1.0, burst=2, clock=lambda: now[0])
+    assert [sampler.allow("a") for _ in range(4)] == [True, True, False, False]
+    assert sampler.allow("b")
+    now[0] = 1.0
+    assert sampler.allow("a") and not sampler.allow("a")
+    assert sampler.suppressed == 3
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for i in range(5):
+        handler.handle(make_record("msg %d", i))
+    assert handler.dropped == 3
+    assert handler.queue.get_nowait().msg == "msg 0"
+
+
+def test_anomalies_bypass_sampling(loaded_detector, monkeypatch, caplog):
+    monkeypatch.setattr(api, "log_sampler", SensorLogSampler(rate=0))
+    features = np.zeros(loaded_detector.scorer.n_features)
+    with caplog.at_level(logging.INFO, logger="api"):
+        loaded_detector.build_result(features, 1.0, "quiet")
+        for _ in range(3):
+            loaded_detector.build_result(features, 1e6, "loud")
+
+    records = [r for r in caplog.records if r.name == "api"]
+    assert all(r.fields["sensor_id"] == "loud" for r in records)
+    anomalies = [r for r in records if r.fields["event"] == "anomaly"]
+    assert len(anomalies) == 2  # debounce: a primeira janela ainda não confirma
+    assert "feature_values" in anomalies[0].fields
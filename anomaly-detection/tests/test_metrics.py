@@ -0,0 +1,47 @@
+# Testes das métricas no formato Prometheus
+from metrics import MetricsRegistry
+
+
+def test_histogram_and_counter_rendering():
+    registry = MetricsRegistry()
+    latency = registry.histogram("stage_seconds", "Latência", ["stage"], buckets=(0.01, 0.1))
+    counter = registry.counter("events", "Eventos", ["sensor"], max_series=2)
+
+    latency.observe(0.005, "decode")
+    latency.observe(0.05, "decode")
+    latency.observe(5.0, "decode")
+    for sensor in ["a", "b", "c", 'd"e']:
+        counter.inc(sensor)
+
+    text = registry.render()
+    assert '# TYPE stage_seconds histogram' in text
+    assert 'stage_seconds_bucket{stage="decode",le="0.01"} 1' in text
+    assert 'stage_seconds_bucket{stage="decode",le="0.1"} 2' in text
+    assert 'stage_seconds_bucket{stage="decode",le="+Inf"} 3' in text
+    assert 'stage_seconds_count{stage="decode"} 3' in text
+    # Metadados com o mesmo nome das amostras, senão o Prometheus lê o contador como untyped
+    assert "# HELP events_total Eventos" in text.splitlines()
+    assert "# TYPE events_total counter" in text.splitlines()
+    # Cardinalidade limitada: sensores além de max_series caem em "_other"
+    assert 'events_total{sensor="a"} 1' in text
+    assert 'events_total{sensor="_other"} 2' in text
+
+
+def test_disabled_timers_record_nothing():
+    registry = MetricsRegistry(enabled=False)
+    latency = registry.histogram("stage_seconds", "Latência", ["stage"])
+    with latency.time("decode"):
+        pass
+    assert "stage_seconds_count" not in registry.render()
+
+
+
+def test_counter_func_renders_as_counter():
+    registry = MetricsRegistry()
+    total = [3]
+    registry.counter_func("log_suppressed", "Suprimidos", lambda: total[0])
+    assert registry.render().splitlines() == [
+        "# HELP log_suppressed_total Suprimidos",
+        "# TYPE log_suppressed_total counter",
+        "log_suppressed_total 3",
+    ]
@@ -0,0 +1,59 @@
+# Testes do formato binário do modelo
+import numpy as np
+import pytest
+
+import api
+from model_format import ALIGNMENT, ModelFormatError, convert, load_model, save_model
+from pipeline import FeaturePipeline
+from scoring import MahalanobisScorer
+
+
+def test_converted_model_scores_like_npz(tmp_path, model_path):
+    path = convert(model_path, tmp_path / "model.model")
+    binary, legacy = load_model(path), load_model(model_path)
+
+    assert not binary.mu.flags.writeable and not binary.cov.flags.writeable
+    assert binary.threshold == legacy.threshold
+    for spec in binary.header["arrays"].values():
+        assert spec["offset"] % ALIGNMENT == 0
+
+    x = np.random.default_rng(0).normal(size=(20, 15))
+    np.testing.assert_allclose(binary.scorer().distance(x), legacy.scorer().distance(x), rtol=1e-12)
+
+    window = np.random.default_rng(1).normal(loc=[0.0, 0.0, 9.8], scale=0.05, size=(100, 3))
+    a = api.AnomalyDetector(str(path), states=api.SensorStateStore()).predict(window)
+    b = api.AnomalyDetector(model_path, states=api.SensorStateStore()).predict(window)
+    assert a["distance"] == pytest.approx(b["distance"], rel=1e-12)
+
+
+def test_scaled_pipeline_round_trip_and_adaptation(tmp_path):
+    rng = np.random.default_rng(2)
+    rows = rng.normal(size=(200, 3)) * [1.0, 100.0, 0.01]
+    pipeline = FeaturePipeline(axes=3, stats=["mean"], scale_mean=rows.mean(0), scale_std=rows.std(0))
+    mu, cov = rows.mean(0), np.cov(rows, rowvar=False)
+    save_model(tmp_path / "m.model", mu, cov, 3.5, pipeline, metadata={"source": "test"})
+
+    model = load_model(tmp_path / "m.model")
+    assert model.header["metadata"] == {"source": "test"}
+    np.testing.assert_array_equal(model.pipeline.scale_std, pipeline.scale_std)
+    scorer = model.scorer()
+    reference = MahalanobisScorer(mu, cov, scale=pipeline.scale_std)
+    np.testing.assert_allclose(scorer.distance(rows), reference.distance(rows), rtol=1e-12)
+    assert scorer.diagnostics()["rank"] == 3
+
+    # Arrays mapeados são somente leitura; a atualização online cria arrays novos
+    assert scorer.update(rows[0], 0.01)
+    reference.update(rows[0], 0.01)
+    np.testing.assert_allclose(scorer.distance(rows), reference.distance(rows), rtol=1e-10)
+
+
+def test_rejects_corrupt_files(tmp_path, model_path):
+    path = convert(model_path, tmp_path / "model.model")
+    data = path.read_bytes()
+    (tmp_path / "short.model").write_bytes(data[:-600])
+    with pytest.raises(ModelFormatError):
+        load_model(tmp_path / "short.model")
+
+    (tmp_path / "future.model").write_bytes(data.replace(b'"format_version": 1', b'"format_version": 9'))
+    with pytest.raises(ModelFormatError):
+        load_model(tmp_path / "future.model")
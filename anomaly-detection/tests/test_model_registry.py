@@ -0,0 +1,142 @@
+# Testes do registro de modelos com recarga a quente
+import json
+import os
+
+import numpy as np
+import pytest
+
+from api import AnomalyDetector
+from model_registry import ModelRegistry
+
+@pytest.fixture
+def write_model(model_path):
+    base = np.load(model_path)
+
+    def write(path, threshold, mtime):
+        np.savez(path, mu=base["mu"], cov=base["cov"], threshold=threshold)
+        os.utime(path, ns=(mtime, mtime))
+
+    return write
+
+
+def test_reloads_model_when_file_changes(tmp_path, write_model, fake_clock):
+    path = tmp_path / "model.npz"
+    write_model(path, 5.0, 1_000_000_000)
+    clock = fake_clock
+    registry = ModelRegistry(AnomalyDetector, default_path=str(path), check_interval=5.0, clock=clock)
+
+    first = registry.get("s1")
+    assert first.threshold == 5.0
+
+    write_model(path, 9.0, 2_000_000_000)
+    assert registry.get("s1") is first  # ainda dentro do intervalo de verificação
+
+    clock.now = 10.0
+    second = registry.get("s1")
+    assert second is not first and second.threshold == 9.0
+    assert first.threshold == 5.0  # quem já tinha a referência antiga não é afetado
+
+
+def test_missing_model_is_picked_up_without_restart(tmp_path, write_model, fake_clock):
+    path = tmp_path / "model.npz"
+    clock = fake_clock
+    registry = ModelRegistry(AnomalyDetector, default_path=str(path), clock=clock)
+    assert registry.get() is None
+
+    write_model(path, 7.0, 1_000_000_000)
+    clock.now = 10.0
+    assert registry.get().threshold == 7.0
+
+    path.unlink()
+    clock.now = 20.0
+    assert registry.get().threshold == 7.0
+
+
+
+def test_reload_does_not_block_other_requests(tmp_path, write_model, fake_clock):
+    import threading
+
+    paths = {name: tmp_path / f"{name}.npz" for name in ("a", "b")}
+    for path in paths.values():
+        write_model(path, 5.0, 1_000_000_000)
+    config = tmp_path / "registry.json"
+    config.write_text(json.dumps({"models": {k: str(v) for k, v in paths.items()}, "sensors": {"sa": "a", "sb": "b"}}))
+
+    slow = threading.Event()
+    started = threading.Event()
+    release = threading.Event()
+
+    def factory(path):
+        if slow.is_set() and path == str(paths["a"]):
+            started.set()
+            release.wait(10)
+        return AnomalyDetector(path)
+
+    clock = fake_clock
+    registry = ModelRegistry(factory, config_path=str(config), check_interval=5.0, clock=clock)
+    old_a, old_b = registry.get("sa"), registry.get("sb")
+    slow.set()
+
+    write_model(paths["a"], 9.0, 2_000_000_000)
+    clock.now = 10.0
+    reloader = threading.Thread(target=registry.get, args=("sa",))
+    reloader.start()
+    assert started.wait(10)
+    try:
+        # Durante a carga lenta de "a": "b" responde e "a" segue com o detector antigo
+        assert registry.get("sb") is old_b
+        assert registry.get("sa") is old_a
+    finally:
+        release.set()
+        reloader.join()
+    assert registry.get("sa").threshold == 9.0
+
+def test_sensor_groups_and_lru_bound(tmp_path, write_model):
+    for i, name in enumerate(["default", "a", "b"]):
+        write_model(tmp_path / f"{name}.npz", float(i + 2), 1_000_000_000)
+    config = tmp_path / "registry.json"
+    config.write_text(
+        json.dumps(
+            {
+                "default": str(tmp_path / "default.npz"),
+                "models": {"a": str(tmp_path / "a.npz"), "b": str(tmp_path / "b.npz")},
+                "sensors": {"sa": "a", "sb": "b"},
+            }
+        )
+    )
+    registry = ModelRegistry(AnomalyDetector, config_path=str(config), max_models=2)
+
+    assert registry.get("sa").threshold == 3.0
+    assert registry.get("sb").threshold == 4.0
+    assert registry.get("other").threshold == 2.0
+    assert list(registry.status()) == ["b", "default"]
+
+
+def test_admin_reload_endpoint(tmp_path, monkeypatch, write_model):
+    from fastapi.testclient import TestClient
+
+    import api
+
+    path = tmp_path / "model.npz"
+    write_model(path, 5.0, 1_000_000_000)
+    registry = ModelRegistry(AnomalyDetector, default_path=str(path), check_interval=3600)
+    monkeypatch.setattr(api, "registry", registry)
+    client = TestClient(api.app)
+
+    assert registry.get().threshold == 5.0
+    write_model(path, 6.0, 1_000_000_000)  # mesmo mtime: só a recarga manual percebe
+    assert client.post("/admin/models/reload").json()["reloaded"] == {"default": True}
+    assert client.get("/admin/models").json()["models"]["default"]["threshold"] == 6.0
+
+
+def test_cached_never_touches_disk(tmp_path, write_model, fake_clock):
+    path = tmp_path / "model.npz"
+    write_model(path, 5.0, 1_000_000_000)
+    registry = ModelRegistry(AnomalyDetector, default_path=str(path), clock=fake_clock, lazy=True)
+    assert registry.cached("s1") == (False, None)  # nem a configuração foi lida
+
+    detector = registry.get("s1")
+    assert registry.cached("s1") == (True, detector)
+    path.unlink()
+    fake_clock.now = 10.0
+    assert registry.cached("s1") == (False, None)  # intervalo vencido: cabe ao get conferir
@@ -0,0 +1,94 @@
+# Testes do pipeline de features compartilhado entre treino e API
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import api
+import training
+from features import FEATURE_NAMES
+from model_format import load_model, save_model
+from pipeline import FeaturePipeline
+from scoring import MahalanobisScorer
+from spectral import SpectralFeatures
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "sensor-monitoring" / "data"))
+from generate_data import generate  # noqa: E402
+
+
+def test_folded_scaling_matches_scaled_space_distances():
+    rng = np.random.default_rng(0)
+    raw = rng.normal(size=(500, 4)) * [1e-3, 1.0, 50.0, 1e3] + [0.0, 5.0, -20.0, 1e4]
+    mean, std = raw.mean(axis=0), raw.std(axis=0)
+    scaled = (raw - mean) / std
+    mu, cov = scaled[:300].mean(axis=0), np.cov(scaled[:300], rowvar=False)
+
+    pipeline = FeaturePipeline(axes=4, stats=["mean"], scale_mean=mean, scale_std=std)
+    mu_raw, cov_raw = pipeline.fold(mu, cov)
+    folded = MahalanobisScorer(mu_raw, cov_raw, scale=std)
+    np.testing.assert_allclose(
+        folded.distance(raw[300:]), MahalanobisScorer(mu, cov).distance(scaled[300:]), rtol=1e-9
+    )
+
+
+def test_config_round_trip_and_single_batch_paths(tmp_path):
+    pipeline = FeaturePipeline(axes=3, stats=["mean", "std", "kurtosis"], spectral=SpectralFeatures())
+    n = pipeline.n_features
+    pipeline.set_scaling(np.arange(1.0, n + 1.0), np.full(n, 2.0))
+    save_model(tmp_path / "m.model", np.zeros(n), np.eye(n), 10.0, pipeline)
+
+    loaded = load_model(tmp_path / "m.model").pipeline
+    assert loaded.config() == pipeline.config()
+    np.testing.assert_array_equal(loaded.scale_std, pipeline.scale_std)
+
+    windows = np.random.default_rng(1).normal(size=(5, 100, 3))
+    batch = loaded.transform(windows)
+    assert batch.shape == (5, pipeline.n_features)
+    np.testing.assert_allclose(loaded.transform(windows[2]), batch[2])
+    np.testing.assert_allclose(batch[:, 0], windows[:, :, 0].mean(axis=1))
+    assert set(loaded.feature_stats(batch[0])["axis_2"]) == {"mean", "std", "kurtosis", "band_low",
+                                                           "band_imbalance", "band_bearing", "band_high"}
+
+
+def test_legacy_model_uses_default_pipeline(model_path):
+    pipeline = FeaturePipeline.from_model(np.load(model_path))
+    assert pipeline.stats == FEATURE_NAMES and pipeline.axes == 3 and pipeline.streamable
+
+
+def test_trained_model_scores_the_same_in_the_api(tmp_path, monkeypatch):
+    generate(tmp_path / "data", kind="accel", windows=400, anomaly_fraction=0.25, fmt="npz", workers=1)
+    normal = np.load(tmp_path / "data" / "normal" / "chunk_00000.npz")["windows"]
+    anomaly = np.load(tmp_path / "data" / "anomaly" / "chunk_00000.npz")["windows"]
+    monkeypatch.setattr(training, "PACKED_PATH", tmp_path / "missing.packed")
+    monkeypatch.setattr(training, "MODEL_PATH", tmp_path / "model.npz")
+    monkeypatch.setattr(
+        training,
+        "load_csv_files",
+        lambda path, pipeline, **kwargs: pipeline.transform(
+            normal if path == training.NORMAL_PATH else anomaly
+        ),
+    )
+    report = training.train_model(features="spectral", columns=None, workers=1, report_path=None)
+
+    detector = api.AnomalyDetector(str(tmp_path / "model.npz"), states=api.SensorStateStore())
+    assert detector.pipeline.config() == report["pipeline"]
+    assert not detector.pipeline.streamable
+
+    # Distâncias da API (escala dobrada) iguais às do treino no espaço padronizado
+    features = training.build_pipeline("spectral").transform(normal)
+    scaled = (features - detector.pipeline.scale_mean) / detector.pipeline.scale_std
+    mu, cov = scaled.mean(axis=0), np.cov(scaled, rowvar=False)
+    mu_raw, cov_raw = detector.pipeline.fold(mu, cov)
+    api_scorer = MahalanobisScorer(mu_raw, cov_raw, scale=detector.pipeline.scale_std)
+    np.testing.assert_allclose(
+        api_scorer.distance(features), MahalanobisScorer(mu, cov).distance(scaled), rtol=1e-8
+    )
+
+    results = detector.predict_batch(list(normal) + list(anomaly), ["s"] * 400)
+    distances = np.array([r["distance"] for r in results])
+    threshold = report["threshold"]
+    assert np.mean(distances[: len(normal)] > threshold) < 0.15
+    assert np.mean(distances[len(normal) :] > threshold) > 0.9
+    assert "band_bearing" in results[0]["feature_values"]["axis_0"]
+    assert detector.pipeline.transform(normal[0]) == pytest.approx(features[0])
@@ -0,0 +1,52 @@
+# Testes das estatísticas incrementais de treino
+import numpy as np
+
+import training
+from running_stats import RunningCovariance
+
+
+def test_merged_shards_match_numpy():
+    rows = np.random.default_rng(0).normal(loc=50.0, scale=[1.0, 5.0, 0.1], size=(1000, 3))
+
+    shards = [RunningCovariance(3) for _ in range(3)]
+    for shard, part in zip(shards, np.array_split(rows, 3)):
+        for block in np.array_split(part, 7):
+            shard.update(block)
+    merged = RunningCovariance(3)
+    for shard in shards:
+        merged.merge(RunningCovariance.from_state(shard.state()))
+
+    assert merged.count == 1000
+    np.testing.assert_allclose(merged.mean, rows.mean(axis=0))
+    np.testing.assert_allclose(merged.covariance(), np.cov(rows.T))
+    np.testing.assert_allclose(merged.variance(), rows.var(axis=0))
+
+
+def test_streaming_fit_matches_batch_fit():
+    rng = np.random.default_rng(1)
+    normal = rng.normal(loc=[25.0, 1.0, 100.0], scale=[1.0, 0.1, 2.0], size=(300, 3))
+    anomaly = rng.normal(loc=[60.0, 3.0, 180.0], scale=[5.0, 0.5, 10.0], size=(120, 3))
+    rows = np.vstack([normal, anomaly])
+
+    def blocks():
+        return training.array_blocks(rows, block_size=50)
+
+    batch = training.fit_batch(normal, anomaly)
+    streaming = training.fit_streaming(blocks, len(normal), len(anomaly))
+
+    # Estatísticas de dois trechos processados separadamente e combinadas
+    is_train = training.split_mask(len(rows))
+    first = training.accumulate_stats(training.array_blocks(rows[:200], 64), is_train, 300)
+    second = training.accumulate_stats(
+        training.array_blocks(rows[200:], 64), is_train, 300, start=200
+    )
+    stats = (first[0].merge(second[0]), first[1].merge(second[1]))
+    sharded = training.fit_streaming(blocks, len(normal), len(anomaly), stats=stats)
+
+    for result in (streaming, sharded):
+        mu, cov, threshold, scaler, dist_test, y_test = result
+        np.testing.assert_allclose(mu, batch[0], atol=1e-10)
+        np.testing.assert_allclose(cov, batch[1], rtol=1e-10)
+        np.testing.assert_allclose(threshold, batch[2], rtol=1e-10)
+        np.testing.assert_allclose(scaler.scale_, batch[3].scale_)
+        np.testing.assert_allclose(np.sort(dist_test), np.sort(batch[4]), rtol=1e-10)
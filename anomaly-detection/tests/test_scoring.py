@@ -0,0 +1,50 @@
+# Testes do scorer de Mahalanobis pré-fatorado
+import numpy as np
+from scoring import MahalanobisScorer
+
+
+def legacy_distance(x, mu, cov, epsilon=1e-6):
+    cov_reg = cov + epsilon * np.eye(cov.shape[0])
+    scale = np.median(np.diag(cov_reg))
+    inv_covmat = np.linalg.inv(cov_reg / scale) / scale
+    x_mu = x - mu
+    return np.sqrt(np.sum(np.dot(x_mu, inv_covmat) * x_mu, axis=-1))
+
+
+def make_model(n_features=15, seed=0):
+    rng = np.random.default_rng(seed)
+    samples = rng.normal(size=(200, n_features)) @ rng.normal(size=(n_features, n_features))
+    return samples.mean(axis=0), np.cov(samples.T), rng
+
+
+def test_distance_matches_explicit_inverse():
+    mu, cov, rng = make_model()
+    scorer = MahalanobisScorer(mu, cov)
+    x = rng.normal(size=(50, 15))
+
+    np.testing.assert_allclose(scorer.distance(x), legacy_distance(x, mu, cov), rtol=1e-9)
+    np.testing.assert_allclose(scorer.distance(x[0]), legacy_distance(x[0], mu, cov), rtol=1e-9)
+    assert np.ndim(scorer.distance(x[0])) == 0
+
+
+def test_rank_deficient_covariance_is_regularized():
+    mu, cov, _ = make_model()
+    cov[:, 0] = 0.0
+    cov[0, :] = 0.0
+    scorer = MahalanobisScorer(mu, cov)
+
+    assert not scorer.is_singular
+    assert scorer.diagnostics()["rank"] == 14
+    assert scorer.distance(mu) == 0.0
+    x = np.random.default_rng(0).normal(size=(4, 15))
+    np.testing.assert_allclose(scorer.distance(x), legacy_distance(x, mu, cov), rtol=1e-6)
+
+
+def test_non_finite_covariance_returns_inf():
+    mu, cov, _ = make_model()
+    cov[0, 0] = np.nan
+    scorer = MahalanobisScorer(mu, cov)
+
+    assert scorer.is_singular
+    assert scorer.distance(mu) == np.inf
+    assert np.all(np.isinf(scorer.distance(np.zeros((4, 15)))))
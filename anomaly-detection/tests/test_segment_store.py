@@ -0,0 +1,126 @@
+# Testes do armazenamento em segmentos do coletor (server.py)
+import json
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+import server
+from frames import CONTENT_TYPE as FRAME_CONTENT_TYPE, encode_frame
+from segment_store import SegmentStore, read_index, read_segment_header, sensor_dirname
+
+
+def test_roundtrip_rotation_and_time_range(tmp_path):
+    store = SegmentStore(tmp_path, max_segment_bytes=4096, fsync_interval=0)
+    rng = np.random.default_rng(0)
+    windows = [rng.normal(size=(100, 3)).astype(np.float32) for _ in range(10)]
+    for i, window in enumerate(windows):
+        store.append("motor/1", window, timestamp=1000.0 + i)
+
+    store.flush()
+    segments = store.segments("motor/1")
+    assert len(segments) > 1
+    assert read_segment_header(segments[0]) == "motor/1"
+    assert sum(len(read_index(s.with_suffix(".idx"))) for s in segments) == 10
+
+    records = list(store.read("motor/1"))
+    assert [ts for ts, _ in records] == [1000.0 + i for i in range(10)]
+    for (_, data), window in zip(records, windows):
+        np.testing.assert_array_equal(data, window)
+
+    selected = store.read("motor/1", start=1003.0, end=1006.0)
+    assert [ts for ts, _ in selected] == [1003.0, 1004.0, 1005.0]
+    store.close()
+
+    # Reabrir continua no último segmento, sem sobrescrever
+    reopened = SegmentStore(tmp_path, max_segment_bytes=4096, fsync_interval=0)
+    reopened.append("motor/1", windows[0], timestamp=2000.0)
+    assert len(list(reopened.read("motor/1"))) == 11
+    reopened.close()
+
+
+
+def test_colliding_sensor_ids_get_separate_segments(tmp_path):
+    assert sensor_dirname("motor_1") == "motor_1"
+    assert sensor_dirname("motor/1") != sensor_dirname("motor_1")
+
+    store = SegmentStore(tmp_path, fsync_interval=0)
+    store.append("motor/1", np.ones((4, 3)), timestamp=1.0)
+    store.append("motor_1", np.full((4, 3), 2.0), timestamp=2.0)
+    store.append("motor/1", np.ones((4, 3)), timestamp=3.0)
+
+    read = {
+        sensor: [(t, float(data[0, 0])) for t, data in store.read(sensor)]
+        for sensor in ("motor/1", "motor_1")
+    }
+    store.close()
+    assert read["motor/1"] == [(1.0, 1.0), (3.0, 1.0)]
+    assert read["motor_1"] == [(2.0, 2.0)]
+    for sensor in read:
+        segment = tmp_path / sensor_dirname(sensor) / "segment_000001.seg"
+        assert read_segment_header(segment) == sensor
+
+def test_concurrent_posts_are_all_stored(tmp_path):
+    srv = server.create_server(str(tmp_path), 0, fsync_interval=0.05)
+    port = srv.server_address[1]
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+
+    def post(i):
+        window = np.full((20, 3), float(i))
+        if i % 2:
+            body = encode_frame(window, sensor_id=f"s{i % 4}")
+            headers = {"Content-Type": FRAME_CONTENT_TYPE}
+        else:
+            payload = {axis: window[:, k].tolist() for k, axis in enumerate("xyz")}
+            body = json.dumps({**payload, "sensor_id": f"s{i % 4}"}).encode()
+            headers = {"Content-Type": "application/json"}
+        request = urllib.request.Request(f"http://127.0.0.1:{port}/", data=body, headers=headers)
+        assert urllib.request.urlopen(request).status == 204
+
+    try:
+        workers = [threading.Thread(target=post, args=(i,)) for i in range(40)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+    stored = {
+        f"s{k}": sorted(float(data[0, 0]) for _, data in srv.storage.read(f"s{k}")) for k in range(4)
+    }
+    srv.storage.close()
+    for k in range(4):
+        assert stored[f"s{k}"] == [float(i) for i in range(40) if i % 4 == k]
+
+
+def test_csv_storage_keeps_full_precision(tmp_path):
+    storage = server.CsvStorage(tmp_path)
+    data = np.array([[0.1, 1 / 3, 9.80665], [1e-9, -2.5, 123456.789012345]])
+    storage.append("s0", data, timestamp=0.0)
+
+    (path,) = tmp_path.glob("sensor_data_*.csv")
+    assert path.read_text().splitlines()[0] == "0.1,0.3333333333333333,9.80665"
+    np.testing.assert_array_equal(np.loadtxt(path, delimiter=","), data)
+
+
+def test_open_writers_are_bounded_and_reopen(tmp_path):
+    store = SegmentStore(tmp_path, fsync_interval=0, max_open_writers=2, idle_timeout=10.0)
+    for t in range(3):
+        for k in range(4):
+            store.append(f"s{k}", np.full((4, 3), float(t)), timestamp=float(t))
+        assert len(store._writers) == 2
+
+    # Writers fechados por inatividade reabrem o último segmento no próximo append
+    assert store.close_idle(now=time.monotonic() + 11.0) == 2
+    assert len(store._writers) == 0
+    store.append("s0", np.full((4, 3), 3.0), timestamp=3.0)
+
+    stored = {f"s{k}": [t for t, _ in store.read(f"s{k}")] for k in range(4)}
+    store.close()
+    assert stored["s0"] == [0.0, 1.0, 2.0, 3.0]
+    assert all(stored[f"s{k}"] == [0.0, 1.0, 2.0] for k in range(1, 4))
+    assert len(list((tmp_path / "s0").glob("segment_*.seg"))) == 1
@@ -0,0 +1,47 @@
+# Testes do gerador de carga (esp32/sensor_simulator.py)
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "esp32"))
+
+import api  # noqa: E402
+import sensor_simulator  # noqa: E402
+
+
+def test_virtual_sensor_windows_are_continuous_and_injectable():
+    sensor = sensor_simulator.VirtualSensor("s", np.random.default_rng(0))
+    first, anomalous = sensor.next_window()
+    second, _ = sensor.next_window()
+    assert first.shape == (100, 3) and not anomalous
+    assert abs(first[:, 2].mean() - sensor_simulator.GRAVITY) < 0.2
+    assert sensor.sample_index == 200
+    assert not np.allclose(first, second)
+
+    faulty = sensor_simulator.VirtualSensor("f", np.random.default_rng(0), anomaly_rate=1.0)
+    window, anomalous = faulty.next_window()
+    assert anomalous
+    assert np.ptp(window[:, 0]) > np.ptp(first[:, 0])
+
+
+def test_closed_and_open_loop_against_in_process_api(loaded_detector):
+    transport = httpx.ASGITransport(app=api.app)
+    for kwargs in ({"concurrency": 4}, {"rate": 100.0, "fmt": "frame"}):
+        report = asyncio.run(
+            sensor_simulator.run_load(
+                url="http://test",
+                sensors=10,
+                duration=0.3,
+                anomaly_rate=0.5,
+                transport=transport,
+                **kwargs,
+            )
+        )
+        assert report["completed"] > 0
+        assert report["error_rate"] == 0.0
+        assert report["status"] == {"200": report["completed"]}
+        assert report["latency_ms"]["p99"] >= report["latency_ms"]["p50"]
+        assert report["anomalies"]["injected"] > 0
@@ -0,0 +1,51 @@
+# Testes do estado por sensor (debounce, histórico e despejo)
+import numpy as np
+
+from api import AnomalyDetector
+from sensor_state import HISTORY_SIZE, SensorState, SensorStateStore
+
+
+def test_debounce_two_of_three():
+    state = SensorState()
+    assert [state.push_prediction(flag) for flag in [True, False, True, False, False]] == [
+        False,
+        False,
+        True,
+        False,
+        False,
+    ]
+
+
+def test_recent_distances_ring_buffer():
+    state = SensorState()
+    for d in range(30):
+        state.push_distance(float(d))
+    assert state.distance_count == HISTORY_SIZE
+    assert state.recent_distances(5) == [25.0, 26.0, 27.0, 28.0, 29.0]
+
+
+def test_store_evicts_least_recently_used_and_idle_sensors(fake_clock):
+    clock = fake_clock
+    store = SensorStateStore(max_sensors=2, ttl=10.0, clock=clock)
+    store.get("a")
+    store.get("b")
+    store.get("a")
+    store.get("c")
+    assert "b" not in store and "a" in store and "c" in store
+
+    clock.now = 5.0
+    store.get("c")
+    clock.now = 12.0
+    store.get("c")
+    assert "a" not in store and len(store) == 1
+
+
+def test_sensors_do_not_share_debounce_history(model_path):
+    detector = AnomalyDetector(model_path)
+    detector.threshold = 0.0  # toda janela é anômala na predição bruta
+
+    window = np.random.default_rng(0).normal(size=(100, 3))
+    assert detector.predict(window, "a")["is_anomaly"] is False
+    assert detector.predict(window, "b")["is_anomaly"] is False
+    assert detector.predict(window, "a")["is_anomaly"] is True
+    assert detector.predict(window, "b")["is_anomaly"] is True
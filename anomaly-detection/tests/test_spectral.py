@@ -0,0 +1,81 @@
+# Testes das features espectrais por banda
+import numpy as np
+import pytest
+
+import api
+from features import N_FEATURES_PER_AXIS, extract_features
+from spectral import SAMPLE_RATE, SpectralFeatures, spectral_plan
+
+
+def tone(freq, samples=100, amplitude=1.0):
+    t = np.arange(samples) / SAMPLE_RATE
+    return amplitude * np.sin(2 * np.pi * freq * t)
+
+
+def test_batched_spectrum_matches_per_axis_loop():
+    rng = np.random.default_rng(0)
+    windows = rng.normal(size=(4, 100, 3))
+    spectrum = SpectralFeatures().spectrum(windows)
+
+    hann = np.hanning(100)
+    for b, window in enumerate(windows):
+        expected = np.stack([abs(np.fft.rfft(axis * hann))[1:] for axis in window.T], axis=1)
+        np.testing.assert_allclose(spectrum[b], expected, atol=1e-12)
+
+
+def test_band_energy_locates_tones_and_sums_to_variance():
+    spectral = SpectralFeatures()
+    window = np.stack([tone(30.0), tone(70.0, amplitude=0.5), 9.8 + tone(4.0, amplitude=0.1)], axis=1)
+    features = spectral(window).reshape(3, spectral.n_bands)
+
+    names = spectral.band_names
+    assert np.argmax(features[0]) == names.index("imbalance")
+    assert np.argmax(features[1]) == names.index("bearing")
+    assert np.argmax(features[2]) == names.index("low")
+
+    # Parseval: a soma das energias das bandas aproxima a variância da janela
+    rng = np.random.default_rng(1)
+    noise = rng.normal(scale=2.0, size=(256, 100, 3))
+    energy = (spectral(noise).reshape(256, 3, -1) ** 2).sum(axis=-1)
+    np.testing.assert_allclose(energy.mean(), noise.var(axis=1).mean(), rtol=0.05)
+
+
+def test_plan_is_cached_per_window_length():
+    spectral = SpectralFeatures()
+    spectral(np.zeros((100, 3)))
+    before = spectral_plan.cache_info().hits
+    spectral(np.zeros((8, 100, 3)))
+    assert spectral_plan.cache_info().hits == before + 1
+    assert spectral(np.zeros((8, 64, 3))).shape == (8, 3 * spectral.n_bands)
+
+
+def test_detector_with_legacy_spectral_model(tmp_path):
+    # Chaves espectrais soltas no .npz, como eram gravadas antes do formato binário
+    rng = np.random.default_rng(2)
+    windows = rng.normal(loc=[0.0, 0.0, 9.8], scale=0.05, size=(200, 100, 3))
+    spectral = SpectralFeatures()
+    features = np.hstack([extract_features(windows), spectral(windows)])
+    model_path = tmp_path / "spectral_model.npz"
+    np.savez(
+        model_path,
+        mu=features.mean(axis=0),
+        cov=np.cov(features, rowvar=False) + 1e-9 * np.eye(features.shape[1]),
+        threshold=50.0,
+        spectral_bands=np.array(spectral.bands),
+        spectral_band_names=np.array(spectral.band_names),
+        spectral_sample_rate=np.array(spectral.sample_rate),
+    )
+
+    detector = api.AnomalyDetector(str(model_path), states=api.SensorStateStore())
+    assert detector.spectral.band_names == spectral.band_names
+    assert detector.features_per_axis == N_FEATURES_PER_AXIS + spectral.n_bands
+
+    single = detector.predict(windows[0], "s1")
+    batch = detector.predict_batch(list(windows[:3]), ["s2"] * 3)
+    assert single["distance"] == pytest.approx(batch[0]["distance"])
+    assert "band_bearing" in single["feature_values"]["axis_0"]
+    assert "rms" in single["feature_values"]["axis_0"]
+
+    faulty = windows[3].copy()
+    faulty[:, 0] += tone(70.0, amplitude=0.5)
+    assert detector.predict(faulty, "s3")["distance"] > single["distance"]
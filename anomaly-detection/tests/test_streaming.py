@@ -0,0 +1,62 @@
+# Testes do buffer deslizante e do endpoint de streaming
+import numpy as np
+import pytest
+
+from features import extract_features
+from streaming import SlidingWindowBuffer, StreamingFeatures
+
+
+def test_emits_first_window_then_every_hop():
+    samples = np.arange(300 * 3, dtype=np.float64).reshape(300, 3)
+    buffer = SlidingWindowBuffer(window=100, hop=25)
+
+    emitted = []
+    for chunk in np.array_split(samples, 17):  # blocos de tamanhos irregulares
+        emitted.extend(buffer.extend(chunk))
+
+    assert [end for end, _ in emitted] == list(range(100, 301, 25))
+    for end, window in emitted:
+        np.testing.assert_array_equal(window, samples[end - 100 : end])
+
+
+def test_rejects_invalid_configuration_and_shapes():
+    with pytest.raises(ValueError):
+        SlidingWindowBuffer(window=10, hop=11)
+    with pytest.raises(ValueError):
+        SlidingWindowBuffer(window=10, hop=5).extend(np.zeros((4, 2)))
+
+
+@pytest.mark.parametrize("window,hop", [(100, 25), (64, 1), (50, 50)])
+def test_incremental_features_match_batch_extraction(window, hop):
+    rng = np.random.default_rng(window + hop)
+    samples = rng.normal(loc=[0.2, -0.1, 9.8], scale=[0.05, 0.3, 0.02], size=(1000, 3))
+    samples[400:420, 1] += 3.0  # pico que entra e sai da janela
+
+    accumulator = StreamingFeatures(window=window, hop=hop, refresh_every=300)
+    emitted = []
+    for chunk in np.array_split(samples, 13):
+        emitted.extend(accumulator.extend(chunk))
+
+    assert [end for end, _ in emitted] == list(range(window, 1001, hop))
+    for end, features in emitted:
+        expected = extract_features(samples[end - window : end])
+        np.testing.assert_allclose(features, expected, rtol=1e-7, atol=1e-9)
+
+
+def test_incremental_features_stay_accurate_on_long_streams():
+    rng = np.random.default_rng(7)
+    samples = rng.normal(loc=1000.0, scale=0.01, size=(20000, 3))
+    accumulator = StreamingFeatures(window=100, hop=100)
+    accumulator.extend(samples)
+
+    np.testing.assert_allclose(
+        accumulator.features(), extract_features(samples[-100:]), rtol=1e-6, atol=1e-9
+    )
+
+
+def test_constant_signal_matches_batch_nan_kurtosis():
+    accumulator = StreamingFeatures(window=10, hop=10)
+    (_, features), = accumulator.extend(np.full((10, 3), 2.5))
+    expected = extract_features(np.full((10, 3), 2.5))
+    np.testing.assert_array_equal(np.isnan(features), np.isnan(expected))
+    np.testing.assert_allclose(features[~np.isnan(features)], expected[~np.isnan(expected)])